@@ -1,17 +1,19 @@
+import contextlib
+import functools
+import json
+import sys
 import click
 from rich.console import Console
-from rich.syntax import Syntax
-from rich.panel import Panel
-from rich.table import Table
-from pathlib import Path
 from typing import Optional
-from .generators.iac import IaCGenerator
-from .generators.config import ConfigGenerator
-from .generators.pipeline import PipelineGenerator
-from .generators.utility import UtilityGenerator
-from .utils.validators import validate_output
+from . import registry
+from .core.tuning import PROFILES
+
+# Generators, their LLM stack and the richer renderers are imported inside
+# the commands that need them, so `aiiac --version` and `aiiac list` start
+# without loading langchain, pydantic or requests.
 
 console = Console()
+err_console = Console(stderr=True)
 
 def print_logo():
     """Print AIIAC logo."""
@@ -25,29 +27,131 @@ def print_logo():
     AI Infrastructure as Code
     """
 
+def cache_options(f):
+    """Add response cache flags to a generating command."""
+    f = click.option('--refresh', is_flag=True, help='Regenerate and overwrite the cached response')(f)
+    f = click.option('--no-cache', 'no_cache', is_flag=True, help='Bypass the response cache')(f)
+    return f
+
+def output_options(f):
+    """Add artifact output flags to a generating command."""
+    f = click.option('--overwrite', is_flag=True, help='Replace existing files instead of picking a new name')(f)
+    f = click.option('--output', '-o', help='Output directory, one file per code block')(f)
+    return f
+
+def decoding_options(f):
+    """Add output limit flags, handed to the command as ``decoding``."""
+    @functools.wraps(f)
+    def command(*args, max_tokens, temperature, stop, no_stop, samples, repair, **kwargs):
+        decoding = {"num_predict": max_tokens, "temperature": temperature, "samples": samples, "repair": repair}
+        if no_stop:
+            decoding["stop"] = []
+        elif stop:
+            decoding["stop"] = [s.replace('\\n', '\n') for s in stop]
+        return f(*args, decoding={k: v for k, v in decoding.items() if v is not None}, **kwargs)
+
+    command = click.option('--repair', type=click.IntRange(0),
+                           help='Rounds of targeted repair for code that fails validation (default: 2, 0 turns it off)')(command)
+    command = click.option('--samples', type=click.IntRange(1),
+                           help='Generate N samples at once (at most 8) and keep the first that validates')(command)
+    command = click.option('--no-stop', is_flag=True, help='Let the model run past the closing code fence')(command)
+    command = click.option('--stop', multiple=True, help='Stop sequence, \\n for a newline (repeatable; default: per template)')(command)
+    command = click.option('--temperature', type=float, help='Sampling temperature')(command)
+    command = click.option('--max-tokens', type=int, help='Output token budget (default: per template)')(command)
+    return command
+
+def queue_option(f):
+    """Add the job queue location to a queue command."""
+    return click.option('--queue', 'queue_path', type=click.Path(dir_okay=False), envvar='AIIAC_QUEUE',
+                        help='Job queue database (default: ~/.local/share/aiiac/jobs.sqlite)')(f)
+
 @click.group()
 @click.version_option(version="0.1.0")
-def main():
+@click.option('--pool-size', type=int, envvar='AIIAC_POOL_SIZE', help='Keep-alive connections to the LLM server')
+@click.option('--profile', type=click.Choice(list(PROFILES)), envvar='AIIAC_PROFILE',
+              help='Backend tuning profile: keep-alive, context and batch sizes')
+@click.option('--endpoint', 'endpoints', multiple=True,
+              help='Ollama server URL (repeatable; requests go to the least-loaded healthy one)')
+@click.option('--endpoints-file', type=click.Path(exists=True, dir_okay=False), envvar='AIIAC_ENDPOINTS_FILE',
+              help='YAML or JSON list of Ollama server URLs')
+@click.option('--admission-limit', type=click.IntRange(1), envvar='AIIAC_ADMISSION_LIMIT',
+              help='Adapt the model requests in flight starting from this limit, queuing the rest fairly per user')
+@click.option('--timeout', type=click.FloatRange(0), envvar='AIIAC_TIMEOUT',
+              help='Seconds a generation may take, retries included (0: no deadline; default: 600)')
+@click.option('--retries', type=click.IntRange(0), envvar='AIIAC_RETRIES',
+              help='Retries after a connection error, timeout or 5xx/429 response (default: 2)')
+@click.option('--hedge', type=click.FloatRange(0, 1, max_open=True), envvar='AIIAC_HEDGE',
+              help='Duplicate a request slower than this quantile of recent ones, e.g. 0.95 (0: off)')
+@click.option('--prompt-max-tokens', type=click.IntRange(1), envvar='AIIAC_PROMPT_MAX_TOKENS',
+              help='Fail generations whose prompt is over this many tokens (see aiiac prompts --stats)')
+@click.option('--similar', type=click.FloatRange(0, 1, min_open=True), envvar='AIIAC_SIMILAR_THRESHOLD',
+              help='Reuse validated results of earlier requests at least this similar (0-1)')
+@click.option('--stats', is_flag=True, help='Print generation timings when the command finishes')
+@click.option('--metrics-file', type=click.Path(dir_okay=False), envvar='AIIAC_METRICS_FILE',
+              help='Write Prometheus metrics to this file on exit')
+@click.pass_context
+def main(ctx: click.Context, pool_size: Optional[int], profile: Optional[str], endpoints, endpoints_file: Optional[str],
+         admission_limit: Optional[int], timeout: Optional[float], retries: Optional[int], hedge: Optional[float],
+         prompt_max_tokens: Optional[int], similar: Optional[float], stats: bool, metrics_file: Optional[str]):
     """AI Infrastructure as Code Generator"""
     print_logo()
+    if pool_size:
+        from .core.client import configure_pool
+        configure_pool(pool_size)
+    if profile:
+        from .core.client import configure_profile
+        configure_profile(profile)
+    if endpoints or endpoints_file:
+        from .core.client import configure_endpoints
+        from .core.endpoints import load_endpoints_file
+        try:
+            settings = load_endpoints_file(endpoints_file) if endpoints_file else {"urls": []}
+        except Exception as e:
+            raise click.BadParameter(str(e), param_hint="--endpoints-file")
+        settings["urls"] = [*endpoints, *settings["urls"]]
+        configure_endpoints(**settings)
+    if admission_limit:
+        from .core.admission import configure_admission
+        configure_admission(admission_limit)
+    if timeout is not None or retries is not None or hedge is not None:
+        from .core.client import configure_resilience
+        configure_resilience(timeout, retries, hedge)
+    if prompt_max_tokens:
+        from .generators.prompts import configure_prompts
+        configure_prompts(prompt_max_tokens)
+    if similar:
+        from .core.similarity import configure_similarity
+        configure_similarity(similar)
+    if stats or metrics_file:
+        ctx.call_on_close(lambda: _report_metrics(stats, metrics_file))
 
 @main.command()
 @click.argument('description')
 @click.option('--cloud', '-c', default='aws', help='Cloud provider')
 @click.option('--type', '-t', default='terraform', help='IaC type')
-@click.option('--output', '-o', help='Output directory')
-def create(description: str, cloud: str, type: str, output: Optional[str]):
+@output_options
+@cache_options
+@decoding_options
+def create(description: str, cloud: str, type: str, output: Optional[str], overwrite: bool,
+           no_cache: bool, refresh: bool, decoding: dict):
     """Create infrastructure code from description."""
-    with console.status("[bold green]Generating infrastructure code..."):
-        generator = IaCGenerator()
-        result = generator.generate(
-            description,
-            provider=cloud,
-            template_type=type
+    generator = _get_generator("iac")
+    with _artifact_writer(output, overwrite) as writer:
+        result = _stream_result(
+            generator.generate_stream(
+                description,
+                provider=cloud,
+                template_type=type,
+                use_cache=not no_cache,
+                refresh=refresh,
+                **decoding
+            ),
+            "Generating infrastructure code...",
+            writer
         )
-        
+
         if result.success:
-            _display_and_save_result(result, output)
+            _display_and_save_result(result, writer=writer)
         else:
             console.print(f"[red]Error:[/] {result.message}")
 
@@ -55,61 +159,485 @@ def create(description: str, cloud: str, type: str, output: Optional[str]):
 @click.argument('description')
 @click.option('--type', '-t', default='kubernetes', help='Configuration type')
 @click.option('--env', '-e', default='dev', help='Environment')
-@click.option('--output', '-o', help='Output directory')
-def config(description: str, type: str, env: str, output: Optional[str]):
+@output_options
+@cache_options
+@decoding_options
+def config(description: str, type: str, env: str, output: Optional[str], overwrite: bool,
+           no_cache: bool, refresh: bool, decoding: dict):
     """Generate configuration files."""
-    with console.status("[bold green]Generating configuration..."):
-        generator = ConfigGenerator()
-        result = generator.generate(
-            description,
-            config_type=type,
-            environment=env
+    generator = _get_generator("config")
+    with _artifact_writer(output, overwrite) as writer:
+        result = _stream_result(
+            generator.generate_stream(
+                description,
+                config_type=type,
+                environment=env,
+                use_cache=not no_cache,
+                refresh=refresh,
+                **decoding
+            ),
+            "Generating configuration...",
+            writer
         )
-        
+
         if result.success:
-            _display_and_save_result(result, output)
+            _display_and_save_result(result, writer=writer)
         else:
             console.print(f"[red]Error:[/] {result.message}")
 
 @main.command()
 @click.argument('description')
 @click.option('--platform', '-p', default='github', help='CI/CD platform')
-@click.option('--output', '-o', help='Output directory')
-def pipeline(description: str, platform: str, output: Optional[str]):
+@output_options
+@cache_options
+@decoding_options
+def pipeline(description: str, platform: str, output: Optional[str], overwrite: bool,
+             no_cache: bool, refresh: bool, decoding: dict):
     """Generate CI/CD pipeline."""
-    with console.status("[bold green]Generating pipeline..."):
-        generator = PipelineGenerator()
-        result = generator.generate(
-            description,
-            platform=platform
+    generator = _get_generator("pipeline")
+    with _artifact_writer(output, overwrite) as writer:
+        result = _stream_result(
+            generator.generate_stream(
+                description,
+                platform=platform,
+                use_cache=not no_cache,
+                refresh=refresh,
+                **decoding
+            ),
+            "Generating pipeline...",
+            writer
         )
-        
+
         if result.success:
-            _display_and_save_result(result, output)
+            _display_and_save_result(result, writer=writer)
         else:
             console.print(f"[red]Error:[/] {result.message}")
 
 @main.command()
 @click.argument('type')
 @click.argument('description')
-@click.option('--output', '-o', help='Output directory')
-def util(type: str, description: str, output: Optional[str]):
+@output_options
+@cache_options
+@decoding_options
+def util(type: str, description: str, output: Optional[str], overwrite: bool,
+         no_cache: bool, refresh: bool, decoding: dict):
     """Generate utility code."""
-    with console.status("[bold green]Generating utility..."):
-        generator = UtilityGenerator()
-        result = generator.generate(
-            description,
-            utility_type=type
+    generator = _get_generator("util")
+    with _artifact_writer(output, overwrite) as writer:
+        result = _stream_result(
+            generator.generate_stream(
+                description,
+                utility_type=type,
+                use_cache=not no_cache,
+                refresh=refresh,
+                **decoding
+            ),
+            "Generating utility...",
+            writer
         )
-        
+
         if result.success:
-            _display_and_save_result(result, output)
+            _display_and_save_result(result, writer=writer)
         else:
             console.print(f"[red]Error:[/] {result.message}")
 
+@main.command()
+@click.argument('description')
+@click.option('--cloud', '-c', default='aws', help='Cloud provider')
+@click.option('--type', '-t', default='terraform', help='IaC type')
+@click.option('--config', 'configs', multiple=True, default=['kubernetes'], show_default=True,
+              help='Configuration type (repeatable)')
+@click.option('--env', '-e', default='dev', help='Environment')
+@click.option('--platform', '-p', default='github', help='CI/CD platform')
+@output_options
+@cache_options
+@decoding_options
+def stack(description: str, cloud: str, type: str, configs, env: str, platform: str,
+          output: Optional[str], overwrite: bool, no_cache: bool, refresh: bool, decoding: dict):
+    """Generate IaC, configurations and a pipeline in one go."""
+    from .orchestration.stack import generate_stack
+    
+    def report(name, response, elapsed):
+        mark = "[green]✓[/]" if response.success else "[red]✗[/]"
+        console.print(f"{mark} {name} ({elapsed:.1f}s)")
+    
+    with console.status("[bold green]Generating stack..."):
+        result = generate_stack(
+            description,
+            provider=cloud,
+            iac_type=type,
+            config_types=configs,
+            environment=env,
+            platform=platform,
+            on_node=report,
+            options={"use_cache": not no_cache, "refresh": refresh, **decoding}
+        )
+    
+    if result.templates:
+        _display_and_save_result(result, output, overwrite)
+    if not result.success:
+        console.print(f"[red]Error:[/] {result.message}")
+
+@main.command()
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--concurrency', '-j', default=4, show_default=True, help='Jobs generated at once')
+@click.option('--results', '-r', type=click.File('w'), default='-', help='JSONL results file')
+@click.option('--validate-workers', type=int, help='Processes validating output (default: one per CPU, up to 4; 1 validates inline)')
+@cache_options
+@decoding_options
+def batch(manifest: str, concurrency: int, results, validate_workers: Optional[int], no_cache: bool, refresh: bool,
+          decoding: dict):
+    """Run generation jobs from a YAML or JSONL manifest."""
+    import asyncio
+    from .core.client import aclose
+    from .orchestration.batch import load_manifest, run_batch
+    
+    try:
+        entries = load_manifest(manifest)
+    except Exception as e:
+        raise click.ClickException(f"Invalid manifest: {e}")
+    
+    def emit(record):
+        results.write(json.dumps(record) + "\n")
+        results.flush()
+    
+    async def run():
+        try:
+            return await run_batch(
+                entries,
+                concurrency=concurrency,
+                on_result=emit,
+                validate_workers=validate_workers,
+                use_cache=not no_cache,
+                refresh=refresh,
+                **decoding
+            )
+        finally:
+            await aclose()
+    
+    records = asyncio.run(run())
+    failed = sum(1 for record in records if not record["success"])
+    invalid = sum(1 for record in records if record.get("valid") is False)
+    err_console.print(
+        f"[green]{len(records) - failed} succeeded[/], [red]{failed} failed[/], "
+        f"[yellow]{invalid} did not validate[/]"
+    )
+    if failed:
+        sys.exit(1)
+
+@main.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', default=8080, show_default=True, help='Port to listen on')
+@click.option('--workers', '-w', default=8, show_default=True, help='Generations run at once')
+@click.option('--queue-size', default=64, show_default=True, help='Requests waiting for a worker before answering 429')
+@click.option('--shutdown-timeout', default=60.0, show_default=True,
+              help='Seconds running generations get to finish on shutdown')
+@click.option('--model', 'models', multiple=True,
+              help='Model requests may use (repeatable; default: AIIAC_MODELS, or codellama)')
+def serve(host: str, port: int, workers: int, queue_size: int, shutdown_timeout: float, models: tuple):
+    """Serve the generators over HTTP, as JSON or server-sent events."""
+    from .web.api import serve as run_server
+    
+    run_server(host=host, port=port, workers=workers, queue_size=queue_size, shutdown_timeout=shutdown_timeout,
+               models=models)
+
+@main.command()
+@click.argument('generator', type=click.Choice(sorted([*registry.GENERATORS, *registry.ALIASES])))
+@click.argument('description')
+@click.option('--provider', '-c', help='Cloud provider (iac)')
+@click.option('--type', '-t', help='Template, configuration, platform or utility type')
+@click.option('--env', '-e', help='Target environment (config)')
+@click.option('--model', default='codellama', show_default=True, help='Model name')
+@click.option('--priority', '-p', default=0, show_default=True, help='Higher priorities run first')
+@click.option('--max-attempts', default=3, show_default=True, help='Tries before the job is dead-lettered')
+@cache_options
+@decoding_options
+@queue_option
+def submit(generator: str, description: str, provider: Optional[str], type: Optional[str], env: Optional[str],
+           model: str, priority: int, max_attempts: int, no_cache: bool, refresh: bool, decoding: dict,
+           queue_path: Optional[str]):
+    """Queue a generation for `aiiac worker` and print its job ID."""
+    from .models.schemas import GenerateRequest
+    
+    request = GenerateRequest(
+        prompt=description,
+        provider=provider,
+        type=type,
+        env=env,
+        model=model,
+        use_cache=False if no_cache else None,
+        refresh=refresh or None,
+        **decoding
+    )
+    queue = _open_queue(queue_path)
+    try:
+        click.echo(queue.submit(generator, request, priority=priority, max_attempts=max_attempts))
+    finally:
+        queue.close()
+
+@main.command()
+@click.option('--concurrency', '-j', default=4, show_default=True, help='Jobs generated at once')
+@click.option('--lease', default=300.0, show_default=True,
+              help='Seconds a job stays ours without renewal before another worker may take it')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between looks at an empty queue')
+@click.option('--drain', is_flag=True, help='Exit once no job is queued or running')
+@queue_option
+def worker(concurrency: int, lease: float, poll_interval: float, drain: bool, queue_path: Optional[str]):
+    """Run queued generations until interrupted."""
+    import asyncio
+    import signal
+    from .orchestration.queue import run_workers
+    
+    queue = _open_queue(queue_path)
+    
+    def report(job, status):
+        color = {"done": "green", "queued": "yellow"}.get(status, "red")
+        err_console.print(f"[{color}]{status}[/] {job['id']} {job['generator']}: {job['request']['prompt'][:60]}")
+    
+    async def run():
+        # Jobs in progress finish and are stored before the worker exits
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(signum, stop.set)
+        return await run_workers(
+            queue,
+            concurrency=concurrency,
+            lease=lease,
+            poll_interval=poll_interval,
+            drain=drain,
+            stop=stop,
+            on_finish=report
+        )
+    
+    try:
+        finished = asyncio.run(run())
+    finally:
+        queue.close()
+    err_console.print(f"{finished} jobs run")
+
+@main.command('status')
+@click.argument('job_id', required=False)
+@click.option('--state', type=click.Choice(["queued", "running", "done", "dead"]), help='Only list jobs in this state')
+@click.option('--limit', default=20, show_default=True, help='Jobs listed')
+@queue_option
+def job_status(job_id: Optional[str], state: Optional[str], limit: int, queue_path: Optional[str]):
+    """Show a queued job, or the queue's counts and latest jobs."""
+    from datetime import datetime
+    from rich.table import Table
+    
+    queue = _open_queue(queue_path)
+    try:
+        if job_id:
+            job = queue.get(job_id)
+            if job is None:
+                raise click.ClickException(f"No job {job_id}")
+            click.echo(json.dumps(job, indent=2))
+            return
+        counts = queue.counts()
+        jobs = queue.jobs(state, limit)
+    finally:
+        queue.close()
+    
+    console.print(", ".join(f"{count} {name}" for name, count in counts.items()))
+    table = Table()
+    for column in ("ID", "Generator", "State", "Priority", "Attempts", "Submitted", "Request", "Error"):
+        table.add_column(column)
+    for job in jobs:
+        table.add_row(
+            job["id"],
+            job["generator"],
+            job["status"],
+            str(job["priority"]),
+            f"{job['attempts']}/{job['max_attempts']}",
+            datetime.fromtimestamp(job["submitted"]).strftime("%Y-%m-%d %H:%M:%S"),
+            job["request"]["prompt"][:40],
+            job["error"] or ""
+        )
+    console.print(table)
+
+@main.command('result')
+@click.argument('job_id')
+@output_options
+@queue_option
+def job_result(job_id: str, output: Optional[str], overwrite: bool, queue_path: Optional[str]):
+    """Show a finished job's code, saving it with --output."""
+    queue = _open_queue(queue_path)
+    try:
+        job = queue.get(job_id)
+        result = queue.result(job_id)
+    finally:
+        queue.close()
+    if job is None:
+        raise click.ClickException(f"No job {job_id}")
+    if result is None:
+        raise click.ClickException(f"Job {job_id} is {job['status']} and has no result yet")
+    
+    if result.success:
+        _display_and_save_result(result, output, overwrite)
+    else:
+        console.print(f"[red]Error:[/] {result.message}")
+        sys.exit(1)
+
+@main.command()
+@click.argument('job_ids', nargs=-1, required=True)
+@queue_option
+def requeue(job_ids, queue_path: Optional[str]):
+    """Give dead-lettered jobs a fresh set of attempts."""
+    queue = _open_queue(queue_path)
+    try:
+        missed = [job_id for job_id in job_ids if not queue.requeue(job_id)]
+    finally:
+        queue.close()
+    if missed:
+        raise click.ClickException(f"Not dead-lettered: {', '.join(missed)}")
+
+@main.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--language', '-l', help='Language of every file (default: from the file name)')
+@click.option('--workers', '-j', type=int, help='Validation processes (1 validates inline)')
+def validate(paths, language: Optional[str], workers: Optional[int]):
+    """Validate generated files or directories of them."""
+    from pathlib import Path
+    from .validation.engine import CHECKERS, language_for_path, validate_many
+    
+    files = []
+    for path in map(Path, paths):
+        candidates = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for candidate in candidates:
+            file_language = language or language_for_path(str(candidate))
+            # Inside directories, skip files no checker understands
+            if file_language in CHECKERS or not path.is_dir():
+                files.append((candidate, file_language))
+    
+    if not files:
+        raise click.ClickException("No files to validate")
+    
+    results = validate_many(
+        [(path.read_text(errors="replace"), file_language) for path, file_language in files],
+        workers=workers
+    )
+    invalid = 0
+    for (path, file_language), result in zip(files, results):
+        if file_language not in CHECKERS:
+            console.print(f"[dim]- {path} (no checks for {file_language or 'this file type'})[/]")
+        elif result.valid:
+            console.print(f"[green]✓[/] {path}")
+        else:
+            invalid += 1
+            console.print(f"[red]✗[/] {path}")
+            for issue in result.errors:
+                console.print(f"    {issue}")
+    
+    if invalid:
+        err_console.print(f"[red]{invalid} of {len(files)} files did not validate[/]")
+        sys.exit(1)
+
+@main.command()
+@click.argument('models', nargs=-1)
+def warmup(models):
+    """Load models into Ollama before the first request needs them.
+    
+    Defaults to the models in AIIAC_MODELS (codellama when unset). Use the
+    same --profile as the generations that follow, or Ollama reloads.
+    """
+    from .core.tuning import configured_models, warm_up
+    
+    with console.status("[bold green]Loading models..."):
+        reports = warm_up(models or configured_models())
+    
+    pooled = len({report['endpoint'] for report in reports}) > 1
+    for report in reports:
+        name = f"{report['model']} @ {report['endpoint']}" if pooled else report['model']
+        if "error" in report:
+            console.print(f"[red]✗[/] {name}: {report['error']}")
+        else:
+            console.print(
+                f"[green]✓[/] {name} loaded in {report['load']:.2f}s "
+                f"({report['wall']:.2f}s end to end)"
+            )
+    if any("error" in report for report in reports):
+        sys.exit(1)
+
+@main.command()
+def endpoints():
+    """Check the health and models of the configured Ollama servers."""
+    from rich.table import Table
+    from .core.client import get_endpoints, get_llm
+    from .core.endpoints import EndpointPool
+    
+    pool = get_endpoints() or EndpointPool([get_llm().base_url], health_interval=0)
+    pool.check_all()
+    
+    table = Table(title="Ollama Endpoints")
+    table.add_column("Endpoint", style="cyan")
+    table.add_column("Status")
+    table.add_column("Models", style="green")
+    for endpoint in pool.status():
+        status = "[green]healthy[/]" if endpoint["healthy"] else f"[red]down[/] {endpoint['last_error'] or ''}"
+        table.add_row(endpoint["url"], status, ", ".join(endpoint["models"] or []))
+    console.print(table)
+    if not any(endpoint["healthy"] for endpoint in pool.status()):
+        sys.exit(1)
+
+@main.command()
+@click.argument('generators', nargs=-1, type=click.Choice(sorted([*registry.GENERATORS, *registry.ALIASES])))
+@click.option('--stats', is_flag=True, help='Show token counts instead of the prompt text')
+@click.option('--max-tokens', type=click.IntRange(1), envvar='AIIAC_PROMPT_MAX_TOKENS',
+              help='Flag templates over this many tokens, exiting with an error')
+def prompts(generators, stats: bool, max_tokens: Optional[int]):
+    """Show the compiled prompt templates, or their token footprint with --stats.
+    
+    Token counts are estimates; prompts filled in with the requirements
+    add their tokens on top. Generations fail fast once their prompt is
+    over its cap (AIIAC_PROMPT_MAX_TOKENS, or the template's own).
+    """
+    from rich.table import Table
+    
+    names = [registry.resolve(name) for name in generators] or [*registry.GENERATORS]
+    rows = []
+    for name in dict.fromkeys(names):
+        generator_class = registry.load_generator(name)
+        for template, prompt in generator_class.PROMPTS.items():
+            cap = generator_class.PROMPT_MAX_TOKENS.get(template) or max_tokens
+            rows.append((prompt, cap))
+    
+    over = [prompt.name for prompt, cap in rows if cap and prompt.tokens > cap]
+    if stats:
+        table = Table(title="Prompt Templates (estimated tokens)")
+        table.add_column("Template", style="cyan")
+        for column in ("Written", "Compiled", "Saved", "Cap"):
+            table.add_column(column, justify="right")
+        table.add_column("Fields", style="green")
+        for prompt, cap in rows:
+            saved = 1 - prompt.tokens / prompt.source_tokens if prompt.source_tokens else 0.0
+            table.add_row(
+                f"[red]{prompt.name}[/]" if prompt.name in over else prompt.name,
+                str(prompt.source_tokens),
+                str(prompt.tokens),
+                f"{saved:.0%}",
+                str(cap) if cap else "-",
+                ", ".join(prompt.fields)
+            )
+        console.print(table)
+        total_written = sum(prompt.source_tokens for prompt, _ in rows)
+        total = sum(prompt.tokens for prompt, _ in rows)
+        console.print(f"{total} tokens compiled from {total_written} written")
+    else:
+        for prompt, _ in rows:
+            console.print(f"[bold cyan]# {prompt.name}[/] ({prompt.tokens} tokens)")
+            console.print(prompt.text, markup=False, highlight=False)
+    
+    if over:
+        err_console.print(f"[red]Over the token cap: {', '.join(over)}[/]")
+        sys.exit(1)
+
 @main.command()
 def list():
     """List available generators and templates."""
+    from rich.table import Table
+    
     table = Table(title="Available Generators")
     
     table.add_column("Type", style="cyan")
@@ -117,34 +645,131 @@ def list():
     table.add_column("Templates", style="yellow")
     
     # Add rows for each generator type
-    table.add_row(
-        "Infrastructure",
-        "\n".join(["aws", "azure", "gcp"]),
-        "\n".join(["terraform", "cloudformation", "bicep"])
-    )
+    for info in registry.GENERATORS.values():
+        table.add_row(
+            info.title,
+            "\n".join(info.providers),
+            "\n".join(info.templates)
+        )
     
     table.add_row(
-        "Configuration",
-        "\n".join(["kubernetes", "docker", "terraform"]),
-        "\n".join(["yaml", "compose", "tfvars"])
+        "Stack",
+        "IaC → configurations → pipeline",
+        "\n".join(["--config (repeatable)", "--platform"])
     )
     
-    table.add_row(
-        "Pipeline",
-        "\n".join(["github", "gitlab", "jenkins"]),
-        "\n".join(["workflow", "ci", "jenkinsfile"])
-    )
+    console.print(table)
+
+def _get_generator(name: str):
+    """Load a generator class on demand and return its shared instance."""
+    from .core.client import get_generator
+    return get_generator(registry.load_generator(name))
+
+def _open_queue(queue_path: Optional[str]):
+    """The job queue at ``--queue``, or the default one."""
+    from .orchestration.queue import JobQueue, default_queue_path
+    return JobQueue(queue_path or default_queue_path())
+
+def _artifact_writer(output_dir: Optional[str], overwrite: bool):
+    """A writer splitting the stream into files, or nothing without ``--output``."""
+    if not output_dir:
+        return contextlib.nullcontext()
+    from .utils.output import ArtifactWriter
+    return ArtifactWriter(output_dir, overwrite=overwrite)
+
+def _stream_result(stream, title: str, writer=None):
+    """Render a generation stream live and return its final response.
+
+    Chunks also go to ``writer`` as they arrive.
+    """
+    from collections import deque
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.text import Text
     
-    table.add_row(
-        "Utility",
-        "\n".join(["network", "kubectl", "mongo"]),
-        "\n".join(["scanner", "command", "query"])
-    )
+    # Only the tail fits on screen; keeping the rest is wasted memory
+    tail = deque(maxlen=max(console.height - 4, 1))
+    partial = ""
     
-    console.print(table)
+    with Live(
+        Panel(Text("Waiting for the model..."), title=f"[bold green]{title}[/]"),
+        console=console,
+        refresh_per_second=8,
+        transient=True
+    ) as live:
+        for chunk in stream:
+            if writer is not None:
+                writer.write(chunk)
+            lines = (partial + chunk).split("\n")
+            partial = lines.pop()
+            tail.extend(lines)
+            shown = [*tail, partial][-tail.maxlen:]
+            live.update(Panel(Text("\n".join(shown)), title=f"[bold green]{title}[/]"))
+    
+    return stream.response
+
+def _report_metrics(stats: bool, metrics_file: Optional[str]):
+    """Print and/or dump the generation metrics gathered by this command."""
+    from .core.metrics import get_metrics
+
+    metrics = get_metrics()
+    if metrics_file:
+        metrics.dump(metrics_file)
+    if not stats:
+        return
+
+    from rich.table import Table
+
+    rows = metrics.summary()
+    table = Table(title="Generation Stats (mean seconds)")
+    table.add_column("", style="cyan")
+    for row in rows:
+        table.add_column(f"{row['generator']}/{row['template']}\n{row['model']}", justify="right")
 
-def _display_and_save_result(result, output_dir: Optional[str]):
-    """Display and optionally save generation result."""
+    for title, key, fmt in [
+        ("Generations", "count", "{:.0f}"),
+        ("Failures", "failures", "{:.0f}"),
+        ("Coalesced", "coalesced", "{:.0f}"),
+        ("Retries", "retries", "{:.0f}"),
+        ("Hedged", "hedges", "{:.0f}"),
+        ("Wall", "wall", "{:.2f}"),
+        ("Wall p95", "wall_p95", "{:.2f}"),
+        ("First token", "first_token", "{:.2f}"),
+        ("Queue", "queue", "{:.3f}"),
+        ("Admission wait", "admission", "{:.3f}"),
+        ("Model load", "load", "{:.2f}"),
+        ("Prompt eval", "prompt_eval", "{:.2f}"),
+        ("Decode", "eval", "{:.2f}"),
+        ("Validation", "validation", "{:.3f}"),
+        ("Repairs", "repairs", "{:.0f}"),
+        ("Repaired", "repaired", "{:.0f}"),
+        ("Tokens/s", "tokens_per_second", "{:.1f}"),
+    ]:
+        table.add_row(title, *(fmt.format(row[key]) if key in row else "-" for row in rows))
+    err_console.print(table)
+
+    from .core.admission import get_admission
+
+    admission = get_admission()
+    if admission is not None:
+        status = admission.status()
+        err_console.print(
+            f"Admission limit {status['limit']} (+{status['increases']}/-{status['decreases']}), "
+            f"{status['admitted']} admitted, wait mean {status['wait_mean']:.3f}s / max {status['wait_max']:.3f}s"
+        )
+
+def _display_and_save_result(result, output_dir: Optional[str] = None, overwrite: bool = False, writer=None):
+    """Display and optionally save generation result.
+
+    A ``writer`` that received the stream puts its files in place, unless
+    the code was repaired after streaming; otherwise the templates are
+    written to ``output_dir``.
+    """
+    from rich.panel import Panel
+    from rich.syntax import Syntax
+    from .utils.output import save_templates
+    from .validation.engine import validate
+    
     # Display result
     for template in result.templates:
         syntax = Syntax(
@@ -156,18 +781,23 @@ def _display_and_save_result(result, output_dir: Optional[str]):
             syntax,
             title=f"[blue]{template.description}[/]"
         ))
+        # Already validated during generation, so this is a cache lookup
+        for issue in validate(template.code, template.language).errors:
+            console.print(f"[yellow]⚠[/] {issue}")
     
     # Save if output directory specified
-    if output_dir:
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        for template in result.templates:
-            file_path = output_path / f"{template.type}.{template.language}"
-            with open(file_path, 'w') as f:
-                f.write(template.code)
-            
-            console.print(f"[green]✓[/] Saved to: {file_path}")
+    paths = []
+    if writer is not None and result.metadata.get("metrics", {}).get("repaired"):
+        # The streamed text is the code before repair
+        writer.abort()
+        paths = save_templates(result.templates, str(writer.output_dir), overwrite=writer.overwrite)
+    elif writer is not None:
+        template = result.templates[0]
+        paths = writer.close(template.type, template.language)
+    elif output_dir:
+        paths = save_templates(result.templates, output_dir, overwrite=overwrite)
+    for file_path in paths:
+        console.print(f"[green]✓[/] Saved to: {file_path}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,414 @@
+"""Admission control in front of the model servers.
+
+Ollama runs a few generations in parallel and queues the rest; push more
+at it and every request slows down together. ``Admission`` caps the model
+requests this process has in flight and adapts the cap to what the server
+sustains (additive increase, multiplicative decrease): while requests
+keep their usual latency per generated token and the cap is in use, it
+grows by about one per round of requests; when latency climbs past
+``tolerance`` times the recent best, or a request fails, it shrinks by
+``BACKOFF``.
+
+Requests over the cap wait in a weighted fair queue. Each caller belongs
+to a tenant (a Streamlit session, an API key, the CLI user; see
+``tenant``) and waiting requests are served in the order of their virtual
+finish time, so every tenant with work waiting gets its share of slots
+however many requests it queued: a batch of a thousand jobs does not hold
+up someone's single interactive request for more than a round.
+
+A request waits no longer than its call's deadline: past it, it leaves
+the queue with ``DeadlineExceeded``.
+
+Admission is off unless a starting limit is set with ``--admission-limit``
+or ``AIIAC_ADMISSION_LIMIT``.
+"""
+import asyncio
+import contextvars
+import getpass
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from .resilience import Deadline, DeadlineExceeded
+
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+# A request this many times slower per token than the recent best is congestion
+DEFAULT_TOLERANCE = 2.0
+BACKOFF = 0.9
+# Latency samples the best is taken from; old ones age out
+WINDOW = 50
+# Samples needed before latency may shrink the limit
+MIN_SAMPLES = 5
+
+_TENANT: contextvars.ContextVar[Optional[Tuple[str, float]]] = contextvars.ContextVar("aiiac_tenant", default=None)
+
+def default_tenant() -> str:
+    """The tenant of callers that did not name one: ``AIIAC_TENANT`` or the user."""
+    name = os.environ.get("AIIAC_TENANT")
+    if name:
+        return name
+    try:
+        return f"user:{getpass.getuser()}"
+    except Exception:
+        return "user"
+
+def current_tenant() -> Tuple[str, float]:
+    """The calling context's tenant and weight."""
+    return _TENANT.get() or (default_tenant(), 1.0)
+
+@contextmanager
+def tenant(name: str, weight: float = 1.0) -> Iterator[None]:
+    """Run model requests in this context on behalf of ``name``.
+
+    A tenant with weight 2 gets twice the slots of one with weight 1 while
+    both have requests waiting. Threads and tasks started inside inherit
+    the tenant when they copy the context (asyncio tasks do).
+    """
+    if weight <= 0:
+        raise ValueError(f"Tenant weight must be positive, got {weight}")
+    token = _TENANT.set((name, weight))
+    try:
+        yield
+    finally:
+        _TENANT.reset(token)
+
+class _Waiter:
+    __slots__ = ("tenant", "wake", "granted", "cancelled")
+
+    def __init__(self, tenant: str, wake: Callable[[], None]):
+        self.tenant = tenant
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+class FairQueue:
+    """Up to ``limit`` slots, handed out to waiting tenants by weighted fair queuing.
+
+    Usable from threads and event loops alike.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(int(limit), 1)
+        self.active = 0
+        self.admitted = 0
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._virtual = 0.0
+        self._finish: Dict[str, float] = {}
+        self._queued: Dict[str, int] = {}
+        self._waits: "deque[float]" = deque(maxlen=256)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting for a slot."""
+        return sum(self._queued.values())
+
+    def _enqueue(self, tenant: str, weight: float, wake: Callable[[], None]) -> _Waiter:
+        # Self-clocked: a tenant's next request finishes one share after
+        # its previous one, or after the request being served, if later
+        start = max(self._virtual, self._finish.get(tenant, 0.0))
+        finish = start + 1 / weight
+        self._finish[tenant] = finish
+        waiter = _Waiter(tenant, wake)
+        heapq.heappush(self._heap, (finish, next(self._order), waiter))
+        self._queued[tenant] = self._queued.get(tenant, 0) + 1
+        return waiter
+
+    def _dispatch(self) -> List[_Waiter]:
+        """Grant free slots in finish order; the caller wakes the waiters outside the lock."""
+        granted = []
+        while self._heap and self.active < self.limit:
+            finish, _, waiter = heapq.heappop(self._heap)
+            if waiter.cancelled:
+                continue
+            self._virtual = max(self._virtual, finish)
+            self._unqueue(waiter.tenant)
+            waiter.granted = True
+            self.active += 1
+            granted.append(waiter)
+        return granted
+
+    def _unqueue(self, tenant: str) -> None:
+        self._queued[tenant] -= 1
+        if not self._queued[tenant]:
+            del self._queued[tenant]
+            if self._finish.get(tenant, 0.0) <= self._virtual:
+                # Nothing to remember: the tenant's next start is the virtual time anyway
+                del self._finish[tenant]
+
+    def _granted_now(self) -> bool:
+        if not self._heap and self.active < self.limit:
+            self.active += 1
+            return True
+        return False
+
+    def _record(self, wait: float) -> None:
+        with self._lock:
+            self.admitted += 1
+            self._waits.append(wait)
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+    def acquire(self, tenant: str, weight: float = 1.0, deadline: Optional[Deadline] = None) -> float:
+        """Take a slot, blocking while none is free; returns the seconds waited.
+
+        Raises ``DeadlineExceeded`` if none is free by ``deadline``.
+        """
+        started = time.monotonic()
+        ready = threading.Event()
+        with self._lock:
+            if self._granted_now():
+                waiter = None
+            else:
+                waiter = self._enqueue(tenant, weight, ready.set)
+        if waiter is not None:
+            try:
+                if not ready.wait(deadline.remaining() if deadline else None):
+                    raise DeadlineExceeded(deadline.timeout)
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        wait = time.monotonic() - started
+        self._record(wait)
+        return wait
+
+    async def aacquire(self, tenant: str, weight: float = 1.0, deadline: Optional[Deadline] = None) -> float:
+        """Async counterpart of ``acquire``."""
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(lambda: ready.done() or ready.set_result(None))
+            except RuntimeError:
+                # The loop closed under its waiter; nobody will use the slot
+                self.release()
+
+        with self._lock:
+            if self._granted_now():
+                waiter = None
+            else:
+                waiter = self._enqueue(tenant, weight, wake)
+        if waiter is not None:
+            try:
+                try:
+                    await asyncio.wait_for(ready, deadline.remaining() if deadline else None)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded(deadline.timeout) from None
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        wait = time.monotonic() - started
+        self._record(wait)
+        return wait
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Withdraw a waiter that gave up, passing on a slot granted meanwhile."""
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._unqueue(waiter.tenant)
+                return
+        self.release()
+
+    def release(self) -> None:
+        """Give a slot back."""
+        with self._lock:
+            self.active -= 1
+            granted = self._dispatch()
+        for waiter in granted:
+            waiter.wake()
+
+    def resize(self, limit: int) -> None:
+        """Change the number of slots; extra ones are handed out at once."""
+        with self._lock:
+            self.limit = max(int(limit), 1)
+            granted = self._dispatch()
+        for waiter in granted:
+            waiter.wake()
+
+    def status(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "queued": sum(self._queued.values()),
+                "tenants": dict(self._queued),
+                "admitted": self.admitted,
+                "wait_mean": self._wait_total / self.admitted if self.admitted else 0.0,
+                "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "wait_max": self._wait_max,
+            }
+
+class Ticket:
+    """One admitted request; ``observe`` its generation info when it finishes."""
+
+    def __init__(self, admission: Optional["Admission"], tenant: str, wait: float):
+        self.admission = admission
+        self.tenant = tenant
+        self.wait = wait
+        self.granted = time.monotonic()
+        self.observed = False
+
+    @property
+    def info(self) -> Dict:
+        """What to add to the generation info."""
+        if self.admission is None:
+            return {}
+        return {"admission": self.wait, "tenant": self.tenant}
+
+    def observe(self, data: Dict) -> None:
+        """Feed the request's latency per generated token to the limit.
+
+        Model load time is left out: a cold model is not congestion.
+        """
+        if self.admission is None or self.observed:
+            return
+        self.observed = True
+        elapsed = time.monotonic() - self.granted - data.get("load_duration", 0) / 1e9
+        self.admission.record(max(elapsed, 0.0) / max(data.get("eval_count") or 1, 1))
+
+_NO_TICKET = Ticket(None, "", 0.0)
+
+class Admission:
+    """An adaptive limit on model requests in flight, queued fairly per tenant."""
+
+    def __init__(
+        self,
+        limit: int,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: Optional[int] = None,
+        tolerance: float = DEFAULT_TOLERANCE
+    ):
+        if limit < min_limit:
+            raise ValueError(f"Admission limit must be at least {min_limit}, got {limit}")
+        self.min_limit = min_limit
+        self.max_limit = max_limit or max(DEFAULT_MAX_LIMIT, limit)
+        self.tolerance = tolerance
+        self.increases = 0
+        self.decreases = 0
+        self._limit = float(limit)
+        self._samples: "deque[float]" = deque(maxlen=WINDOW)
+        self._lock = threading.Lock()
+        self.queue = FairQueue(limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def record(self, sample: float) -> None:
+        """Adapt the limit to one request's seconds per generated token."""
+        with self._lock:
+            self._samples.append(sample)
+            best = min(self._samples)
+            if len(self._samples) >= MIN_SAMPLES and sample > best * self.tolerance:
+                self._decrease()
+            elif self.queue.active >= self.limit or self.queue.depth:
+                # Only grow a limit that is actually holding requests back
+                self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+                self.increases += 1
+            limit = self.limit
+        self.queue.resize(limit)
+
+    def failed(self) -> None:
+        """Shrink the limit after a failed request."""
+        with self._lock:
+            self._decrease()
+            limit = self.limit
+        self.queue.resize(limit)
+
+    def _decrease(self) -> None:
+        self._limit = max(self._limit * BACKOFF, float(self.min_limit))
+        self.decreases += 1
+
+    @contextmanager
+    def slot(self, deadline: Optional[Deadline] = None) -> Iterator[Ticket]:
+        """Hold a slot for one model request, waiting in the fair queue until ``deadline``."""
+        name, weight = current_tenant()
+        ticket = Ticket(self, name, self.queue.acquire(name, weight, deadline))
+        try:
+            yield ticket
+        except Exception:
+            self.failed()
+            raise
+        finally:
+            self.queue.release()
+
+    @asynccontextmanager
+    async def aslot(self, deadline: Optional[Deadline] = None) -> AsyncIterator[Ticket]:
+        """Async counterpart of ``slot``."""
+        name, weight = current_tenant()
+        ticket = Ticket(self, name, await self.queue.aacquire(name, weight, deadline))
+        try:
+            yield ticket
+        except Exception:
+            self.failed()
+            raise
+        finally:
+            self.queue.release()
+
+    def status(self) -> Dict:
+        with self._lock:
+            best = min(self._samples) if self._samples else None
+        return {
+            **self.queue.status(),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "best_token_latency": best,
+        }
+
+_admission: Optional[Admission] = None
+_configured = False
+_admission_lock = threading.Lock()
+
+def configure_admission(limit: Optional[int], **settings) -> None:
+    """Turn admission control on, starting at ``limit``, or off with None.
+
+    ``settings`` are passed to ``Admission`` (``min_limit``, ``max_limit``,
+    ``tolerance``).
+    """
+    global _admission, _configured
+    with _admission_lock:
+        _admission = Admission(limit, **settings) if limit else None
+        _configured = True
+
+def get_admission() -> Optional[Admission]:
+    """Return the process-wide admission control, None unless it was turned on."""
+    if not _configured:
+        limit = os.environ.get("AIIAC_ADMISSION_LIMIT")
+        max_limit = os.environ.get("AIIAC_ADMISSION_MAX_LIMIT")
+        settings = {"max_limit": int(max_limit)} if max_limit else {}
+        configure_admission(int(limit) if limit else None, **settings)
+    return _admission
+
+@contextmanager
+def admit(deadline: Optional[Deadline] = None) -> Iterator[Ticket]:
+    """A slot for one model request by ``deadline``, or a no-op ticket with admission off."""
+    admission = get_admission()
+    if admission is None:
+        yield _NO_TICKET
+        return
+    with admission.slot(deadline) as ticket:
+        yield ticket
+
+@asynccontextmanager
+async def aadmit(deadline: Optional[Deadline] = None) -> AsyncIterator[Ticket]:
+    """Async counterpart of ``admit``."""
+    admission = get_admission()
+    if admission is None:
+        yield _NO_TICKET
+        return
+    async with admission.aslot(deadline) as ticket:
+        yield ticket
\ No newline at end of file
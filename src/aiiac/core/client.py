@@ -0,0 +1,215 @@
+"""Process-wide HTTP session and generator registry.
+
+Generators and LLM clients are stateless between calls, so one instance per
+model is shared by every CLI command, Streamlit session and thread, and all
+of them talk to Ollama through a single keep-alive connection pool. Async
+callers get one aiohttp session per event loop, sized like the sync pool.
+The tuning profile (``AIIAC_PROFILE``) and the deadline, retry and
+hedging settings (``AIIAC_TIMEOUT``, ``AIIAC_RETRIES``, ``AIIAC_HEDGE``)
+apply to every shared client, and with several Ollama servers configured
+all clients share one endpoint pool.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_pool_size = int(os.environ.get("AIIAC_POOL_SIZE", DEFAULT_POOL_SIZE))
+_profile: Optional[str] = os.environ.get("AIIAC_PROFILE") or None
+_resilience: Dict[str, Optional[float]] = {}
+_endpoints = None
+_endpoints_configured = False
+_session: Optional[requests.Session] = None
+_llms: Dict[str, object] = {}
+_generators: Dict[Tuple[type, str], object] = {}
+_async_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def configure_pool(size: int) -> None:
+    """Set the number of keep-alive connections kept per host."""
+    global _pool_size, _session
+    if size < 1:
+        raise ValueError("Pool size must be at least 1")
+
+    with _lock:
+        _pool_size = size
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def configure_profile(name: Optional[str]) -> None:
+    """Apply a tuning profile to current and future LLM clients."""
+    from .tuning import profile_settings
+
+    global _profile
+    settings = profile_settings(name)
+    with _lock:
+        _profile = name or None
+        for llm in _llms.values():
+            _apply_profile(llm, settings)
+
+def current_profile() -> Optional[str]:
+    """Name of the tuning profile in use, if any."""
+    return _profile
+
+def _apply_profile(llm, settings: Dict) -> None:
+    for field in ("keep_alive", "num_ctx", "num_thread", "num_batch"):
+        setattr(llm, field, settings.get(field))
+
+def configure_resilience(
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    hedge: Optional[float] = None
+) -> None:
+    """Set the deadline, retries and hedging of current and future LLM clients.
+
+    ``timeout`` is in seconds, 0 meaning no deadline; ``hedge`` is the
+    latency quantile (0-1) past which a request is duplicated, 0 turning
+    hedging off. Settings left at None are kept.
+    """
+    if retries is not None and retries < 0:
+        raise ValueError("Retries must not be negative")
+    if hedge is not None and not 0 <= hedge < 1:
+        raise ValueError("Hedge quantile must be between 0 and 1")
+    settings = {"timeout": timeout, "retries": retries, "hedge": hedge}
+    with _lock:
+        _resilience.update({k: v for k, v in settings.items() if v is not None})
+        for llm in _llms.values():
+            _apply_resilience(llm)
+
+def _apply_resilience(llm) -> None:
+    for field, value in _resilience.items():
+        # 0 turns the deadline or hedging off
+        setattr(llm, field, value if value or field == "retries" else None)
+
+def _resilience_from_environment() -> None:
+    for field, convert in (("timeout", float), ("retries", int), ("hedge", float)):
+        value = os.environ.get(f"AIIAC_{field.upper()}")
+        if value:
+            _resilience[field] = convert(value)
+
+_resilience_from_environment()
+
+def configure_endpoints(urls: Sequence[str], **settings) -> None:
+    """Route every client over a pool of Ollama servers.
+
+    ``settings`` are passed to ``EndpointPool`` (``health_interval``,
+    ``max_failures``). An empty list goes back to each client's base URL.
+    """
+    from .endpoints import EndpointPool
+
+    global _endpoints, _endpoints_configured
+    pool = EndpointPool(urls, **settings) if urls else None
+    with _lock:
+        if _endpoints is not None:
+            _endpoints.close()
+        _endpoints, _endpoints_configured = pool, True
+
+def get_endpoints():
+    """Return the shared endpoint pool, or None when there is one server.
+
+    Unless configured explicitly, the pool comes from
+    ``AIIAC_ENDPOINTS_FILE`` or a comma-separated ``AIIAC_OLLAMA_URL``.
+    """
+    if not _endpoints_configured:
+        from .endpoints import load_endpoints_file
+
+        path = os.environ.get("AIIAC_ENDPOINTS_FILE")
+        urls = [u.strip() for u in os.environ.get("AIIAC_OLLAMA_URL", "").split(",") if u.strip()]
+        if path:
+            configure_endpoints(**load_endpoints_file(path))
+        elif len(urls) > 1:
+            configure_endpoints(urls)
+        else:
+            configure_endpoints([])
+    return _endpoints
+
+def endpoint_urls(model: str = "codellama") -> List[str]:
+    """The URLs requests for a model may go to."""
+    pool = get_endpoints()
+    if pool is None:
+        return [get_llm(model).base_url]
+    return [endpoint.url for endpoint in pool.endpoints if endpoint.serves(model)]
+
+def get_session() -> requests.Session:
+    """Return the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def get_async_session():
+    """Return the shared aiohttp session for the running event loop."""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=_pool_size),
+            # Generations routinely outlast aiohttp's 5 minute default
+            timeout=aiohttp.ClientTimeout(total=None)
+        )
+        _async_sessions[loop] = session
+    return session
+
+async def aclose() -> None:
+    """Close the running event loop's shared aiohttp session."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+def get_llm(model: str = "codellama"):
+    """Return the shared Ollama client for a model."""
+    from .llm import OllamaLLM
+
+    from .tuning import profile_settings
+
+    llm = _llms.get(model)
+    if llm is None:
+        with _lock:
+            # AIIAC_OLLAMA_URL points every client at another server
+            url = os.environ.get("AIIAC_OLLAMA_URL", "")
+            # A list of URLs is an endpoint pool, see get_endpoints
+            llm = OllamaLLM(model=model, base_url=url) if url and "," not in url else OllamaLLM(model=model)
+            _apply_profile(llm, profile_settings(_profile))
+            _apply_resilience(llm)
+            llm = _llms.setdefault(model, llm)
+    return llm
+
+def get_generator(generator_class: Type[T], model: str = "codellama") -> T:
+    """Return the shared generator instance for a class and model."""
+    key = (generator_class, model)
+    generator = _generators.get(key)
+    if generator is None:
+        instance = generator_class(model=model)
+        with _lock:
+            generator = _generators.setdefault(key, instance)
+    return generator
+
+def reset() -> None:
+    """Drop all shared clients and close pooled connections."""
+    global _session, _endpoints, _endpoints_configured
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _endpoints is not None:
+            _endpoints.close()
+        _endpoints, _endpoints_configured = None, False
+        _llms.clear()
+        _generators.clear()
+        _async_sessions.clear()
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""A pool of Ollama servers with least-loaded routing and health checks.
+
+Each request leases the healthy endpoint with the fewest requests in
+flight among those serving the model, so throughput grows with every
+inference server added. Endpoints are ejected after consecutive
+connection failures or server errors, and a background thread polls
+``/api/tags`` to refresh each endpoint's models and bring ejected ones
+back once they answer again. If every endpoint is ejected, requests are
+still spread over all of them rather than failing outright.
+
+Endpoints come from ``--endpoint`` / ``--endpoints-file`` on the CLI, a
+comma-separated ``AIIAC_OLLAMA_URL`` or an ``AIIAC_ENDPOINTS_FILE``. The
+file is YAML or JSON: a list of URLs, or a mapping with an ``endpoints``
+list and optional ``health_interval`` and ``max_failures``.
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Union
+
+DEFAULT_HEALTH_INTERVAL = 5.0
+DEFAULT_MAX_FAILURES = 2
+HEALTH_TIMEOUT = 2.0
+
+class NoEndpointError(RuntimeError):
+    """Raised when no endpoint in the pool serves the requested model."""
+
+class Endpoint:
+    """One Ollama server and what the pool knows about it."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.healthy = True
+        self.failures = 0
+        self.requests = 0
+        self.errors = 0
+        # None until the first health check has listed the models
+        self.models: Optional[Set[str]] = None
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def serves(self, model: str) -> bool:
+        if self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+
+    def status(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "models": sorted(self.models) if self.models is not None else None,
+            "last_error": self.last_error,
+        }
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Whether an error says the server, rather than the request, is at fault.
+
+    Connection errors, timeouts and 5xx responses count; 4xx responses
+    and cancellations do not.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None)
+    if isinstance(status, int):
+        return status >= 500
+    if isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError)
+
+class EndpointPool:
+    """Routes requests over several Ollama servers."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        health_interval: float = DEFAULT_HEALTH_INTERVAL,
+        max_failures: int = DEFAULT_MAX_FAILURES
+    ):
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one URL")
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        self._turn = 0
+        self._stopping = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def choose(self, model: str) -> Endpoint:
+        """Pick the least-loaded healthy endpoint serving ``model``.
+
+        Ties go round-robin so idle endpoints share the work.
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.serves(model)]
+            if not candidates:
+                raise NoEndpointError(f"No endpoint serves model {model}")
+            healthy = [e for e in candidates if e.healthy] or candidates
+            self._turn += 1
+            offset = self._turn % len(healthy)
+            ordered = healthy[offset:] + healthy[:offset]
+            endpoint = min(ordered, key=lambda e: e.in_flight)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None) -> None:
+        """Finish a request, ejecting the endpoint after repeated failures."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is not None and is_endpoint_failure(error):
+                endpoint.errors += 1
+                endpoint.failures += 1
+                endpoint.last_error = str(error) or type(error).__name__
+                if endpoint.failures >= self.max_failures:
+                    endpoint.healthy = False
+            elif error is None:
+                endpoint.failures = 0
+
+    @contextmanager
+    def lease(self, model: str) -> Iterator[Endpoint]:
+        """Hold an endpoint for the length of one request."""
+        self.start_health_checks()
+        endpoint = self.choose(model)
+        try:
+            yield endpoint
+        except BaseException as e:
+            self.release(endpoint, e)
+            raise
+        self.release(endpoint)
+
+    def check(self, endpoint: Endpoint) -> bool:
+        """Poll an endpoint's /api/tags, updating its health and models."""
+        try:
+            with urllib.request.urlopen(f"{endpoint.url}/api/tags", timeout=HEALTH_TIMEOUT) as response:
+                data = json.loads(response.read())
+        except Exception as e:
+            with self._lock:
+                endpoint.healthy = False
+                endpoint.last_error = str(e)
+                endpoint.last_check = time.monotonic()
+            return False
+
+        with self._lock:
+            endpoint.models = {model.get("name") or model.get("model", "") for model in data.get("models", [])}
+            endpoint.healthy = True
+            endpoint.failures = 0
+            endpoint.last_check = time.monotonic()
+        return True
+
+    def check_all(self) -> None:
+        """Poll every endpoint at once."""
+        threads = [threading.Thread(target=self.check, args=(endpoint,), daemon=True) for endpoint in self.endpoints]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def start_health_checks(self) -> None:
+        """Start polling in the background, once."""
+        if self._checker is not None or self.health_interval <= 0:
+            return
+        with self._lock:
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._poll, name="aiiac-health", daemon=True)
+                self._checker.start()
+
+    def _poll(self) -> None:
+        while not self._stopping.is_set():
+            self.check_all()
+            self._stopping.wait(self.health_interval)
+
+    def close(self) -> None:
+        """Stop the background health checks."""
+        self._stopping.set()
+
+    def status(self) -> List[Dict]:
+        with self._lock:
+            return [endpoint.status() for endpoint in self.endpoints]
+
+def load_endpoints_file(path: Union[str, Path]) -> Dict:
+    """Read pool settings from a YAML or JSON endpoints file."""
+    import yaml
+
+    data = yaml.safe_load(Path(path).read_text())
+    if isinstance(data, list):
+        data = {"endpoints": data}
+    if not isinstance(data, dict) or not isinstance(data.get("endpoints"), list):
+        raise ValueError("Endpoints file must be a list of URLs or a mapping with an 'endpoints' list")
+    settings = {"urls": [str(url) for url in data["endpoints"]]}
+    for name in ("health_interval", "max_failures"):
+        if name in data:
+            settings[name] = data[name]
+    return settings
\ No newline at end of file
@@ -1,22 +1,404 @@
-from typing import Dict, List, Optional
-import requests
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 from langchain.llms.base import LLM
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain.schema import Generation, LLMResult
+from langchain.schema.output import GenerationChunk
+from .admission import Ticket, aadmit, admit
+from .cache import cache_key, get_cache
+from .client import get_async_session, get_endpoints, get_session
+from .resilience import (
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    Attempts,
+    Cancel,
+    Deadline,
+    DeadlineExceeded,
+    HedgeLost,
+    ahedged,
+    hedged,
+    latency_window,
+)
+from .singleflight import Abandoned, Flight, join, leading
+
+# Options that change how fast Ollama runs, not what it writes
+RUNTIME_OPTIONS = ("num_thread", "num_batch")
+
+def _generation_info(data: Dict, started: float, **timings: float) -> Dict:
+    """Keep Ollama's statistics, dropping the text and token context.
+
+    ``request`` is the client-side time since ``started``; extra timings
+    such as ``first_token`` are added alongside it.
+    """
+    info = {k: v for k, v in data.items() if k not in ("response", "context")}
+    info["request"] = time.monotonic() - started
+    info.update(timings)
+    return info
 
 class OllamaLLM(LLM):
     """Ollama LLM integration."""
-    
+
     base_url: str = "http://localhost:11434"
     model: str = "codellama"
     temperature: float = 0.1
-    
+    # Cap on generated tokens (Ollama's num_predict); None leaves it to the model
+    num_predict: Optional[int] = None
+    # Backend tuning, usually set from a profile; None keeps Ollama's defaults
+    keep_alive: Optional[Union[str, int]] = None
+    num_ctx: Optional[int] = None
+    num_thread: Optional[int] = None
+    num_batch: Optional[int] = None
+    use_cache: bool = True
+    # Identical calls in flight at the same time share one generation,
+    # unless a call opts out of reusing responses with use_cache=False
+    coalesce: bool = True
+    # Seconds a call may take in all, retries included; None waits as long as it takes
+    timeout: Optional[float] = DEFAULT_TIMEOUT
+    # Further attempts after a transient failure, before any output
+    retries: int = DEFAULT_RETRIES
+    # Duplicate a request once it is slower than this quantile of recent
+    # ones (e.g. 0.95); None never hedges
+    hedge: Optional[float] = None
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-    
+
     @property
     def _llm_type(self) -> str:
         return "ollama"
-    
+
+    def _options(
+        self,
+        stop: Optional[List[str]],
+        num_predict: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Dict:
+        """Ollama sampling options, with per-call values over the defaults.
+
+        Ollama ignores sampling parameters outside ``options``.
+        """
+        options = {"temperature": self.temperature if temperature is None else temperature}
+        if seed is not None:
+            options["seed"] = seed
+        num_predict = self.num_predict if num_predict is None else num_predict
+        if num_predict is not None:
+            options["num_predict"] = num_predict
+        if stop:
+            options["stop"] = list(stop)
+        options.update(self._runtime_options())
+        return options
+
+    def _runtime_options(self) -> Dict:
+        """Backend settings; Ollama reloads the model when these change."""
+        settings = {"num_ctx": self.num_ctx, "num_thread": self.num_thread, "num_batch": self.num_batch}
+        return {k: v for k, v in settings.items() if v is not None}
+
+    def _payload(self, prompt: str, stream: bool, options: Dict) -> Dict:
+        """Build the request body for /api/generate."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options
+        }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _cache_key(self, prompt: str, options: Dict) -> str:
+        """Identify a request by everything that shapes its response."""
+        return cache_key(
+            model=self.model,
+            options={k: v for k, v in options.items() if k not in RUNTIME_OPTIONS},
+            prompt=prompt
+        )
+
+    @contextmanager
+    def _route(self) -> Iterator[str]:
+        """The server for one request: a leased pool endpoint, or ``base_url``."""
+        pool = get_endpoints()
+        if pool is None:
+            yield self.base_url
+            return
+        with pool.lease(self.model) as endpoint:
+            yield endpoint.url
+
+    @contextmanager
+    def _slot(self, deadline: Optional[Deadline] = None) -> Iterator[Tuple[Ticket, str]]:
+        """Admission for one request, within its call's deadline, then its server."""
+        with admit(deadline) as ticket, self._route() as url:
+            yield ticket, url
+
+    @asynccontextmanager
+    async def _aslot(self, deadline: Optional[Deadline] = None) -> AsyncIterator[Tuple[Ticket, str]]:
+        """Async counterpart of ``_slot``."""
+        async with aadmit(deadline) as ticket:
+            with self._route() as url:
+                yield ticket, url
+
+    def warmup(self, base_url: Optional[str] = None) -> Dict:
+        """Load the model into memory without generating anything.
+
+        Sends the same backend options as real requests, so the loaded
+        model is reused rather than reloaded, and keeps it resident for
+        ``keep_alive``. Returns the generation info, whose
+        ``load_duration`` is the load time. ``base_url`` picks the server,
+        as each server in a pool loads its own copy; ``timeout`` bounds the
+        load like any other request.
+        """
+        started = time.monotonic()
+        response = get_session().post(
+            f"{base_url or self.base_url}/api/generate",
+            json=self._payload("", stream=False, options=self._runtime_options()),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return _generation_info(response.json(), started)
+
+    def _lookup(
+        self,
+        key: str,
+        use_cache: Optional[bool],
+        refresh: bool
+    ) -> Tuple[Optional[str], Dict]:
+        """Check the response cache, returning the hit and its stats."""
+        if not (self.use_cache if use_cache is None else use_cache):
+            return None, {"status": "disabled"}
+
+        cache = get_cache()
+        if refresh:
+            return None, {"status": "refresh", "hits": cache.hits, "misses": cache.misses}
+
+        cached = cache.get(key)
+        status = "hit" if cached is not None else "miss"
+        return cached, {"status": status, "hits": cache.hits, "misses": cache.misses}
+
+    def _store(self, key: str, cache_info: Dict, text: str) -> None:
+        """Save a finished response unless caching is off for the call."""
+        if cache_info["status"] != "disabled":
+            get_cache().put(key, text)
+
+    def _final_info(
+        self,
+        data: Dict,
+        started: float,
+        first_token: Optional[float],
+        cache_info: Dict,
+        url: str,
+        extra: Dict
+    ) -> Dict:
+        """Generation info for the closing chunk of a stream."""
+        timings = {"first_token": first_token} if first_token is not None else {}
+        return {**_generation_info(data, started, **timings), **extra, "endpoint": url, "cache": cache_info}
+
+    def _attempts(self, timeout: Optional[float]) -> Attempts:
+        """Deadline and retry bookkeeping for one call."""
+        return Attempts(self.timeout if timeout is None else timeout, self.retries)
+
+    def _hedge_delay(self, streaming: bool) -> Optional[float]:
+        """How long a request may go without output before it is hedged, if at all."""
+        if self.hedge is None:
+            return None
+        return latency_window(self.model, streaming).quantile(self.hedge)
+
+    def _coalescing(self, use_cache: Optional[bool]) -> bool:
+        return self.coalesce and use_cache is not False
+
+    def _join(
+        self,
+        key: str,
+        use_cache: Optional[bool],
+        deadline: Deadline
+    ) -> Tuple[Optional[Flight], Optional[Tuple[str, Dict]]]:
+        """Lead a new flight for ``key``, or wait for the one in progress.
+
+        Returns the flight to lead, or the result of the one joined; neither
+        when the call does not coalesce. Waiting is bounded by ``deadline``.
+        """
+        while self._coalescing(use_cache):
+            flight, leads = join(key)
+            if leads:
+                return flight, None
+            try:
+                return None, flight.wait(deadline.remaining())
+            except Abandoned:
+                continue  # its leader gave up; try leading instead
+            except TimeoutError:
+                raise DeadlineExceeded(deadline.timeout)
+        return None, None
+
+    async def _ajoin(
+        self,
+        key: str,
+        use_cache: Optional[bool],
+        deadline: Deadline
+    ) -> Tuple[Optional[Flight], Optional[Tuple[str, Dict]]]:
+        """Async counterpart of ``_join``."""
+        while self._coalescing(use_cache):
+            flight, leads = join(key)
+            if leads:
+                return flight, None
+            try:
+                return None, await asyncio.wait_for(flight.await_result(), deadline.remaining())
+            except Abandoned:
+                continue
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(deadline.timeout)
+        return None, None
+
+    def _joined_info(self, info: Optional[Dict], started: float, cache_info: Dict) -> Dict:
+        """Generation info for a call served by another call's generation."""
+        return {**(info or {}), "request": time.monotonic() - started, "coalesced": True, "cache": cache_info}
+
+    def _joined_chunk(self, chunk: GenerationChunk, started: float, cache_info: Dict) -> GenerationChunk:
+        if not chunk.generation_info:
+            return chunk
+        return GenerationChunk(text=chunk.text, generation_info=self._joined_info(chunk.generation_info, started, cache_info))
+
+    def _follow(self, flight: Flight, started: float, cache_info: Dict) -> Iterator[GenerationChunk]:
+        """Stream along with another call's generation."""
+        streamed = False
+        for chunk in flight.follow():
+            streamed = True
+            yield self._joined_chunk(chunk, started, cache_info)
+        if not streamed:
+            # The leader did not stream, so its whole text arrives at once
+            text, info = flight.result
+            yield GenerationChunk(text=text, generation_info=self._joined_info(info, started, cache_info))
+
+    async def _afollow(self, flight: Flight, started: float, cache_info: Dict) -> AsyncIterator[GenerationChunk]:
+        """Async counterpart of ``_follow``."""
+        streamed = False
+        async for chunk in flight.afollow():
+            streamed = True
+            yield self._joined_chunk(chunk, started, cache_info)
+        if not streamed:
+            text, info = flight.result
+            yield GenerationChunk(text=text, generation_info=self._joined_info(info, started, cache_info))
+
+    def _request(self, prompt: str, options: Dict, attempts: Attempts) -> Tuple[Dict, str, Ticket]:
+        """Send one non-streaming request, bounded by the call's deadline."""
+        attempts.sent += 1
+        started = time.monotonic()
+        with self._slot(attempts.deadline) as (ticket, url):
+            response = get_session().post(
+                f"{url}/api/generate",
+                json=self._payload(prompt, stream=False, options=options),
+                timeout=attempts.deadline.remaining()
+            )
+            response.raise_for_status()
+            data = response.json()
+            ticket.observe(data)
+        latency_window(self.model, False).record(time.monotonic() - started)
+        return data, url, ticket
+
+    async def _arequest(self, prompt: str, options: Dict, attempts: Attempts) -> Tuple[Dict, str, Ticket]:
+        """Async counterpart of ``_request``."""
+        import aiohttp
+
+        attempts.sent += 1
+        started = time.monotonic()
+        async with self._aslot(attempts.deadline) as (ticket, url):
+            async with get_async_session().post(
+                f"{url}/api/generate",
+                json=self._payload(prompt, stream=False, options=options),
+                timeout=aiohttp.ClientTimeout(total=attempts.deadline.remaining())
+            ) as response:
+                try:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                except asyncio.CancelledError:
+                    # Drop the connection so Ollama stops generating for us
+                    response.close()
+                    raise
+            ticket.observe(data)
+        latency_window(self.model, False).record(time.monotonic() - started)
+        return data, url, ticket
+
+    def _complete(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        use_cache: Optional[bool] = None,
+        refresh: bool = False,
+        num_predict: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Dict
+    ) -> Tuple[str, Dict]:
+        """Run one prompt, returning the text and its generation info.
+
+        Transient failures are retried within the deadline. Unlike the
+        other calls this one is not hedged: a blocking request cannot be
+        cancelled once it has lost.
+        """
+        options = self._options(stop, num_predict, temperature, seed)
+        key = self._cache_key(prompt, options)
+        cached, cache_info = self._lookup(key, use_cache, refresh)
+        if cached is not None:
+            return cached, {"cache": cache_info}
+
+        started = time.monotonic()
+        attempts = self._attempts(timeout)
+        flight, joined = self._join(key, use_cache, attempts.deadline)
+        if joined is not None:
+            return joined[0], self._joined_info(joined[1], started, cache_info)
+
+        with leading(flight):
+            data, url, ticket = attempts.run(lambda: self._request(prompt, options, attempts))
+
+        info = {**_generation_info(data, started), **ticket.info, **attempts.info(), "endpoint": url, "cache": cache_info}
+        self._store(key, cache_info, data["response"])
+        if flight is not None:
+            flight.finish((data["response"], info))
+        return data["response"], info
+
+    async def _acomplete(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        use_cache: Optional[bool] = None,
+        refresh: bool = False,
+        num_predict: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Dict
+    ) -> Tuple[str, Dict]:
+        """Run one prompt without blocking the event loop, hedging slow requests."""
+        options = self._options(stop, num_predict, temperature, seed)
+        key = self._cache_key(prompt, options)
+        cached, cache_info = self._lookup(key, use_cache, refresh)
+        if cached is not None:
+            return cached, {"cache": cache_info}
+
+        started = time.monotonic()
+        attempts = self._attempts(timeout)
+        flight, joined = await self._ajoin(key, use_cache, attempts.deadline)
+        if joined is not None:
+            return joined[0], self._joined_info(joined[1], started, cache_info)
+
+        with leading(flight):
+            data, url, ticket = await attempts.arun(lambda: ahedged(
+                lambda: self._arequest(prompt, options, attempts),
+                attempts,
+                self._hedge_delay(streaming=False)
+            ))
+
+        info = {**_generation_info(data, started), **ticket.info, **attempts.info(), "endpoint": url, "cache": cache_info}
+        self._store(key, cache_info, data["response"])
+        if flight is not None:
+            flight.finish((data["response"], info))
+        return data["response"], info
+
     def _call(
         self,
         prompt: str,
@@ -25,14 +407,353 @@ class OllamaLLM(LLM):
         **kwargs: Dict
     ) -> str:
         """Call the Ollama API."""
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "temperature": self.temperature,
-                "stream": False
-            }
+        return self._complete(prompt, stop, **kwargs)[0]
+
+    def _generate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Dict
+    ) -> LLMResult:
+        """Call the Ollama API, keeping per-prompt generation info."""
+        generations = []
+        for prompt in prompts:
+            text, info = self._complete(prompt, stop, **kwargs)
+            generations.append([Generation(text=text, generation_info=info)])
+        return LLMResult(generations=generations)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Dict
+    ) -> str:
+        """Call the Ollama API asynchronously."""
+        return (await self._acomplete(prompt, stop, **kwargs))[0]
+
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Dict
+    ) -> LLMResult:
+        """Call the Ollama API asynchronously, one request per prompt."""
+        results = await asyncio.gather(
+            *(self._acomplete(prompt, stop, **kwargs) for prompt in prompts)
         )
-        response.raise_for_status()
-        return response.json()["response"]
\ No newline at end of file
+        return LLMResult(generations=[
+            [Generation(text=text, generation_info=info)] for text, info in results
+        ])
+
+    def stream_chunks(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        **kwargs: Dict
+    ) -> Iterator[GenerationChunk]:
+        """Stream generation chunks, including the final chunk's info.
+
+        Unlike langchain's ``stream`` this keeps ``generation_info``, which
+        carries cache status and Ollama's statistics on the last chunk.
+        """
+        return self._stream(prompt, stop=stop, **kwargs)
+
+    def _open(self, prompt: str, options: Dict, attempts: Attempts, cancel: Cancel) -> "_OpenStream":
+        """Send one streaming request and wait for its first line."""
+        attempts.sent += 1
+        started = time.monotonic()
+        stack = ExitStack()
+        try:
+            ticket, url = stack.enter_context(self._slot(attempts.deadline))
+            cancel.check()
+            response = stack.enter_context(get_session().post(
+                f"{url}/api/generate",
+                json=self._payload(prompt, stream=True, options=options),
+                stream=True,
+                timeout=attempts.deadline.remaining()
+            ))
+            # A hedge that lost stops reading at once
+            cancel.on_cancel(response.close)
+            response.raise_for_status()
+            lines = (json.loads(line) for line in response.iter_lines() if line)
+            first = next(lines, None)
+            cancel.check()
+        except BaseException as e:
+            error = HedgeLost() if cancel.cancelled else e
+            stack.__exit__(type(error), error, error.__traceback__)
+            raise error
+        latency_window(self.model, True).record(time.monotonic() - started)
+        return _OpenStream(stack, ticket, url, first, lines)
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        use_cache: Optional[bool] = None,
+        refresh: bool = False,
+        num_predict: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Dict
+    ) -> Iterator[GenerationChunk]:
+        """Stream the Ollama API response.
+
+        Ollama answers a streaming request with one JSON object per line;
+        each carries the next piece of text and the last one has
+        ``done`` set together with the generation statistics. A cached
+        response is replayed as a single chunk, and a call identical to
+        one already in flight streams along with it. Failures before the
+        first line are retried, and a slow first line may be hedged.
+        """
+        options = self._options(stop, num_predict, temperature, seed)
+        key = self._cache_key(prompt, options)
+        cached, cache_info = self._lookup(key, use_cache, refresh)
+        if cached is not None:
+            yield GenerationChunk(text=cached, generation_info={"cache": cache_info})
+            return
+
+        started = time.monotonic()
+        attempts = self._attempts(timeout)
+        flight = None
+        while self._coalescing(use_cache):
+            flight, leads = join(key)
+            if leads:
+                break
+            try:
+                for chunk in self._follow(flight, started, cache_info):
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+                return
+            except Abandoned:
+                flight = None
+
+        parts = []
+        complete = False
+        first_token = None
+        with leading(flight):
+            stream = attempts.run(lambda: hedged(
+                lambda cancel: self._open(prompt, options, attempts, cancel),
+                attempts,
+                self._hedge_delay(streaming=True),
+                discard=_OpenStream.close
+            ))
+            with stream:
+                for data in stream:
+                    if "error" in data:
+                        raise ValueError(f"Ollama error: {data['error']}")
+                    if attempts.deadline.expired:
+                        raise DeadlineExceeded(attempts.deadline.timeout)
+
+                    done = data.get("done", False)
+                    if first_token is None and data.get("response"):
+                        first_token = time.monotonic() - started
+                    if done:
+                        stream.ticket.observe(data)
+                    chunk = GenerationChunk(
+                        text=data.get("response", ""),
+                        generation_info=self._final_info(
+                            data, started, first_token, cache_info, stream.url, {**stream.ticket.info, **attempts.info()}
+                        ) if done else None
+                    )
+                    parts.append(chunk.text)
+                    if flight is not None:
+                        flight.publish(chunk)
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+
+                    if done:
+                        complete = True
+                        break
+
+        if complete:
+            self._store(key, cache_info, "".join(parts))
+        if flight is not None:
+            flight.finish(("".join(parts), chunk.generation_info if complete else None))
+
+    def astream_chunks(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        **kwargs: Dict
+    ) -> AsyncIterator[GenerationChunk]:
+        """Async counterpart of ``stream_chunks``."""
+        return self._astream(prompt, stop=stop, **kwargs)
+
+    async def _aopen(self, prompt: str, options: Dict, attempts: Attempts) -> "_AsyncOpenStream":
+        """Async counterpart of ``_open``."""
+        import aiohttp
+
+        attempts.sent += 1
+        started = time.monotonic()
+        stack = AsyncExitStack()
+        try:
+            ticket, url = await stack.enter_async_context(self._aslot(attempts.deadline))
+            response = await stack.enter_async_context(get_async_session().post(
+                f"{url}/api/generate",
+                json=self._payload(prompt, stream=True, options=options),
+                timeout=aiohttp.ClientTimeout(total=attempts.deadline.remaining())
+            ))
+            # Leaving early (cancelled, lost hedge, closed stream) drops the
+            # connection, so Ollama stops generating for us
+            stack.push(lambda exc_type, exc, tb: response.close() if exc_type else None)
+            response.raise_for_status()
+            lines = _json_lines(response.content)
+            try:
+                first = await lines.__anext__()
+            except StopAsyncIteration:
+                first = None
+        except BaseException as e:
+            await stack.__aexit__(type(e), e, e.__traceback__)
+            raise
+        latency_window(self.model, True).record(time.monotonic() - started)
+        return _AsyncOpenStream(stack, ticket, url, first, lines)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        use_cache: Optional[bool] = None,
+        refresh: bool = False,
+        num_predict: Optional[int] = None,
+        temperature: Optional[float] = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Dict
+    ) -> AsyncIterator[GenerationChunk]:
+        """Stream the Ollama API response without blocking the event loop."""
+        options = self._options(stop, num_predict, temperature, seed)
+        key = self._cache_key(prompt, options)
+        cached, cache_info = self._lookup(key, use_cache, refresh)
+        if cached is not None:
+            yield GenerationChunk(text=cached, generation_info={"cache": cache_info})
+            return
+
+        started = time.monotonic()
+        attempts = self._attempts(timeout)
+        flight = None
+        while self._coalescing(use_cache):
+            flight, leads = join(key)
+            if leads:
+                break
+            try:
+                async for chunk in self._afollow(flight, started, cache_info):
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+                return
+            except Abandoned:
+                flight = None
+
+        parts = []
+        complete = False
+        first_token = None
+        with leading(flight):
+            stream = await attempts.arun(lambda: ahedged(
+                lambda: self._aopen(prompt, options, attempts),
+                attempts,
+                self._hedge_delay(streaming=True),
+                discard=_AsyncOpenStream.aclose
+            ))
+            async with stream:
+                try:
+                    async for data in stream:
+                        if "error" in data:
+                            raise ValueError(f"Ollama error: {data['error']}")
+
+                        done = data.get("done", False)
+                        if first_token is None and data.get("response"):
+                            first_token = time.monotonic() - started
+                        if done:
+                            stream.ticket.observe(data)
+                        chunk = GenerationChunk(
+                            text=data.get("response", ""),
+                            generation_info=self._final_info(
+                                data, started, first_token, cache_info, stream.url, {**stream.ticket.info, **attempts.info()}
+                            ) if done else None
+                        )
+                        parts.append(chunk.text)
+                        if flight is not None:
+                            flight.publish(chunk)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                        yield chunk
+
+                        if done:
+                            complete = True
+                            break
+                except asyncio.TimeoutError as e:
+                    # aiohttp enforces the deadline while the text streams in
+                    raise DeadlineExceeded(attempts.deadline.timeout) from e
+
+        if complete:
+            self._store(key, cache_info, "".join(parts))
+        if flight is not None:
+            flight.finish(("".join(parts), chunk.generation_info if complete else None))
+
+async def _json_lines(content) -> AsyncIterator[Dict]:
+    """Parse a streamed response body, one JSON object per line."""
+    async for line in content:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+class _OpenStream:
+    """A streaming response whose first line has arrived.
+
+    Holds the request's admission slot and endpoint until it is closed,
+    which it is on leaving a ``with`` block.
+    """
+
+    def __init__(self, stack: ExitStack, ticket: Ticket, url: str, first: Optional[Dict], lines: Iterator[Dict]):
+        self.stack = stack
+        self.ticket = ticket
+        self.url = url
+        self.first = first
+        self.lines = lines
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self.first is not None:
+            yield self.first
+        yield from self.lines
+
+    def close(self) -> None:
+        self.stack.close()
+
+    def __enter__(self) -> "_OpenStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stack.__exit__(exc_type, exc, tb)
+
+class _AsyncOpenStream:
+    """Async counterpart of ``_OpenStream``."""
+
+    def __init__(self, stack: AsyncExitStack, ticket: Ticket, url: str, first: Optional[Dict], lines: AsyncIterator[Dict]):
+        self.stack = stack
+        self.ticket = ticket
+        self.url = url
+        self.first = first
+        self.lines = lines
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        if self.first is not None:
+            yield self.first
+        async for data in self.lines:
+            yield data
+
+    async def aclose(self) -> None:
+        await self.stack.aclose()
+
+    async def __aenter__(self) -> "_AsyncOpenStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stack.__aexit__(exc_type, exc, tb)
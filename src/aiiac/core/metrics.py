@@ -0,0 +1,265 @@
+"""Per-generation timings and process-wide aggregates.
+
+Every generation gets a ``metrics`` entry in its response metadata: Ollama's
+own timings (model load, prompt evaluation, decoding) next to what the
+client saw (wall-clock, time outside the model, validation). The same
+figures are folded into histograms labelled by generator, template and
+model, which can be rendered as Prometheus text or summarised for the CLI.
+A generation that joined an identical one already in flight is counted as
+coalesced; Ollama's timings and tokens are only counted for the leader.
+Retried and hedged requests are counted too, failed generations included.
+Only the standard library is used, so importing this stays cheap.
+"""
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# Upper bounds, in seconds, shared by every duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Ollama reports these in nanoseconds
+OLLAMA_DURATIONS = {
+    "total_duration": "total",
+    "load_duration": "load",
+    "prompt_eval_duration": "prompt_eval",
+    "eval_duration": "eval",
+}
+SERVER_DURATIONS = set(OLLAMA_DURATIONS.values())
+
+# Durations aggregated into histograms, with their help text
+DURATIONS = {
+    "wall": "Client wall-clock time of the whole generation",
+    "request": "Time spent waiting on the LLM request",
+    "queue": "Request time outside the model: connection waits, transit and server queueing",
+    "admission": "Time waiting for a model slot under admission control",
+    "first_token": "Time until the first streamed chunk",
+    "load": "Model load time reported by Ollama",
+    "prompt_eval": "Prompt evaluation time reported by Ollama",
+    "eval": "Decoding time reported by Ollama",
+    "validation": "Time spent validating generated code",
+    "repair": "Time spent repairing code that failed validation",
+}
+
+TOKENS = {
+    "prompt_tokens": "Prompt tokens evaluated by Ollama",
+    "eval_tokens": "Tokens generated by Ollama",
+}
+
+# Extra requests a generation needed, and the repairs kept, with their help text
+ATTEMPTS = {
+    "retries": "Requests retried after a transient failure",
+    "hedges": "Requests duplicated for running slower than usual",
+    "repairs": "Repair requests for code that failed validation",
+    "repaired": "Repairs spliced into code that failed validation",
+}
+
+LABELS = ("generator", "template", "model")
+
+# mkstemp files are private; the dump is read by other users (node_exporter)
+DUMP_MODE = 0o644
+
+def generation_metrics(info: Optional[Dict]) -> Dict:
+    """Convert an LLM call's generation info into metrics in seconds."""
+    info = info or {}
+    metrics = {}
+    for field, name in OLLAMA_DURATIONS.items():
+        if field in info:
+            metrics[name] = info[field] / 1e9
+    if "prompt_eval_count" in info:
+        metrics["prompt_tokens"] = info["prompt_eval_count"]
+    if "eval_count" in info:
+        metrics["eval_tokens"] = info["eval_count"]
+        if metrics.get("eval"):
+            metrics["tokens_per_second"] = info["eval_count"] / metrics["eval"]
+
+    if "request" in info:
+        metrics["request"] = info["request"]
+        metrics["queue"] = max(info["request"] - metrics.get("total", 0.0), 0.0)
+    if "first_token" in info:
+        metrics["first_token"] = info["first_token"]
+    if "admission" in info and not info.get("coalesced"):
+        metrics["admission"] = info["admission"]
+    if "tenant" in info:
+        metrics["tenant"] = info["tenant"]
+    if "endpoint" in info:
+        metrics["endpoint"] = info["endpoint"]
+    if "attempts" in info:
+        metrics["attempts"] = info["attempts"]
+        metrics["retries"] = len(info.get("retried", ()))
+    if "hedged" in info:
+        metrics["hedged"] = info["hedged"]
+        metrics["hedges"] = 1
+    if info.get("coalesced"):
+        metrics["coalesced"] = True
+    return {k: round(v, 6) if isinstance(v, float) else v for k, v in metrics.items()}
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower, below = 0.0, 0
+        estimate = self.max
+        for bound, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= rank:
+                inside = cumulative - below
+                estimate = lower + (bound - lower) * ((rank - below) / inside if inside else 0)
+                break
+            lower, below = bound, cumulative
+        # Buckets are coarse; never report beyond what was actually seen
+        return min(max(estimate, self.min), self.max)
+
+class MetricsRegistry:
+    """Process-wide aggregates of every generation's metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[str, ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+
+    def observe(self, metrics: Dict, success: bool = True, cache: str = "") -> None:
+        """Fold one generation's metrics, labels included, into the aggregates."""
+        key = tuple(str(metrics.get(name, "")) for name in LABELS)
+        # The leader's generation already counted Ollama's work
+        coalesced = bool(metrics.get("coalesced"))
+        with self._lock:
+            outcome = key + ("success" if success else "failure", cache)
+            self._counters[("generations", outcome)] = self._counters.get(("generations", outcome), 0) + 1
+            if coalesced:
+                self._counters[("coalesced", key)] = self._counters.get(("coalesced", key), 0) + 1
+            for name in DURATIONS:
+                if name in metrics and not (coalesced and name in SERVER_DURATIONS):
+                    histogram = self._histograms.get((name, key))
+                    if histogram is None:
+                        histogram = self._histograms[(name, key)] = Histogram()
+                    histogram.observe(metrics[name])
+            for name in (*TOKENS, *ATTEMPTS):
+                if name in metrics and not coalesced:
+                    self._counters[(name, key)] = self._counters.get((name, key), 0) + metrics[name]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def summary(self) -> List[Dict]:
+        """One row per generator, template and model, with mean timings."""
+        with self._lock:
+            rows: Dict[Tuple[str, ...], Dict] = {}
+            for (name, key), value in self._counters.items():
+                row = rows.setdefault(key[:3], {**dict(zip(LABELS, key[:3])), "count": 0, "failures": 0})
+                if name == "generations":
+                    row["count"] += value
+                    if key[3] == "failure":
+                        row["failures"] += value
+                else:
+                    row[name] = value
+            for (name, key), histogram in self._histograms.items():
+                row = rows[key]
+                row[name] = histogram.mean
+                if name == "wall":
+                    row["wall_p95"] = histogram.quantile(0.95)
+                elif name == "eval" and histogram.sum and row.get("eval_tokens"):
+                    row["tokens_per_second"] = row["eval_tokens"] / histogram.sum
+            return [rows[key] for key in sorted(rows)]
+
+    def render_prometheus(self) -> str:
+        """Render the aggregates in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP aiiac_generations_total Generations finished",
+                "# TYPE aiiac_generations_total counter",
+            ]
+            for (name, key), value in sorted(self._counters.items()):
+                if name == "generations":
+                    labels = _labels(key[:3], status=key[3], cache=key[4])
+                    lines.append(f"aiiac_generations_total{{{labels}}} {_number(value)}")
+
+            lines += [
+                "# HELP aiiac_coalesced_total Generations served by an identical one already in flight",
+                "# TYPE aiiac_coalesced_total counter",
+            ]
+            for (name, key), value in sorted(self._counters.items()):
+                if name == "coalesced":
+                    lines.append(f"aiiac_coalesced_total{{{_labels(key)}}} {_number(value)}")
+
+            for name, help_text in {**TOKENS, **ATTEMPTS}.items():
+                metric = f"aiiac_{name}_total"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (counter, key), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{{{_labels(key)}}} {_number(value)}")
+
+            for name, help_text in DURATIONS.items():
+                metric = f"aiiac_{name}_seconds"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for (histogram_name, key), histogram in sorted(self._histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    for bound, cumulative in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{metric}_bucket{{{_labels(key, le=_number(bound))}}} {cumulative}")
+                    lines.append(f"{metric}_bucket{{{_labels(key, le='+Inf')}}} {histogram.count}")
+                    lines.append(f"{metric}_sum{{{_labels(key)}}} {_number(histogram.sum)}")
+                    lines.append(f"{metric}_count{{{_labels(key)}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Union[str, Path]) -> None:
+        """Atomically write the Prometheus text to a file, e.g. for node_exporter."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render_prometheus())
+                if hasattr(os, "fchmod"):
+                    os.fchmod(f.fileno(), DUMP_MODE)
+                else:
+                    # Windows before Python 3.13
+                    os.chmod(tmp, DUMP_MODE)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+def _labels(key: Tuple[str, ...], **extra: str) -> str:
+    pairs = list(zip(LABELS, key)) + list(extra.items())
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_registry = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
\ No newline at end of file
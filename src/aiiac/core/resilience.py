@@ -0,0 +1,285 @@
+"""Deadlines, retries and hedged requests for calls to the model servers.
+
+Every call runs against a ``Deadline``: its ``timeout`` covers the whole
+call, admission wait and retries included, and bounds each request made
+for it, so a stuck server fails the call instead of hanging it. Transient
+failures before any output (connection errors, timeouts, 5xx and 429
+responses) are retried after a jittered exponential backoff ("full
+jitter": a random delay up to ``RETRY_BASE * 2**n``, capped at
+``RETRY_CAP``), as long as the backoff still fits in the deadline.
+
+With hedging on, a request still waiting for its first output once it is
+slower than the ``hedge`` quantile of recent ones gets a duplicate, which
+the endpoint pool routes to the least-loaded server (or which takes
+another slot on the same one). The first to answer wins and the other is
+cancelled. ``Attempts`` records what a call took, for its generation info.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from .endpoints import is_endpoint_failure
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_RETRIES = 2
+RETRY_BASE = 0.5
+RETRY_CAP = 8.0
+# Latencies kept per kind of request, and needed before hedging starts
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call runs past its deadline."""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"No response within the {timeout:g}s deadline")
+        self.timeout = timeout
+
+class HedgeLost(BaseException):
+    """Stops the slower of two hedged requests.
+
+    Like a cancellation it is no fault of the server, so it is neither
+    retried nor counted against the endpoint or the admission limit.
+    """
+
+class Deadline:
+    """The time a call must finish by; no deadline without a timeout."""
+
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+        self.at = time.monotonic() + timeout if timeout else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, None without a deadline; raises once it has passed."""
+        if self.at is None:
+            return None
+        left = self.at - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceeded(self.timeout)
+        return left
+
+    @property
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+def backoff(retry: int) -> float:
+    """Delay before retry number ``retry`` (from 0), with full jitter."""
+    return random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** retry))
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether another attempt may succeed where this one failed."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None)
+    return status == 429 or is_endpoint_failure(error)
+
+def _describe(error: BaseException) -> str:
+    return str(error) or type(error).__name__
+
+class Attempts:
+    """The requests made for one call, reported in its generation info."""
+
+    def __init__(self, timeout: Optional[float], retries: int = DEFAULT_RETRIES):
+        self.deadline = Deadline(timeout)
+        self.retries = retries
+        self.sent = 0
+        self.errors: List[str] = []
+        self.hedged = False
+        self.winner: Optional[str] = None
+
+    def info(self) -> Dict:
+        info = {"attempts": self.sent}
+        if self.errors:
+            info["retried"] = list(self.errors)
+        if self.hedged:
+            info["hedged"] = self.winner or "failed"
+        if self.deadline.timeout:
+            info["timeout"] = self.deadline.timeout
+        return info
+
+    def _retry_delay(self, error: Exception) -> float:
+        """The backoff before retrying ``error``; raises it when out of retries or time."""
+        if self.deadline.expired:
+            raise DeadlineExceeded(self.deadline.timeout) from error
+        if len(self.errors) >= self.retries or not is_retryable(error):
+            raise error
+        delay = backoff(len(self.errors))
+        remaining = self.deadline.remaining()
+        if remaining is not None and delay >= remaining:
+            raise error
+        self.errors.append(_describe(error))
+        return delay
+
+    def run(self, attempt: Callable[[], T]) -> T:
+        """Call ``attempt`` until it succeeds, retrying transient failures."""
+        while True:
+            try:
+                return attempt()
+            except Exception as e:
+                delay = self._attach(lambda: self._retry_delay(e))
+            time.sleep(delay)
+
+    async def arun(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Async counterpart of ``run``."""
+        while True:
+            try:
+                return await attempt()
+            except Exception as e:
+                delay = self._attach(lambda: self._retry_delay(e))
+            await asyncio.sleep(delay)
+
+    def _attach(self, decide: Callable[[], float]) -> float:
+        try:
+            return decide()
+        except Exception as e:
+            # The generator reports what was tried alongside the error
+            e.generation_info = self.info()
+            raise
+
+class Cancel:
+    """Tells a request running on another thread to stop."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on cancellation, at once if that already happened."""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self) -> None:
+        """Raise ``HedgeLost`` once cancelled."""
+        if self.cancelled:
+            raise HedgeLost()
+
+class LatencyWindow:
+    """Recent latencies of one kind of request, for the hedging delay."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples: "deque[float]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The ``q`` quantile, None until there are enough samples."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+_windows: Dict[Tuple, LatencyWindow] = {}
+_windows_lock = threading.Lock()
+
+def latency_window(*key) -> LatencyWindow:
+    """The shared latency window for a kind of request, e.g. (model, streaming)."""
+    window = _windows.get(key)
+    if window is None:
+        with _windows_lock:
+            window = _windows.setdefault(key, LatencyWindow())
+    return window
+
+def hedged(
+    attempt: Callable[[Cancel], T],
+    attempts: Attempts,
+    delay: Optional[float],
+    discard: Callable[[T], None] = lambda result: None
+) -> T:
+    """Run ``attempt``, and a duplicate if it has not returned after ``delay`` seconds.
+
+    The attempts run on worker threads so the caller can wait for either;
+    the first to succeed wins, and the other is cancelled through its
+    ``Cancel`` or, if it finished too, handed to ``discard``.
+    """
+    if delay is None:
+        return attempt(Cancel())
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="aiiac-hedge")
+    # Each attempt runs in a copy of the caller's context (the tenant, ...)
+    runs = [(executor.submit(contextvars.copy_context().run, attempt, cancel), cancel) for cancel in [Cancel()]]
+    winner = None
+    try:
+        if not wait([runs[0][0]], timeout=delay).done:
+            attempts.hedged = True
+            cancel = Cancel()
+            runs.append((executor.submit(contextvars.copy_context().run, attempt, cancel), cancel))
+        pending, error = {future for future, _ in runs}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    attempts.winner = "hedge" if future is runs[-1][0] and attempts.hedged else "primary"
+                    return future.result()
+                error = error or future.exception()
+        raise error
+    finally:
+        for future, cancel in runs:
+            if future is not winner:
+                cancel.cancel()
+                future.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+        executor.shutdown(wait=False)
+
+async def ahedged(
+    attempt: Callable[[], Awaitable[T]],
+    attempts: Attempts,
+    delay: Optional[float],
+    discard: Optional[Callable[[T], Awaitable[None]]] = None
+) -> T:
+    """Async counterpart of ``hedged``; the loser's task is cancelled."""
+    if delay is None:
+        return await attempt()
+
+    tasks = [asyncio.ensure_future(attempt())]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            attempts.hedged = True
+            tasks.append(asyncio.ensure_future(attempt()))
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    attempts.winner = "hedge" if task is tasks[-1] and attempts.hedged else "primary"
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        losers = [task for task in tasks if task is not winner]
+        for task in losers:
+            task.cancel()
+        for task in losers:
+            try:
+                result = await task
+            except BaseException:
+                continue
+            if discard is not None:
+                await discard(result)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Near-duplicate lookup of past generations.
+
+Users ask for the same thing in many words ("ECS cluster with Fargate",
+"Fargate-backed ECS cluster, aws"), which the exact-match response cache
+never sees as a repeat. This index reduces the requirements text to a set
+of normalized words, MinHashes it and files the signature under
+locality-sensitive hash bands, so requests sharing most of their words
+land in a common bucket. Candidates from the buckets are compared by the
+Jaccard similarity of their word sets, and the closest one at or above the
+threshold is a hit.
+
+Entries are partitioned by everything besides the text that shapes the
+output (generator, template, provider, environment, ...), so a hit never
+crosses into a different kind of artifact, and the least recently used
+ones are evicted past ``max_entries``. The index is local, in memory and
+model-free. It is off unless a threshold is set with ``--similar`` or
+``AIIAC_SIMILAR_THRESHOLD``.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_MAX_ENTRIES = 2048
+
+# 16 bands of 4 rows: pairs from about 0.5 similarity up share a bucket
+NUM_PERM = 64
+BANDS = 16
+
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240611)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(NUM_PERM)]
+
+# Words that say nothing about the artifact asked for
+STOPWORDS = frozenset(
+    "a all an and any as at be by can create for from generate give i in into is it make me my need "
+    "of on or our please set so some that the this to up us use using want we which with".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def normalize(text: str, ignore: Iterable[str] = ()) -> FrozenSet[str]:
+    """Reduce text to its set of content words.
+
+    Words are lower-cased and split at punctuation, stopwords and the words
+    of ``ignore`` (e.g. the provider, already part of the partition) are
+    dropped, and plural ``s`` endings are stripped.
+    """
+    ignored = STOPWORDS.union(*(_WORD.findall(str(value).lower()) for value in ignore))
+    words = set()
+    for word in _WORD.findall(text.lower()):
+        if word in ignored:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return frozenset(words)
+
+def minhash(words: Iterable[str]) -> Tuple[int, ...]:
+    """The MinHash signature of a set of words."""
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big") for word in words]
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class _Entry:
+    __slots__ = ("partition", "words", "bands", "value")
+
+    def __init__(self, partition: Hashable, words: FrozenSet[str], bands: List[Tuple], value: Any):
+        self.partition = partition
+        self.words = words
+        self.bands = bands
+        self.value = value
+
+class SimilarityCache:
+    """Bounded LRU index of past results, looked up by similar text."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._ids: Dict[Tuple[Hashable, FrozenSet[str]], int] = {}
+        self._buckets: Dict[Tuple, set] = {}
+        self._next_id = 0
+
+    def _bands(self, partition: Hashable, words: FrozenSet[str]) -> List[Tuple]:
+        signature = minhash(words)
+        rows = NUM_PERM // BANDS
+        return [(partition, band, signature[band * rows:(band + 1) * rows]) for band in range(BANDS)]
+
+    def lookup(self, partition: Hashable, text: str, ignore: Iterable[str] = ()) -> Optional[Tuple[Any, float]]:
+        """Return the most similar stored value and its similarity, if close enough."""
+        words = normalize(text, ignore)
+        bands = self._bands(partition, words) if words else []
+        with self._lock:
+            best, best_score = None, 0.0
+            for entry_id in set().union(*(self._buckets.get(band, ()) for band in bands)):
+                score = jaccard(words, self._entries[entry_id].words)
+                if score > best_score:
+                    best, best_score = entry_id, score
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best].value, best_score
+
+    def add(self, partition: Hashable, text: str, value: Any, ignore: Iterable[str] = ()) -> None:
+        """Index a value under its text, evicting the least recently used past the bound."""
+        words = normalize(text, ignore)
+        if not words:
+            return
+        bands = self._bands(partition, words)
+        with self._lock:
+            previous = self._ids.get((partition, words))
+            if previous is not None:
+                self._remove(previous)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(partition, words, bands, value)
+            self._ids[(partition, words)] = entry_id
+            for band in bands:
+                self._buckets.setdefault(band, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        del self._ids[(entry.partition, entry.words)]
+        for band in entry.bands:
+            bucket = self._buckets[band]
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[band]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+            }
+
+_index: Optional[SimilarityCache] = None
+_configured = False
+_index_lock = threading.Lock()
+
+def configure_similarity(threshold: Optional[float], max_entries: Optional[int] = None) -> None:
+    """Turn the similarity cache on at ``threshold``, or off with None."""
+    global _index, _configured
+    with _index_lock:
+        _index = SimilarityCache(threshold, max_entries or DEFAULT_MAX_ENTRIES) if threshold else None
+        _configured = True
+
+def get_similarity_cache() -> Optional[SimilarityCache]:
+    """Return the process-wide similarity cache, None unless it was turned on."""
+    if not _configured:
+        threshold = os.environ.get("AIIAC_SIMILAR_THRESHOLD")
+        max_entries = os.environ.get("AIIAC_SIMILAR_MAX_ENTRIES")
+        configure_similarity(float(threshold) if threshold else None, int(max_entries) if max_entries else None)
+    return _index
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Single-flight coalescing of identical in-flight LLM calls.
+
+The first call for a key leads a ``Flight``; calls with the same key that
+arrive while it is in progress follow it instead of generating again. A
+flight carries the stream's chunks as they are produced, so followers can
+stream along, and ends with the complete result or the leader's error.
+Leaders and followers may be any mix of threads and event loops.
+
+If the leader goes away (its stream closed or its task cancelled),
+followers that have received nothing yet start over, one of them leading
+the next flight; followers already part-way through a stream fail.
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+class Abandoned(Exception):
+    """The flight's leader stopped before finishing."""
+
+class Flight:
+    """One in-flight call, shared by its leader and followers."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: List = []
+        self.done = False
+        self.result: Optional[Tuple] = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def publish(self, chunk) -> None:
+        """Hand a stream chunk to the followers."""
+        with self._cond:
+            self.chunks.append(chunk)
+            self._notify()
+
+    def finish(self, result: Tuple) -> None:
+        """End the flight with the complete result."""
+        self._end(result=result)
+
+    def fail(self, error: BaseException) -> None:
+        """End the flight with the leader's error."""
+        if isinstance(error, (GeneratorExit, asyncio.CancelledError, KeyboardInterrupt)):
+            error = Abandoned()
+        self._end(error=error)
+
+    def _end(self, result: Optional[Tuple] = None, error: Optional[BaseException] = None) -> None:
+        with _lock:
+            # Later calls start a new flight (or hit the response cache)
+            if _flights.get(self.key) is self:
+                del _flights[self.key]
+        with self._cond:
+            if self.done:
+                return
+            self.result, self.error, self.done = result, error, True
+            self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the follower's loop is already closed
+
+    def _outcome(self, delivered: int) -> Tuple:
+        if self.error is None:
+            return self.result
+        if isinstance(self.error, Abandoned) and delivered:
+            raise RuntimeError("The generation this request joined was cancelled")
+        raise self.error
+
+    def follow(self) -> Iterator:
+        """Yield the chunks as they come; the generator returns the result."""
+        delivered = 0
+        while True:
+            with self._cond:
+                while delivered >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                new, done = self.chunks[delivered:], self.done
+            for chunk in new:
+                yield chunk
+            delivered += len(new)
+            if done:
+                return self._outcome(delivered)
+
+    def wait(self, timeout: Optional[float] = None) -> Tuple:
+        """Block until the flight ends and return its result.
+
+        Raises ``TimeoutError`` if it has not ended within ``timeout`` seconds.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise TimeoutError()
+        return self._outcome(0)
+
+    @asynccontextmanager
+    async def _subscribe(self) -> AsyncIterator[asyncio.Event]:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            self._async_waiters.append(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._cond:
+                self._async_waiters.remove(waiter)
+
+    async def afollow(self) -> AsyncIterator:
+        """Async counterpart of ``follow``, raising the leader's error at the end."""
+        delivered = 0
+        async with self._subscribe() as changed:
+            while True:
+                with self._cond:
+                    new, done = self.chunks[delivered:], self.done
+                    if not new and not done:
+                        # Cleared under the lock, so the next publish sets it again
+                        changed.clear()
+                for chunk in new:
+                    yield chunk
+                delivered += len(new)
+                if done:
+                    self._outcome(delivered)
+                    return
+                if not new:
+                    await changed.wait()
+
+    async def await_result(self) -> Tuple:
+        """Wait for the flight to end without blocking the event loop."""
+        async with self._subscribe() as changed:
+            while True:
+                with self._cond:
+                    if self.done:
+                        break
+                    changed.clear()
+                await changed.wait()
+        return self._outcome(0)
+
+_lock = threading.Lock()
+_flights: Dict[str, Flight] = {}
+
+def join(key: str) -> Tuple[Flight, bool]:
+    """Return the flight for ``key`` and whether the caller leads it."""
+    with _lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            flight.followers += 1
+            return flight, False
+        flight = _flights[key] = Flight(key)
+        return flight, True
+
+def in_flight() -> int:
+    """Number of flights in progress."""
+    with _lock:
+        return len(_flights)
+
+@contextmanager
+def leading(flight: Optional[Flight]) -> Iterator[None]:
+    """Pass the leader's failure on to its followers."""
+    try:
+        yield
+    except BaseException as e:
+        if flight is not None:
+            flight.fail(e)
+        raise
\ No newline at end of file
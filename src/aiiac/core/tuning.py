@@ -0,0 +1,76 @@
+"""Backend tuning profiles and model warm-up.
+
+A profile names a set of Ollama runtime options and a keep-alive policy:
+
+- ``latency`` keeps models loaded indefinitely with a modest context, so
+  no request ever pays for a load
+- ``throughput`` keeps models loaded for an hour and evaluates prompts in
+  larger batches with a longer context
+- ``low-memory`` unloads idle models after a minute with a small context
+  and batch
+
+Ollama reloads a model whenever its runtime options change, so warm-ups
+send exactly the options later generations will. Warm-up load times are
+recorded under the ``warmup`` generator, next to the load time each
+generation reports, which shows whether warming up paid off.
+"""
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+from .metrics import generation_metrics, get_metrics
+
+PROFILES: Dict[str, Dict] = {
+    "latency": {"keep_alive": -1, "num_ctx": 4096, "num_batch": 512},
+    "throughput": {"keep_alive": "1h", "num_ctx": 8192, "num_batch": 1024},
+    "low-memory": {"keep_alive": "1m", "num_ctx": 2048, "num_batch": 128},
+}
+
+def profile_settings(name: Optional[str]) -> Dict:
+    """The OllamaLLM settings of a profile; no name means Ollama's defaults."""
+    if not name:
+        return {}
+    try:
+        return dict(PROFILES[name])
+    except KeyError:
+        raise ValueError(f"Unknown profile {name!r}, expected one of: {', '.join(PROFILES)}")
+
+DEFAULT_MODELS = ("codellama",)
+
+def configured_models() -> List[str]:
+    """Models to preload, from the comma-separated ``AIIAC_MODELS``."""
+    models = [m.strip() for m in os.environ.get("AIIAC_MODELS", "").split(",") if m.strip()]
+    return models or list(DEFAULT_MODELS)
+
+def warm_up(models: Iterable[str]) -> List[Dict]:
+    """Load models on every server concurrently, one report per model and server.
+
+    Each report has the ``model``, its ``endpoint``, the ``load`` and
+    ``wall`` times in seconds, and ``error`` when the model could not be
+    loaded.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from .client import current_profile, endpoint_urls, get_endpoints, get_llm
+
+    def load(model: str, url: str) -> Dict:
+        started = time.monotonic()
+        report = {"model": model, "endpoint": url}
+        try:
+            metrics = generation_metrics(get_llm(model).warmup(url))
+            report["load"] = metrics.get("load", 0.0)
+        except Exception as e:
+            metrics = {}
+            report["error"] = str(e)
+        report["wall"] = metrics["wall"] = round(time.monotonic() - started, 6)
+        metrics.update(generator="warmup", template=current_profile() or "default", model=model)
+        get_metrics().observe(metrics, success="error" not in report)
+        return report
+
+    pool = get_endpoints()
+    if pool is not None:
+        # Learn which servers have which models before loading them
+        pool.check_all()
+    targets = [(model, url) for model in dict.fromkeys(models) for url in endpoint_urls(model)]
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        return list(executor.map(lambda target: load(*target), targets))
\ No newline at end of file
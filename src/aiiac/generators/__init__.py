@@ -0,0 +1,20 @@
+"""Code generators package.
+
+Generator classes are imported on first access so importing the package
+does not pull in langchain and pydantic.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'IaCGenerator': '.iac',
+    'ConfigGenerator': '.config',
+    'PipelineGenerator': '.pipeline',
+    'UtilityGenerator': '.utility'
+}
+
+__all__ = ['IaCGenerator', 'ConfigGenerator', 'PipelineGenerator', 'UtilityGenerator']
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
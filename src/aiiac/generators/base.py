@@ -1,19 +1,577 @@
+import asyncio
+import contextvars
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict
-from ..core.llm import OllamaLLM
-from ..models.schemas import GeneratorResponse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Dict, Generator, Iterator, List, Optional, Tuple, Union
+from ..core.client import get_llm
+from ..core.metrics import generation_metrics, get_metrics
+from ..core.similarity import get_similarity_cache
+from ..models.schemas import MAX_SAMPLES, GeneratorResponse
+from ..validation.engine import FENCE, summarize, validate
+from .prompts import Prompt, check_budget, compile_templates, prompt_max_tokens
+from .repair import Region, extract_fix, failing_region, repair_budget, repair_prompt, repair_rounds, splice
+
+# Each extra best-of-N sample runs this much hotter than the one before
+SAMPLE_TEMPERATURE_STEP = 0.2
+
+class UnsupportedTemplateError(ValueError):
+    """Raised when a generator has no template for the requested type."""
+
+class GenerationStream:
+    """Text chunks of a generation, in the order the model produces them.
+
+    Iterate to receive the chunks; once the stream is exhausted ``response``
+    holds the same ``GeneratorResponse`` that ``generate`` would return.
+    """
+
+    def __init__(self, chunks: Generator[str, None, GeneratorResponse]):
+        self._chunks = chunks
+        self.response: Optional[GeneratorResponse] = None
+
+    def __iter__(self) -> Iterator[str]:
+        self.response = yield from self._chunks
+
+class AsyncGenerationStream:
+    """Async counterpart of ``GenerationStream``, iterated with ``async for``.
+
+    The underlying iterator ends with the response rather than returning it,
+    which async generators cannot do.
+    """
+
+    def __init__(self, items: AsyncIterator[Union[str, GeneratorResponse]]):
+        self._items = items
+        self.response: Optional[GeneratorResponse] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for item in self._items:
+            if isinstance(item, GeneratorResponse):
+                self.response = item
+            else:
+                yield item
+
+    async def aclose(self) -> None:
+        """Stop the generation, closing the request to the model."""
+        await self._items.aclose()
+
+def _close_fence(code: str) -> str:
+    """Restore the closing fence a stop sequence cut off."""
+    fences = sum(1 for line in code.split("\n") if FENCE.match(line))
+    return code.rstrip() + "\n```\n" if fences % 2 else code
 
 class BaseGenerator(ABC):
     """Base class for all generators."""
-    
+
+    TEMPLATES: Dict[str, str] = {}
+    # TEMPLATES compiled when the class is defined, see prompts.py
+    PROMPTS: Dict[str, Prompt] = {}
+    ARTIFACT = "code"
+    # Registry name and the option selecting a template, for metric labels
+    NAME = "code"
+    TEMPLATE_OPTION = "template_type"
+    DEFAULT_TEMPLATE = ""
+    # Request options handed to the LLM rather than the template
+    LLM_OPTIONS = ("use_cache", "refresh", "stop", "num_predict", "temperature", "seed", "timeout")
+    # Request options that never change what is generated
+    UNSHAPING_OPTIONS = ("use_cache", "refresh", "validate", "timeout", "samples", "repair")
+    # Templates answered with a single fenced block, by fence tag; their
+    # generation stops at the closing fence instead of running on into prose
+    FENCED: Dict[str, str] = {}
+    # Output token budget (Ollama's num_predict) per template
+    NUM_PREDICT: Dict[str, int] = {}
+    # Prompt token cap per template; AIIAC_PROMPT_MAX_TOKENS caps the rest
+    PROMPT_MAX_TOKENS: Dict[str, int] = {}
+    # Samples generated at once per template, the first valid one winning;
+    # ``samples`` overrides it per request, and ``timeout`` bounds them all
+    SAMPLES: Dict[str, int] = {}
+    CLOSING_FENCE = "\n```\n"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.PROMPTS = compile_templates(cls.TEMPLATES, cls.NAME)
+
     def __init__(self, model: str = "codellama"):
-        self.llm = OllamaLLM(model=model)
-    
-    @abstractmethod
+        self.llm = get_llm(model)
+
     def generate(self, prompt: str, **kwargs) -> GeneratorResponse:
         """Generate code from prompt."""
+        started = time.monotonic()
+        try:
+            response = self._similar(prompt, kwargs)
+            if response is None:
+                formatted_prompt = self._full_prompt(prompt, kwargs)
+                samples = self._samples(kwargs)
+                if samples > 1:
+                    response = self._best_of(formatted_prompt, samples, kwargs)
+                else:
+                    generation = self._complete(formatted_prompt, self._llm_options(kwargs))
+                    response = self._finish(generation.text, generation.generation_info, **kwargs)
+                response = self._repair(response, kwargs)
+                self._remember(prompt, kwargs, response)
+        except UnsupportedTemplateError as e:
+            response = self._failure(str(e))
+        except Exception as e:
+            response = self._failure(f"Error generating {self.ARTIFACT}: {str(e)}", e)
+        return self._record(response, started, kwargs)
+
+    async def agenerate(self, prompt: str, **kwargs) -> GeneratorResponse:
+        """Generate code from prompt without blocking the event loop.
+
+        Cancelling the awaiting task closes the request to the model.
+        """
+        started = time.monotonic()
+        try:
+            response = self._similar(prompt, kwargs)
+            if response is None:
+                formatted_prompt = self._full_prompt(prompt, kwargs)
+                samples = self._samples(kwargs)
+                if samples > 1:
+                    response = await self._abest_of(formatted_prompt, samples, kwargs)
+                else:
+                    generation = await self._acomplete(formatted_prompt, self._llm_options(kwargs))
+                    response = self._finish(generation.text, generation.generation_info, **kwargs)
+                response = await self._arepair(response, kwargs)
+                self._remember(prompt, kwargs, response)
+        except UnsupportedTemplateError as e:
+            response = self._failure(str(e))
+        except Exception as e:
+            response = self._failure(f"Error generating {self.ARTIFACT}: {str(e)}", e)
+        return self._record(response, started, kwargs)
+
+    async def arepair(self, prompt: str, response: GeneratorResponse, **kwargs) -> GeneratorResponse:
+        """Finish a response generated with ``validate=False`` once the caller validated it.
+
+        Repairs it if it failed validation, as ``agenerate`` would have,
+        and offers the result to the similarity cache.
+        """
+        response = await self._arepair(response, kwargs)
+        self._remember(prompt, kwargs, response)
+        return response
+
+    def generate_stream(self, prompt: str, **kwargs) -> GenerationStream:
+        """Generate code from prompt, yielding text as it arrives."""
+        return GenerationStream(self._iter_generate(prompt, **kwargs))
+
+    def _iter_generate(self, prompt: str, **kwargs) -> Generator[str, None, GeneratorResponse]:
+        """Stream the model output, then build the final response.
+
+        A repair changes the response's code, not the text already streamed.
+        """
+        started = time.monotonic()
+        try:
+            response = self._similar(prompt, kwargs)
+            if response is not None:
+                yield "\n".join(template.code for template in response.templates)
+                return self._record(response, started, kwargs)
+
+            formatted_prompt = self._full_prompt(prompt, kwargs)
+            samples = self._samples(kwargs)
+            if samples > 1:
+                # Only the winner is worth showing, so it arrives whole
+                response = self._best_of(formatted_prompt, samples, kwargs)
+                yield "\n".join(template.code for template in response.templates)
+            else:
+                options = self._llm_options(kwargs)
+                while True:
+                    parts = []
+                    info = None
+                    for chunk in self.llm.stream_chunks(formatted_prompt, **options):
+                        if chunk.generation_info:
+                            info = chunk.generation_info
+                        if chunk.text:
+                            parts.append(chunk.text)
+                            yield chunk.text
+                    if not self._cut_short("".join(parts), options):
+                        break
+                    options = self._without_fence_stop(options)
+                response = self._finish("".join(parts), info, **kwargs)
+            response = self._repair(response, kwargs)
+            self._remember(prompt, kwargs, response)
+        except UnsupportedTemplateError as e:
+            response = self._failure(str(e))
+        except Exception as e:
+            response = self._failure(f"Error generating {self.ARTIFACT}: {str(e)}", e)
+        return self._record(response, started, kwargs)
+
+    def agenerate_stream(self, prompt: str, **kwargs) -> AsyncGenerationStream:
+        """Generate code from prompt, yielding text as it arrives, on the event loop."""
+        return AsyncGenerationStream(self._aiter_generate(prompt, **kwargs))
+
+    async def _aiter_generate(self, prompt: str, **kwargs) -> AsyncIterator[Union[str, GeneratorResponse]]:
+        """Async counterpart of ``_iter_generate``, ending with the response."""
+        started = time.monotonic()
+        try:
+            response = self._similar(prompt, kwargs)
+            if response is not None:
+                yield "\n".join(template.code for template in response.templates)
+                yield self._record(response, started, kwargs)
+                return
+
+            formatted_prompt = self._full_prompt(prompt, kwargs)
+            samples = self._samples(kwargs)
+            if samples > 1:
+                response = await self._abest_of(formatted_prompt, samples, kwargs)
+                yield "\n".join(template.code for template in response.templates)
+            else:
+                options = self._llm_options(kwargs)
+                while True:
+                    parts = []
+                    info = None
+                    async for chunk in self.llm.astream_chunks(formatted_prompt, **options):
+                        if chunk.generation_info:
+                            info = chunk.generation_info
+                        if chunk.text:
+                            parts.append(chunk.text)
+                            yield chunk.text
+                    if not self._cut_short("".join(parts), options):
+                        break
+                    options = self._without_fence_stop(options)
+                response = self._finish("".join(parts), info, **kwargs)
+            response = await self._arepair(response, kwargs)
+            self._remember(prompt, kwargs, response)
+        except UnsupportedTemplateError as e:
+            response = self._failure(str(e))
+        except Exception as e:
+            response = self._failure(f"Error generating {self.ARTIFACT}: {str(e)}", e)
+        yield self._record(response, started, kwargs)
+
+    @abstractmethod
+    def _build_prompt(self, prompt: str, **kwargs) -> str:
+        """Select the template for the request and fill it in."""
+        pass
+
+    @abstractmethod
+    def _build_response(self, code: str, **kwargs) -> GeneratorResponse:
+        """Wrap generated code in a successful response."""
         pass
-    
-    def _prepare_prompt(self, template: str, **kwargs) -> str:
-        """Prepare prompt from template."""
-        return template.format(**kwargs)
\ No newline at end of file
+
+    def _template(self, kwargs: Dict) -> str:
+        return kwargs.get(self.TEMPLATE_OPTION) or self.DEFAULT_TEMPLATE
+
+    def _full_prompt(self, prompt: str, kwargs: Dict) -> str:
+        """Build the prompt, asking fenced templates for a single block.
+
+        Raises ``PromptTooLongError`` when it is over the template's token cap.
+        """
+        formatted_prompt = self._build_prompt(prompt, **kwargs)
+        template = self._template(kwargs)
+        fence = self.FENCED.get(template)
+        if fence:
+            formatted_prompt += f"Reply with all of the code in a single ```{fence} block.\n"
+        cap = self.PROMPT_MAX_TOKENS.get(template) or prompt_max_tokens()
+        if cap:
+            check_budget(formatted_prompt, f"{self.NAME}/{template}", cap)
+        return formatted_prompt
+
+    def _llm_options(self, kwargs: Dict) -> Dict:
+        """Pick the request options meant for the LLM.
+
+        Stop sequences and the token budget default per template; an
+        explicit ``stop=[]`` turns the stop sequences off.
+        """
+        options = {k: kwargs[k] for k in self.LLM_OPTIONS if kwargs.get(k) is not None}
+        template = self._template(kwargs)
+        if template in self.FENCED:
+            options.setdefault("stop", [self.CLOSING_FENCE])
+        if template in self.NUM_PREDICT:
+            options.setdefault("num_predict", self.NUM_PREDICT[template])
+        return options
+
+    def _cut_short(self, text: str, options: Dict) -> bool:
+        """Whether the closing-fence stop ended a reply before its code.
+
+        The stop cannot tell a bare opening fence from a closing one, so a
+        reply of prose and then ``` ends at that fence: no fence is open,
+        and the text is empty or ends in a lead-in such as "Here it is:".
+        """
+        if self.CLOSING_FENCE not in (options.get("stop") or ()):
+            return False
+        lines = text.rstrip().split("\n")
+        if any(FENCE.match(line) for line in lines):
+            return False
+        return not lines[-1] or lines[-1].endswith(":")
+
+    def _without_fence_stop(self, options: Dict) -> Dict:
+        """The options again, without the closing-fence stop."""
+        return {**options, "stop": [stop for stop in options["stop"] if stop != self.CLOSING_FENCE]}
+
+    def _complete(self, formatted_prompt: str, options: Dict):
+        """Generate one reply, asking again without the stop if it was cut short."""
+        generation = self.llm.generate([formatted_prompt], **options).generations[0][0]
+        if self._cut_short(generation.text, options):
+            generation = self.llm.generate([formatted_prompt], **self._without_fence_stop(options)).generations[0][0]
+        return generation
+
+    async def _acomplete(self, formatted_prompt: str, options: Dict):
+        """Async counterpart of ``_complete``."""
+        generation = (await self.llm.agenerate([formatted_prompt], **options)).generations[0][0]
+        if self._cut_short(generation.text, options):
+            options = self._without_fence_stop(options)
+            generation = (await self.llm.agenerate([formatted_prompt], **options)).generations[0][0]
+        return generation
+
+    def _finish(self, code: str, info: Optional[Dict], **kwargs) -> GeneratorResponse:
+        """Build and validate the response and attach generation metadata.
+
+        Pass ``validate=False`` to leave validation to the caller.
+        """
+        response = self._build_response(_close_fence(code), **kwargs)
+        metrics = generation_metrics(info)
+
+        if kwargs.get("validate", True):
+            started = time.monotonic()
+            response.metadata.update(summarize([validate(t.code, t.language) for t in response.templates]))
+            metrics["validation"] = round(time.monotonic() - started, 6)
+
+        response.metadata["metrics"] = metrics
+        if info and "cache" in info:
+            response.metadata["cache"] = info["cache"]
+        return response
+
+    def _repair(self, response: GeneratorResponse, kwargs: Dict) -> GeneratorResponse:
+        """Fix code that failed validation in place, one failing region per round."""
+        started = time.monotonic()
+        for _ in range(repair_rounds(kwargs.get("repair"))):
+            job = self._next_repair(response, kwargs)
+            if job is None:
+                break
+            index, region, formatted_prompt, options = job
+            reply = self._complete(formatted_prompt, options).text
+            if not self._apply_repair(response, index, region, reply, started):
+                break
+        return response
+
+    async def _arepair(self, response: GeneratorResponse, kwargs: Dict) -> GeneratorResponse:
+        """Async counterpart of ``_repair``."""
+        started = time.monotonic()
+        for _ in range(repair_rounds(kwargs.get("repair"))):
+            job = self._next_repair(response, kwargs)
+            if job is None:
+                break
+            index, region, formatted_prompt, options = job
+            reply = (await self._acomplete(formatted_prompt, options)).text
+            if not self._apply_repair(response, index, region, reply, started):
+                break
+        return response
+
+    def _next_repair(self, response: GeneratorResponse, kwargs: Dict) -> Optional[Tuple[int, Region, str, Dict]]:
+        """The template to repair next, its failing region, the prompt and LLM options."""
+        if not response.success or response.metadata.get("valid") is not False:
+            return None
+        for index, template in enumerate(response.templates):
+            region = failing_region(template.code, validate(template.code, template.language).errors, template.language)
+            if region is None:
+                continue
+            options = {k: kwargs[k] for k in ("use_cache", "refresh", "timeout") if kwargs.get(k) is not None}
+            options.update(stop=[self.CLOSING_FENCE], num_predict=repair_budget(template.code, region))
+            return index, region, repair_prompt(template.code, region), options
+        return None
+
+    def _apply_repair(self, response: GeneratorResponse, index: int, region: Region, reply: str, started: float) -> bool:
+        """Splice a fixed region in and validate again.
+
+        A fix that changes nothing or adds problems is dropped, and False
+        returned to end the repair. ``repairs`` counts the requests made,
+        ``repaired`` the fixes kept.
+        """
+        template = response.templates[index]
+        metrics = response.metadata.setdefault("metrics", {})
+        metrics["repairs"] = metrics.get("repairs", 0) + 1
+        metrics["repair"] = round(time.monotonic() - started, 6)
+        before = validate(template.code, template.language)
+        code = splice(template.code, region, extract_fix(reply))
+        after = validate(code, template.language)
+        if code == template.code or len(after.errors) > len(before.errors):
+            return False
+        template.code = code
+        metrics["repaired"] = metrics.get("repaired", 0) + 1
+        response.metadata.pop("errors", None)
+        response.metadata.update(summarize([validate(t.code, t.language) for t in response.templates]))
+        return True
+
+    def _samples(self, kwargs: Dict) -> int:
+        return min(kwargs.get("samples") or self.SAMPLES.get(self._template(kwargs), 1), MAX_SAMPLES)
+
+    def _sample_options(self, options: Dict, index: int) -> Dict:
+        """LLM options of best-of-N sample ``index``.
+
+        The first sample is the plain request, so it can come from the
+        cache; the others get their own seed and a higher temperature,
+        which also keeps them from being coalesced with each other.
+        """
+        if index == 0:
+            return options
+        temperature = options.get("temperature", self.llm.temperature)
+        return {
+            **options,
+            "seed": options.get("seed", 0) + index,
+            "temperature": min(temperature + SAMPLE_TEMPERATURE_STEP * index, 1.0)
+        }
+
+    def _best_of(self, formatted_prompt: str, samples: int, kwargs: Dict) -> GeneratorResponse:
+        """Generate ``samples`` samples at once and return the first that validates.
+
+        Samples stream, so once there is a winner the others stop at their
+        next chunk and close their requests.
+        """
+        options = self._llm_options(kwargs)
+        decided = threading.Event()
+
+        def sample(index: int) -> Optional[GeneratorResponse]:
+            sample_options = self._sample_options(options, index)
+            while True:
+                parts, info = [], None
+                chunks = self.llm.stream_chunks(formatted_prompt, **sample_options)
+                try:
+                    for chunk in chunks:
+                        if decided.is_set():
+                            return None
+                        if chunk.generation_info:
+                            info = chunk.generation_info
+                        parts.append(chunk.text)
+                finally:
+                    chunks.close()
+                if not self._cut_short("".join(parts), sample_options):
+                    break
+                sample_options = self._without_fence_stop(sample_options)
+            return self._finish("".join(parts), info, **{**kwargs, "validate": True})
+
+        executor = ThreadPoolExecutor(max_workers=samples, thread_name_prefix="aiiac-sample")
+        # Each sample runs in a copy of the caller's context (the tenant, ...)
+        futures = {
+            executor.submit(contextvars.copy_context().run, sample, index): index
+            for index in range(samples)
+        }
+        finished: List[Tuple[int, GeneratorResponse]] = []
+        errors: List[BaseException] = []
+        try:
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+                finished.append((futures[future], future.result()))
+                if finished[-1][1].metadata.get("valid"):
+                    break
+        finally:
+            decided.set()
+            executor.shutdown(wait=False)
+        return self._pick(finished, errors, samples)
+
+    async def _abest_of(self, formatted_prompt: str, samples: int, kwargs: Dict) -> GeneratorResponse:
+        """Async counterpart of ``_best_of``; the losing samples are cancelled."""
+        options = self._llm_options(kwargs)
+
+        async def sample(index: int) -> GeneratorResponse:
+            generation = await self._acomplete(formatted_prompt, self._sample_options(options, index))
+            return self._finish(generation.text, generation.generation_info, **{**kwargs, "validate": True})
+
+        tasks = {asyncio.ensure_future(sample(index)): index for index in range(samples)}
+        finished: List[Tuple[int, GeneratorResponse]] = []
+        errors: List[BaseException] = []
+        try:
+            pending = set(tasks)
+            while pending and not any(response.metadata.get("valid") for _, response in finished):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    else:
+                        finished.append((tasks[task], task.result()))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self._pick(finished, errors, samples)
+
+    def _pick(
+        self,
+        finished: List[Tuple[int, GeneratorResponse]],
+        errors: List[BaseException],
+        samples: int
+    ) -> GeneratorResponse:
+        """The first valid sample, else the one with the fewest errors."""
+        if not finished:
+            raise errors[0]
+        index, response = next(
+            ((index, response) for index, response in finished if response.metadata.get("valid")),
+            min(finished, key=lambda pair: len(pair[1].metadata.get("errors", [])))
+        )
+        response.metadata["samples"] = {
+            "requested": samples,
+            "finished": len(finished),
+            "failed": len(errors),
+            "winner": index,
+        }
+        return response
+
+    def _similarity_key(self, kwargs: Dict) -> Tuple[Tuple, Tuple[str, ...]]:
+        """The similarity cache partition of a request, and the words it covers.
+
+        Everything besides the requirements text that shapes the output is
+        in the partition, so the partition's own words (the provider,
+        environment, ...) need not match in the text as well.
+        """
+        options = {**kwargs, **self._llm_options(kwargs)}
+        shaping = tuple(sorted(
+            (name, repr(value)) for name, value in options.items()
+            if name not in self.UNSHAPING_OPTIONS and name != self.TEMPLATE_OPTION
+        ))
+        words = tuple(value for value in kwargs.values() if isinstance(value, str))
+        return (self.NAME, self.llm.model, self._template(kwargs), shaping), words
+
+    def _similar(self, prompt: str, kwargs: Dict) -> Optional[GeneratorResponse]:
+        """A validated response to an earlier, similar request, if the cache is on."""
+        index = get_similarity_cache()
+        if index is None or kwargs.get("use_cache") is False or kwargs.get("refresh"):
+            return None
+        partition, words = self._similarity_key(kwargs)
+        hit = index.lookup(partition, prompt, ignore=words)
+        if hit is None:
+            return None
+        stored, similarity = hit
+        response = stored.model_copy(deep=True)
+        response.metadata["cache"] = {"status": "similar", "similarity": round(similarity, 3)}
+        return response
+
+    def _remember(self, prompt: str, kwargs: Dict, response: GeneratorResponse) -> None:
+        """Offer a response that passed validation to the similarity cache."""
+        index = get_similarity_cache()
+        if index is None or kwargs.get("use_cache") is False or not response.metadata.get("valid"):
+            return
+        stored = response.model_copy(deep=True)
+        for name in ("metrics", "cache"):
+            stored.metadata.pop(name, None)
+        partition, words = self._similarity_key(kwargs)
+        index.add(partition, prompt, stored, ignore=words)
+
+    def _record(self, response: GeneratorResponse, started: float, kwargs: Dict) -> GeneratorResponse:
+        """Label the response's metrics, add wall-clock time and aggregate them."""
+        metrics = response.metadata.setdefault("metrics", {})
+        metrics.update(
+            generator=self.NAME,
+            template=self._template(kwargs),
+            model=self.llm.model,
+            wall=round(time.monotonic() - started, 6)
+        )
+        cache = response.metadata.get("cache", {}).get("status", "")
+        get_metrics().observe(metrics, success=response.success, cache=cache)
+        return response
+
+    def _failure(self, message: str, error: Optional[BaseException] = None) -> GeneratorResponse:
+        """Build a failed response, with what the LLM call tried before ``error``."""
+        response = GeneratorResponse(
+            success=False,
+            message=message,
+            templates=[]
+        )
+        info = getattr(error, "generation_info", None)
+        if info:
+            response.metadata["metrics"] = generation_metrics(info)
+        return response
+
+    def _prepare_prompt(self, template: Union[Prompt, str], **kwargs) -> str:
+        """Prepare prompt from a compiled template, or a raw one compiled on the spot."""
+        if isinstance(template, str):
+            template = Prompt(template)
+        return template.render(**kwargs)
\ No newline at end of file
@@ -1,10 +1,20 @@
 from typing import Optional
-from .base import BaseGenerator
+from .base import BaseGenerator, UnsupportedTemplateError
+from .context import context_tokens, pack_context
 from ..models.schemas import ConfigTemplate, GeneratorResponse, IaCTemplate
 
 class ConfigGenerator(BaseGenerator):
     """Configuration generator."""
     
+    ARTIFACT = "configuration"
+    NAME = "config"
+    TEMPLATE_OPTION = "config_type"
+    DEFAULT_TEMPLATE = "kubernetes"
+    
+    # Docker asks for a Dockerfile and a Compose file, so it is not one block
+    FENCED = {"kubernetes": "yaml", "terraform_vars": "hcl"}
+    NUM_PREDICT = {"kubernetes": 1536, "docker": 1536, "terraform_vars": 768}
+    
     TEMPLATES = {
         "kubernetes": """
         Generate Kubernetes configuration for:
@@ -24,6 +34,7 @@ class ConfigGenerator(BaseGenerator):
         Generate Docker configuration for:
         
         Requirements: {requirements}
+        Infrastructure: {iac_description}
         Environment: {environment}
         
         Include:
@@ -37,6 +48,7 @@ class ConfigGenerator(BaseGenerator):
         Generate Terraform variables for:
         
         Requirements: {requirements}
+        Infrastructure: {iac_description}
         Environment: {environment}
         
         Include:
@@ -46,55 +58,48 @@ class ConfigGenerator(BaseGenerator):
         """
     }
     
-    def generate(
+    def _build_prompt(
         self,
         prompt: str,
         iac_template: Optional[IaCTemplate] = None,
         **kwargs
-    ) -> GeneratorResponse:
-        """Generate configuration files."""
+    ) -> str:
+        """Fill in the configuration template for the request.
+        
+        The IaC's resources, variables and outputs are packed into
+        ``context_tokens`` tokens alongside its description.
+        """
+        config_type = kwargs.get("config_type", "kubernetes")
+        template = self.PROMPTS.get(config_type)
+        if not template:
+            raise UnsupportedTemplateError(f"Configuration type {config_type} not supported")
+        
+        return self._prepare_prompt(
+            template,
+            requirements=prompt,
+            iac_description=pack_context([iac_template], context_tokens(kwargs.get("context_tokens"))),
+            environment=kwargs.get("environment", "development")
+        )
+    
+    def _build_response(self, code: str, **kwargs) -> GeneratorResponse:
+        """Wrap generated configuration in a response."""
         config_type = kwargs.get("config_type", "kubernetes")
         environment = kwargs.get("environment", "development")
         
-        template = self.TEMPLATES.get(config_type)
-        if not template:
-            return GeneratorResponse(
-                success=False,
-                message=f"Configuration type {config_type} not supported",
-                templates=[]
-            )
+        template = ConfigTemplate(
+            code=code,
+            language=self._get_language(config_type),
+            description=f"Generated {config_type} configuration for {environment}",
+            type="config",
+            format=self._get_format(config_type),
+            environment=environment
+        )
         
-        try:
-            formatted_prompt = self._prepare_prompt(
-                template,
-                requirements=prompt,
-                iac_description=iac_template.description if iac_template else "Not provided",
-                environment=environment
-            )
-            
-            response = self.llm(formatted_prompt)
-            
-            template = ConfigTemplate(
-                code=response,
-                language=self._get_language(config_type),
-                description=f"Generated {config_type} configuration for {environment}",
-                type="config",
-                format=self._get_format(config_type),
-                environment=environment
-            )
-            
-            return GeneratorResponse(
-                success=True,
-                message="Successfully generated configuration",
-                templates=[template]
-            )
-            
-        except Exception as e:
-            return GeneratorResponse(
-                success=False,
-                message=f"Error generating configuration: {str(e)}",
-                templates=[]
-            )
+        return GeneratorResponse(
+            success=True,
+            message="Successfully generated configuration",
+            templates=[template]
+        )
     
     def _get_language(self, config_type: str) -> str:
         """Get language for config type."""
@@ -0,0 +1,194 @@
+"""Packing upstream artifacts into downstream prompts.
+
+Configuration and pipeline generations are grounded in the artifacts
+generated before them, but the full code of a large stack would blow the
+context window and the prompt-evaluation time. Instead each artifact is
+reduced to the facts a downstream generation needs, by fast local parsing:
+
+- Terraform: outputs, resources (``type.name``), variables, modules and
+  data sources, from the HCL parser, or a line scan if it does not parse
+- tfvars: the variables set
+- Kubernetes and Compose YAML: objects (``Kind/name``), images, ports and
+  environment keys
+- Dockerfiles: base images, exposed ports and environment keys
+
+Facts are cached by content hash, so a stack's IaC is read once however
+many configurations use it. ``pack_context`` fits them under a token budget
+(``AIIAC_CONTEXT_TOKENS``, or ``context_tokens`` per request), taking the
+most useful kinds of facts from every artifact in turn and noting how many
+items did not fit.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..validation import dockerfile, hcl
+from ..validation.engine import block_language, extract_blocks, normalize_language
+from .prompts import count_tokens
+
+DEFAULT_CONTEXT_TOKENS = 300
+CACHE_SIZE = 1024
+
+Facts = Dict[str, List[str]]
+
+# Kinds of facts in the order they are packed
+FACT_ORDER = ("outputs", "resources", "objects", "images", "ports", "variables", "env", "modules", "data")
+
+# Terraform blocks by their labels, for code that does not parse
+TF_BLOCK = re.compile(r'^\s*(resource|data|variable|output|module)\s+"([^"]+)"(?:\s+"([^"]+)")?', re.MULTILINE)
+TF_ASSIGNMENT = re.compile(r"^\s*([A-Za-z_][\w-]*)\s*=", re.MULTILINE)
+
+YAML_KIND = re.compile(r"^kind:\s*[\"']?(\w+)", re.MULTILINE)
+YAML_NAME = re.compile(r"^metadata:\s*\n(?:\s+.*\n)*?\s+name:\s*[\"']?([\w.-]+)", re.MULTILINE)
+YAML_IMAGE = re.compile(r"^\s*-?\s*image:\s*[\"']?([^\s\"'#]+)", re.MULTILINE)
+YAML_PORT = re.compile(r"^\s*-?\s*(?:containerPort|targetPort|port):\s*[\"']?(\d+)", re.MULTILINE)
+# Compose port mappings, "8080:80" or - 8080:80
+YAML_PORT_MAPPING = re.compile(r"^\s*-\s*[\"']?((?:[\d.]+:)?\d+:\d+)", re.MULTILINE)
+# Environment keys are upper case by convention: LOG_LEVEL: info, - name: LOG_LEVEL, - LOG_LEVEL=info
+YAML_ENV = re.compile(r"^\s*-?\s*(?:name:\s*)?[\"']?([A-Z][A-Z0-9_]+)[\"']?\s*(?::|=|$)", re.MULTILINE)
+
+_memo: "OrderedDict[bytes, Facts]" = OrderedDict()
+_lock = threading.Lock()
+
+def _unique(items) -> List[str]:
+    return list(dict.fromkeys(item for item in items if item))
+
+def terraform_facts(code: str) -> Facts:
+    """Outputs, resources, variables, modules and data sources of Terraform code."""
+    try:
+        blocks = [(item.type, item.labels) for item in hcl.parse(code) if isinstance(item, hcl.Block)]
+    except hcl.HCLError:
+        blocks = [(kind, tuple(label for label in labels if label)) for kind, *labels in TF_BLOCK.findall(code)]
+    facts: Facts = {"outputs": [], "resources": [], "variables": [], "modules": [], "data": []}
+    for kind, labels in blocks:
+        if kind == "resource" and len(labels) == 2:
+            facts["resources"].append(".".join(labels))
+        elif kind == "data" and len(labels) == 2:
+            facts["data"].append(".".join(labels))
+        elif kind in ("output", "variable", "module") and labels:
+            facts[f"{kind}s"].append(labels[0])
+    return {kind: _unique(items) for kind, items in facts.items()}
+
+def tfvars_facts(code: str) -> Facts:
+    """The variables a tfvars file sets."""
+    try:
+        names = [item.name for item in hcl.parse(code) if isinstance(item, hcl.Attribute)]
+    except hcl.HCLError:
+        names = TF_ASSIGNMENT.findall(code)
+    return {"variables": _unique(names)}
+
+def yaml_facts(code: str) -> Facts:
+    """Objects, images, ports and environment keys of Kubernetes or Compose YAML."""
+    objects = []
+    for document in re.split(r"^---.*$", code, flags=re.MULTILINE):
+        kind = YAML_KIND.search(document)
+        if kind:
+            name = YAML_NAME.search(document)
+            objects.append(f"{kind.group(1)}/{name.group(1)}" if name else kind.group(1))
+    return {
+        "objects": _unique(objects),
+        "images": _unique(YAML_IMAGE.findall(code)),
+        "ports": _unique(YAML_PORT.findall(code) + YAML_PORT_MAPPING.findall(code)),
+        "env": _unique(YAML_ENV.findall(code)),
+    }
+
+def dockerfile_facts(code: str) -> Facts:
+    """Base images, exposed ports and environment keys of a Dockerfile."""
+    facts: Facts = {"images": [], "ports": [], "env": []}
+    for _, instruction, args in dockerfile.instructions(code):
+        instruction = instruction.upper()
+        words = args.split()
+        if instruction == "FROM":
+            image = [word for word in words if not word.startswith("--")]
+            if image:
+                facts["images"].append(image[0])
+        elif instruction == "EXPOSE":
+            facts["ports"] += words
+        elif instruction in ("ENV", "ARG") and words:
+            # ENV KEY=value KEY2=value, or the legacy ENV KEY value
+            keys = [word.split("=", 1)[0] for word in words if "=" in word] or words[:1]
+            facts["env"] += keys
+    return {kind: _unique(items) for kind, items in facts.items()}
+
+EXTRACTORS = {
+    "terraform": terraform_facts,
+    "hcl": tfvars_facts,
+    "yaml": yaml_facts,
+    "dockerfile": dockerfile_facts,
+}
+
+def _extract(code: str, language: str) -> Facts:
+    facts: Facts = {}
+    for info, block, _ in extract_blocks(code):
+        extractor = EXTRACTORS.get(block_language(info, language))
+        if extractor is None:
+            continue
+        for kind, items in extractor(block).items():
+            facts[kind] = _unique(facts.get(kind, []) + items)
+    return facts
+
+def artifact_facts(code: str, language: str) -> Facts:
+    """The facts of one artifact, cached by its content hash."""
+    language = normalize_language(language)
+    key = hashlib.sha256(f"{language}\0{code}".encode()).digest()
+    with _lock:
+        facts = _memo.get(key)
+        if facts is not None:
+            _memo.move_to_end(key)
+            return facts
+    facts = _extract(code, language)
+    with _lock:
+        _memo[key] = facts
+        while len(_memo) > CACHE_SIZE:
+            _memo.popitem(last=False)
+    return facts
+
+def context_tokens(requested: Optional[int] = None) -> int:
+    """The context budget: ``requested``, else ``AIIAC_CONTEXT_TOKENS`` or the default."""
+    if requested:
+        return requested
+    return int(os.environ.get("AIIAC_CONTEXT_TOKENS") or DEFAULT_CONTEXT_TOKENS)
+
+def pack_context(templates: Sequence, budget: int) -> str:
+    """Describe upstream templates and their facts in about ``budget`` tokens.
+
+    Every template keeps its one-line description; facts are added kind by
+    kind (outputs first), a kind from each template in turn, while they fit.
+    """
+    templates = [template for template in templates if template is not None]
+    if not templates:
+        return "Not provided"
+
+    sections: List[Tuple[str, Facts, Dict[str, List[str]]]] = []
+    used = 0
+    for template in templates:
+        sections.append((template.description, artifact_facts(template.code, template.language), {}))
+        used += count_tokens(template.description)
+
+    for kind in FACT_ORDER:
+        for _, facts, packed in sections:
+            items = facts.get(kind)
+            if not items:
+                continue
+            cost = count_tokens(f"\n- {kind}: ")
+            for item in items:
+                cost += count_tokens(f"{item}, ")
+                if used + cost > budget:
+                    break
+                packed.setdefault(kind, []).append(item)
+            if kind in packed:
+                used += count_tokens(f"\n- {kind}: " + ", ".join(packed[kind]))
+
+    lines = []
+    for description, facts, packed in sections:
+        lines.append(description)
+        for kind, items in packed.items():
+            left = len(facts[kind]) - len(items)
+            lines.append(f"- {kind}: {', '.join(items)}" + (f" (+{left} more)" if left else ""))
+    return "\n".join(lines)
+
+def clear_cache() -> None:
+    with _lock:
+        _memo.clear()
\ No newline at end of file
@@ -1,10 +1,18 @@
 from typing import Dict
-from .base import BaseGenerator
+from .base import BaseGenerator, UnsupportedTemplateError
 from ..models.schemas import IaCTemplate, GeneratorResponse
 
 class IaCGenerator(BaseGenerator):
     """Infrastructure as Code generator."""
     
+    ARTIFACT = "IaC"
+    NAME = "iac"
+    TEMPLATE_OPTION = "template_type"
+    DEFAULT_TEMPLATE = "terraform"
+    
+    FENCED = {"terraform": "hcl"}
+    NUM_PREDICT = {"terraform": 2048}
+    
     TEMPLATES = {
         "terraform": """
         Generate Terraform code for the following infrastructure:
@@ -23,47 +31,36 @@ class IaCGenerator(BaseGenerator):
         """,
     }
     
-    def generate(self, prompt: str, **kwargs) -> GeneratorResponse:
-        """Generate infrastructure code."""
+    def _build_prompt(self, prompt: str, **kwargs) -> str:
+        """Fill in the IaC template for the request."""
+        template_type = kwargs.get("template_type", "terraform")
+        template = self.PROMPTS.get(template_type)
+        if not template:
+            raise UnsupportedTemplateError(f"Template type {template_type} not supported")
+        
+        return self._prepare_prompt(
+            template,
+            requirements=prompt,
+            provider=kwargs.get("provider", "aws"),
+            resource_type=kwargs.get("resource_type", "general")
+        )
+    
+    def _build_response(self, code: str, **kwargs) -> GeneratorResponse:
+        """Wrap generated infrastructure code in a response."""
         template_type = kwargs.get("template_type", "terraform")
         provider = kwargs.get("provider", "aws")
         
-        template = self.TEMPLATES.get(template_type)
-        if not template:
-            return GeneratorResponse(
-                success=False,
-                message=f"Template type {template_type} not supported",
-                templates=[]
-            )
+        template = IaCTemplate(
+            code=code,
+            language=template_type,
+            description=f"Generated {template_type} code for {provider}",
+            type="iac",
+            provider=provider,
+            resource_type=kwargs.get("resource_type", "general")
+        )
         
-        try:
-            formatted_prompt = self._prepare_prompt(
-                template,
-                requirements=prompt,
-                provider=provider,
-                resource_type=kwargs.get("resource_type", "general")
-            )
-            
-            response = self.llm(formatted_prompt)
-            
-            template = IaCTemplate(
-                code=response,
-                language=template_type,
-                description=f"Generated {template_type} code for {provider}",
-                type="iac",
-                provider=provider,
-                resource_type=kwargs.get("resource_type", "general")
-            )
-            
-            return GeneratorResponse(
-                success=True,
-                message="Successfully generated IaC",
-                templates=[template]
-            )
-            
-        except Exception as e:
-            return GeneratorResponse(
-                success=False,
-                message=f"Error generating IaC: {str(e)}",
-                templates=[]
-            )
\ No newline at end of file
+        return GeneratorResponse(
+            success=True,
+            message="Successfully generated IaC",
+            templates=[template]
+        )
\ No newline at end of file
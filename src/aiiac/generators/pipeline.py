@@ -1,10 +1,19 @@
 from typing import Optional, List
-from .base import BaseGenerator
+from .base import BaseGenerator, UnsupportedTemplateError
+from .context import context_tokens, pack_context
 from ..models.schemas import PipelineTemplate, GeneratorResponse, IaCTemplate, ConfigTemplate
 
 class PipelineGenerator(BaseGenerator):
     """CI/CD Pipeline generator."""
     
+    ARTIFACT = "pipeline"
+    NAME = "pipeline"
+    TEMPLATE_OPTION = "platform"
+    DEFAULT_TEMPLATE = "github"
+    
+    FENCED = {"github": "yaml", "gitlab": "yaml", "jenkins": "groovy"}
+    NUM_PREDICT = {"github": 1024, "gitlab": 1024, "jenkins": 1024}
+    
     TEMPLATES = {
         "github": """
         Generate GitHub Actions workflow for:
@@ -52,57 +61,60 @@ class PipelineGenerator(BaseGenerator):
         """
     }
     
-    def generate(
+    def _build_prompt(
         self,
         prompt: str,
         iac_template: Optional[IaCTemplate] = None,
         config_template: Optional[ConfigTemplate] = None,
+        config_templates: Optional[List[ConfigTemplate]] = None,
         **kwargs
-    ) -> GeneratorResponse:
-        """Generate CI/CD pipeline."""
-        platform = kwargs.get("platform", "github")
+    ) -> str:
+        """Fill in the pipeline template for the request.
         
-        template = self.TEMPLATES.get(platform)
+        Several upstream configurations can be passed as ``config_templates``.
+        The facts of the IaC, and of the configurations, are packed into
+        ``context_tokens`` tokens each.
+        """
+        platform = kwargs.get("platform", "github")
+        template = self.PROMPTS.get(platform)
         if not template:
-            return GeneratorResponse(
-                success=False,
-                message=f"Pipeline platform {platform} not supported",
-                templates=[]
-            )
+            raise UnsupportedTemplateError(f"Pipeline platform {platform} not supported")
         
-        try:
-            formatted_prompt = self._prepare_prompt(
-                template,
-                requirements=prompt,
-                iac_description=iac_template.description if iac_template else "Not provided",
-                config_description=config_template.description if config_template else "Not provided"
-            )
-            
-            response = self.llm(formatted_prompt)
-            
-            stages = self._extract_stages(response)
-            
-            template = PipelineTemplate(
-                code=response,
-                language=self._get_language(platform),
-                description=f"Generated {platform} pipeline",
-                type="pipeline",
-                platform=platform,
-                stages=stages
-            )
-            
-            return GeneratorResponse(
-                success=True,
-                message="Successfully generated pipeline",
-                templates=[template]
-            )
-            
-        except Exception as e:
-            return GeneratorResponse(
-                success=False,
-                message=f"Error generating pipeline: {str(e)}",
-                templates=[]
-            )
+        budget = context_tokens(kwargs.get("context_tokens"))
+        return self._prepare_prompt(
+            template,
+            requirements=prompt,
+            iac_description=pack_context([iac_template], budget),
+            config_description=self._describe_configs(config_template, config_templates, budget)
+        )
+    
+    def _build_response(self, code: str, **kwargs) -> GeneratorResponse:
+        """Wrap a generated pipeline in a response."""
+        platform = kwargs.get("platform", "github")
+        
+        template = PipelineTemplate(
+            code=code,
+            language=self._get_language(platform),
+            description=f"Generated {platform} pipeline",
+            type="pipeline",
+            platform=platform,
+            stages=self._extract_stages(code)
+        )
+        
+        return GeneratorResponse(
+            success=True,
+            message="Successfully generated pipeline",
+            templates=[template]
+        )
+    
+    def _describe_configs(
+        self,
+        config_template: Optional[ConfigTemplate],
+        config_templates: Optional[List[ConfigTemplate]],
+        budget: int
+    ) -> str:
+        """Describe the upstream configurations for the prompt."""
+        return pack_context([config_template, *(config_templates or [])], budget)
     
     def _get_language(self, platform: str) -> str:
         """Get language for pipeline platform."""
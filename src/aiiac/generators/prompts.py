@@ -0,0 +1,113 @@
+"""Prompt templates, compiled once per generator class.
+
+The templates are written as indented triple-quoted strings in the
+generator classes, and every padding space reaches the model as prompt
+tokens it has to evaluate. Compiling a template dedents it, strips
+trailing whitespace, collapses runs of blank lines and drops the leading
+and trailing ones. It also splits the text into literal parts and fields
+once, so filling it in is a join rather than a fresh ``str.format`` parse,
+and estimates its size in tokens.
+
+A token cap, per template (``PROMPT_MAX_TOKENS`` on the generator) or for
+all of them (``AIIAC_PROMPT_MAX_TOKENS``), fails a generation whose
+filled-in prompt grew past it, e.g. from long requirements, before the
+model spends time on it.
+"""
+import math
+import os
+import re
+import textwrap
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+# Words, single punctuation marks and runs of whitespace
+_PIECE = re.compile(r"\w+|[^\w\s]|\s+")
+# Characters per token for words and whitespace, roughly what the BPE and
+# SentencePiece vocabularies of code models average
+CHARS_PER_TOKEN = 4
+
+_max_tokens: Optional[int] = None
+_configured = False
+
+class PromptTooLongError(ValueError):
+    """Raised when a filled-in prompt is over its token cap."""
+
+def count_tokens(text: str) -> int:
+    """Estimate the prompt tokens of a text without the model's tokenizer.
+
+    A word costs one token per ``CHARS_PER_TOKEN`` characters, punctuation
+    one each; a single space joins the next word for free, as in the
+    tokenizers, while longer runs of whitespace cost like words.
+    """
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        if piece.isspace():
+            if piece != " ":
+                tokens += math.ceil(len(piece) / CHARS_PER_TOKEN)
+        elif piece[0].isalnum() or piece[0] == "_":
+            tokens += math.ceil(len(piece) / CHARS_PER_TOKEN)
+        else:
+            tokens += 1
+    return tokens
+
+def normalize(source: str) -> str:
+    """Dedent a template and squeeze out whitespace the model would pay for."""
+    lines = [line.rstrip() for line in textwrap.dedent(source).split("\n")]
+    kept: List[str] = []
+    for line in lines:
+        if line or (kept and kept[-1]):
+            kept.append(line)
+    while kept and not kept[-1]:
+        kept.pop()
+    return "\n".join(kept) + "\n"
+
+class Prompt:
+    """A compiled template: normalized text, its fields and token estimate."""
+
+    __slots__ = ("name", "source", "text", "fields", "tokens", "source_tokens", "_parts")
+
+    def __init__(self, source: str, name: str = ""):
+        self.name = name
+        self.source = source
+        self.text = normalize(source)
+        self._parts: List[Tuple[str, Optional[str], str]] = [
+            (literal, field, spec or "")
+            for literal, field, spec, _ in Formatter().parse(self.text)
+        ]
+        self.fields = tuple(dict.fromkeys(field for _, field, _ in self._parts if field))
+        # The fields' own text is not counted; it is filled in per request
+        self.tokens = count_tokens("".join(literal for literal, _, _ in self._parts))
+        self.source_tokens = count_tokens(source)
+
+    def render(self, **values) -> str:
+        """Fill in the fields, like ``str.format`` on the normalized text."""
+        out = []
+        for literal, field, spec in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return "".join(out)
+
+def compile_templates(templates: Dict[str, str], prefix: str = "") -> Dict[str, Prompt]:
+    """Compile a generator's ``TEMPLATES``, naming each ``prefix/type``."""
+    return {name: Prompt(source, f"{prefix}/{name}" if prefix else name) for name, source in templates.items()}
+
+def configure_prompts(max_tokens: Optional[int]) -> None:
+    """Cap every filled-in prompt at ``max_tokens``, or lift the cap with None."""
+    global _max_tokens, _configured
+    if max_tokens is not None and max_tokens < 1:
+        raise ValueError("Prompt token cap must be at least 1")
+    _max_tokens, _configured = max_tokens, True
+
+def prompt_max_tokens() -> Optional[int]:
+    """The process-wide prompt token cap, from ``AIIAC_PROMPT_MAX_TOKENS`` unless configured."""
+    if not _configured:
+        value = os.environ.get("AIIAC_PROMPT_MAX_TOKENS")
+        configure_prompts(int(value) if value else None)
+    return _max_tokens
+
+def check_budget(text: str, name: str, cap: int) -> None:
+    """Raise ``PromptTooLongError`` if the prompt ``name`` is over ``cap`` tokens."""
+    tokens = count_tokens(text)
+    if tokens > cap:
+        raise PromptTooLongError(f"Prompt for {name} is about {tokens} tokens, over its cap of {cap}")
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Repairing code that failed validation, region by region.
+
+Regenerating a whole artifact because one line does not parse costs as
+much as the first generation, most of a minute for a large Terraform
+file. The checkers report every problem on a line (the HCL and YAML
+parsers, Python's ``compile``), so instead the lines around the first
+failing one are sent to the model with the error messages, and its answer
+replaces them. The artifact is validated again, and repaired again if
+need be, for up to ``AIIAC_REPAIR_ROUNDS`` rounds (``repair`` per request,
+0 turning repair off).
+"""
+import os
+from typing import List, NamedTuple, Optional, Sequence
+from ..validation.engine import Issue, block_language, extract_blocks
+from .prompts import Prompt, count_tokens
+
+DEFAULT_ROUNDS = 2
+# Lines of context kept on each side of a failing line
+CONTEXT_LINES = 5
+
+REPAIR_TEMPLATE = """
+    The {language} code below is lines {start}-{end} of a larger file, and fails validation:
+    {errors}
+
+    Fix it, changing as little as possible and keeping the indentation. Reply with the
+    corrected lines only, in a single ```{fence} block.
+
+    ```{fence}
+    {region}
+    ```
+    """
+
+REPAIR_PROMPT = Prompt(REPAIR_TEMPLATE, "repair")
+
+class Region(NamedTuple):
+    """Lines ``start`` to ``end`` (1-based, inclusive), their language and problems."""
+    start: int
+    end: int
+    language: str
+    errors: Sequence[Issue]
+
+def repair_rounds(requested: Optional[int] = None) -> int:
+    """Repair rounds: ``requested``, else ``AIIAC_REPAIR_ROUNDS`` or the default."""
+    if requested is not None:
+        return requested
+    return int(os.environ.get("AIIAC_REPAIR_ROUNDS") or DEFAULT_ROUNDS)
+
+def failing_region(
+    code: str,
+    errors: Sequence[Issue],
+    language: str,
+    context: int = CONTEXT_LINES
+) -> Optional[Region]:
+    """The lines around the first failing one, within its fenced block.
+
+    Later errors close enough to share context are taken along, so one
+    request fixes them together.
+    """
+    if not errors:
+        return None
+    errors = sorted(errors)
+    first = errors[0].line
+    lines = code.split("\n")
+    low, high = 1, len(lines)
+    for info, block, first_line in extract_blocks(code):
+        last_line = first_line + block.count("\n")
+        if first_line <= first <= last_line:
+            low, high = first_line, last_line
+            language = block_language(info, language)
+            break
+    start, end = max(first - context, low), min(first + context, high)
+    taken = []
+    for issue in errors:
+        if issue.line > end + context:
+            break
+        taken.append(issue)
+        end = min(max(end, issue.line + context), high)
+    return Region(start, end, language, tuple(taken))
+
+def repair_prompt(code: str, region: Region) -> str:
+    """Ask for the region's lines back, fixed."""
+    lines = code.split("\n")[region.start - 1:region.end]
+    return REPAIR_PROMPT.render(
+        language=region.language,
+        start=region.start,
+        end=region.end,
+        errors="\n".join(f"- {issue}" for issue in region.errors),
+        fence=region.language,
+        region="\n".join(lines)
+    )
+
+def extract_fix(reply: str) -> str:
+    """The corrected lines of a reply, fenced or not."""
+    _, fix, _ = extract_blocks(reply)[0]
+    return fix.strip("\n")
+
+def splice(code: str, region: Region, fix: str) -> str:
+    """Put the corrected lines in place of the region's."""
+    lines: List[str] = code.split("\n")
+    lines[region.start - 1:region.end] = fix.split("\n")
+    return "\n".join(lines)
+
+def repair_budget(code: str, region: Region) -> int:
+    """Output tokens for a fixed region: room for the lines and a few more."""
+    lines = "\n".join(code.split("\n")[region.start - 1:region.end])
+    return 2 * count_tokens(lines) + 64
\ No newline at end of file
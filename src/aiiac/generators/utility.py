@@ -1,10 +1,19 @@
 from typing import List
-from .base import BaseGenerator
+from .base import BaseGenerator, UnsupportedTemplateError
 from ..models.schemas import CodeTemplate, GeneratorResponse
 
 class UtilityGenerator(BaseGenerator):
     """Utility code generator."""
     
+    ARTIFACT = "utility"
+    NAME = "util"
+    TEMPLATE_OPTION = "utility_type"
+    DEFAULT_TEMPLATE = "network_scanner"
+    
+    # kubectl and MongoDB answers explain the commands around the code
+    FENCED = {"network_scanner": "python"}
+    NUM_PREDICT = {"network_scanner": 1536, "kubectl": 384, "mongo_query": 512}
+    
     TEMPLATES = {
         "network_scanner": """
         Generate a Python network scanner that:
@@ -41,45 +50,34 @@ class UtilityGenerator(BaseGenerator):
         """
     }
     
-    def generate(self, prompt: str, **kwargs) -> GeneratorResponse:
-        """Generate utility code."""
+    def _build_prompt(self, prompt: str, **kwargs) -> str:
+        """Fill in the utility template for the request."""
         utility_type = kwargs.get("utility_type", "network_scanner")
-        
-        template = self.TEMPLATES.get(utility_type)
+        template = self.PROMPTS.get(utility_type)
         if not template:
-            return GeneratorResponse(
-                success=False,
-                message=f"Utility type {utility_type} not supported",
-                templates=[]
-            )
+            raise UnsupportedTemplateError(f"Utility type {utility_type} not supported")
+        
+        return self._prepare_prompt(
+            template,
+            requirements=prompt
+        )
+    
+    def _build_response(self, code: str, **kwargs) -> GeneratorResponse:
+        """Wrap generated utility code in a response."""
+        utility_type = kwargs.get("utility_type", "network_scanner")
+        
+        template = CodeTemplate(
+            code=code,
+            language=self._get_language(utility_type),
+            description=f"Generated {utility_type} utility",
+            type="utility"
+        )
         
-        try:
-            formatted_prompt = self._prepare_prompt(
-                template,
-                requirements=prompt
-            )
-            
-            response = self.llm(formatted_prompt)
-            
-            template = CodeTemplate(
-                code=response,
-                language=self._get_language(utility_type),
-                description=f"Generated {utility_type} utility",
-                type="utility"
-            )
-            
-            return GeneratorResponse(
-                success=True,
-                message="Successfully generated utility",
-                templates=[template]
-            )
-            
-        except Exception as e:
-            return GeneratorResponse(
-                success=False,
-                message=f"Error generating utility: {str(e)}",
-                templates=[]
-            )
+        return GeneratorResponse(
+            success=True,
+            message="Successfully generated utility",
+            templates=[template]
+        )
     
     def _get_language(self, utility_type: str) -> str:
         """Get language for utility type."""
@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
+from ..core.resilience import DEFAULT_TIMEOUT
+
+# Best-of-N samples one request may ask for; they all run inside its one slot
+MAX_SAMPLES = 8
 
 class CodeTemplate(BaseModel):
     """Base template for generated code."""
@@ -28,4 +32,30 @@ class GeneratorResponse(BaseModel):
     success: bool
     message: str
     templates: List[CodeTemplate] = []
-    metadata: Dict = Field(default_factory=dict)
\ No newline at end of file
+    metadata: Dict = Field(default_factory=dict)
+
+class GenerateRequest(BaseModel):
+    """A generation request, as sent to the HTTP API."""
+    prompt: str = Field(..., description="Generation request")
+    provider: Optional[str] = Field(None, description="Cloud provider")
+    type: Optional[str] = Field(None, description="Template, configuration, platform or utility type")
+    env: Optional[str] = Field(None, description="Target environment")
+    model: str = Field("codellama", description="Model name")
+    num_predict: Optional[int] = Field(None, description="Output token budget (default: per template)")
+    temperature: Optional[float] = Field(None, description="Sampling temperature")
+    stop: Optional[List[str]] = Field(None, description="Stop sequences (default: per template)")
+    use_cache: Optional[bool] = Field(None, description="Reuse cached responses (default: on)")
+    refresh: Optional[bool] = Field(None, description="Regenerate and overwrite the cached response")
+    timeout: Optional[float] = Field(
+        None, gt=0, le=DEFAULT_TIMEOUT, description="Seconds the generation may take, retries included"
+    )
+    samples: Optional[int] = Field(
+        None, ge=1, le=MAX_SAMPLES, description="Samples generated at once; the first valid one is returned"
+    )
+    repair: Optional[int] = Field(None, ge=0, description="Rounds of targeted repair when validation fails (default: 2)")
+
+class BatchJob(GenerateRequest):
+    """Single generation job from a batch manifest."""
+    id: Optional[str] = Field(None, description="Job identifier")
+    generator: str = Field(..., description="Generator name: iac, config, pipeline or util")
+    output: Optional[str] = Field(None, description="Output directory")
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""Manifest-driven bulk generation.
+
+A manifest lists generation jobs in YAML (a list, or a mapping with a
+``jobs`` list) or JSONL (one job per line). Jobs run on one event loop with
+bounded concurrency and each finished job is reported as soon as it is done,
+so one slow or failing job never holds up the rest. Large batches validate
+their output in a process pool, off the event loop.
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional
+import yaml
+from .. import registry
+from ..core.client import get_generator
+from ..models.schemas import BatchJob, GenerateRequest
+from ..utils.output import save_templates
+from ..validation.engine import POOL_THRESHOLD, avalidate, get_pool, summarize
+
+def load_manifest(path: str) -> List[Dict]:
+    """Read the raw job entries from a YAML or JSONL manifest."""
+    text = Path(path).read_text()
+    if path.endswith(".jsonl"):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    data = yaml.safe_load(text) or []
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    if not isinstance(data, list):
+        raise ValueError("Manifest must be a list of jobs or a mapping with a 'jobs' list")
+    return data
+
+def job_kwargs(job: BatchJob) -> Dict:
+    """Map manifest fields onto the generator's keyword arguments."""
+    return request_kwargs(job.generator, job)
+
+def request_kwargs(generator: str, job: GenerateRequest) -> Dict:
+    """Map a request's fields onto the named generator's keyword arguments."""
+    generator = registry.resolve(generator)
+    if generator == "iac":
+        kwargs = {"provider": job.provider, "template_type": job.type}
+    elif generator == "config":
+        kwargs = {"config_type": job.type, "environment": job.env}
+    elif generator == "pipeline":
+        kwargs = {"platform": job.type}
+    else:
+        kwargs = {"utility_type": job.type}
+    kwargs.update(
+        num_predict=job.num_predict,
+        temperature=job.temperature,
+        stop=job.stop,
+        use_cache=job.use_cache,
+        refresh=job.refresh,
+        timeout=job.timeout,
+        samples=job.samples,
+        repair=job.repair
+    )
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+async def run_job(
+    index: int,
+    entry: Dict,
+    semaphore: asyncio.Semaphore,
+    pool: Optional[Executor] = None,
+    **options
+) -> Dict:
+    """Run one manifest entry and describe the outcome.
+
+    Output is validated after the job leaves the semaphore, in ``pool``
+    when one is given; output that fails is then repaired under the
+    semaphore again.
+    """
+    submitted = time.monotonic()
+    record = {
+        "id": str(entry.get("id") or index) if isinstance(entry, dict) else str(index),
+        "success": False,
+        "queued": 0.0,
+        "elapsed": 0.0
+    }
+
+    try:
+        job = BatchJob(**entry)
+        try:
+            generator_class = registry.load_generator(job.generator)
+        except KeyError:
+            raise ValueError(f"Generator {job.generator} not supported")
+        record["generator"] = job.generator
+
+        generator = get_generator(generator_class, job.model)
+        # A job's own settings win over the batch-wide ones
+        kwargs = {**options, **job_kwargs(job)}
+        async with semaphore:
+            started = time.monotonic()
+            result = await generator.agenerate(job.prompt, validate=False, **kwargs)
+            record["queued"] = round(started - submitted, 3)
+            record["elapsed"] = round(time.monotonic() - started, 3)
+
+        if result.success:
+            results = [await avalidate(t.code, t.language, pool) for t in result.templates]
+            result.metadata.update(summarize(results))
+            if result.metadata["valid"]:
+                result = await generator.arepair(job.prompt, result, **kwargs)
+            else:
+                # Repairs are model requests, so they wait their turn too
+                async with semaphore:
+                    result = await generator.arepair(job.prompt, result, **kwargs)
+        record.update(
+            success=result.success,
+            message=result.message,
+            valid=result.metadata.get("valid"),
+            metadata=result.metadata
+        )
+        if result.success and job.output:
+            record["files"] = [str(p) for p in save_templates(result.templates, job.output)]
+    except Exception as e:
+        record["message"] = str(e)
+
+    return record
+
+async def run_batch(
+    entries: List[Dict],
+    concurrency: int = 4,
+    on_result: Optional[Callable[[Dict], None]] = None,
+    validate_workers: Optional[int] = None,
+    **options
+) -> List[Dict]:
+    """Run manifest entries with at most ``concurrency`` in flight.
+
+    ``on_result`` is called with each job's record in completion order;
+    extra options (such as ``use_cache``) are passed to every generation.
+    Output is validated in a process pool of ``validate_workers`` when the
+    batch is large enough to pay for one; ``1`` validates inline.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    pool = None
+    if validate_workers != 1 and len(entries) >= POOL_THRESHOLD:
+        pool = get_pool(validate_workers)
+    tasks = [
+        asyncio.create_task(run_job(index, entry, semaphore, pool, **options))
+        for index, entry in enumerate(entries, 1)
+    ]
+
+    records = []
+    for task in asyncio.as_completed(tasks):
+        record = await task
+        if on_result:
+            on_result(record)
+        records.append(record)
+    return records
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""Durable job queue for generations.
+
+Jobs are stored in SQLite, so they survive restarts and any number of
+``aiiac worker`` processes on one host can share the same queue file. A
+worker leases the highest-priority job that is ready, keeps the lease alive
+while it generates, and stores the ``GeneratorResponse``. A job whose
+worker dies is leased again once its lease expires; failed generations are
+retried with exponential backoff. Jobs that used up their attempts are
+moved to the ``dead`` state, where they stay until requeued.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+from .. import registry
+from ..core.client import aclose, get_generator
+from ..models.schemas import BatchJob, GenerateRequest, GeneratorResponse
+from .batch import job_kwargs
+
+DEFAULT_QUEUE_PATH = Path.home() / ".local" / "share" / "aiiac" / "jobs.sqlite"
+DEFAULT_LEASE = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+
+# queued -> running -> done, or back to queued for a retry, or dead
+STATES = ("queued", "running", "done", "dead")
+
+COLUMNS = (
+    "id", "generator", "request", "priority", "status", "attempts", "max_attempts",
+    "available", "lease_owner", "lease_expires", "submitted", "started", "finished", "error", "result"
+)
+
+class JobQueue:
+    """SQLite-backed queue of generation jobs with leases and retries."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                generator TEXT NOT NULL,
+                request TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                available REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                submitted REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                error TEXT,
+                result TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, submitted)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so two workers never lease the same job
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def submit(
+        self,
+        generator: str,
+        request: GenerateRequest,
+        priority: int = 0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> str:
+        """Enqueue a job and return its ID; higher priorities run first."""
+        generator = registry.resolve(generator)
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, generator, request, priority, status, attempts, max_attempts, available, submitted)"
+                " VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?)",
+                (job_id, generator, request.model_dump_json(exclude_none=True), priority, max_attempts, now, now)
+            )
+        return job_id
+
+    def lease(self, owner: str, lease: float = DEFAULT_LEASE) -> Optional[Dict]:
+        """Take the next ready job for ``owner`` for ``lease`` seconds, if any."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND available <= ?"
+                " ORDER BY priority DESC, submitted LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_expires = ?,"
+                " started = ? WHERE id = ?",
+                (owner, now + lease, now, row[0])
+            )
+            return self._get(conn, row[0])
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        """Take back jobs whose worker stopped renewing its lease."""
+        conn.execute(
+            "UPDATE jobs SET status = 'dead', finished = ?, lease_owner = NULL,"
+            " error = 'Lease expired on the last attempt'"
+            " WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', available = ?, lease_owner = NULL, error = 'Lease expired'"
+            " WHERE status = 'running' AND lease_expires < ?",
+            (now, now)
+        )
+
+    def renew(self, job_id: str, owner: str, lease: float = DEFAULT_LEASE) -> bool:
+        """Extend a lease; False once the job is no longer ``owner``'s."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + lease, job_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def finish(self, job_id: str, owner: str, response: GeneratorResponse) -> str:
+        """Store a job's response and return its new state.
+
+        A failed generation is retried after a growing delay until the job
+        runs out of attempts, when it is dead-lettered.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (job_id, owner)
+            ).fetchone()
+            if row is None:
+                # The lease expired and the job moved on without us
+                return self._get(conn, job_id)["status"]
+            attempts, max_attempts = row
+            if response.success:
+                status, available, error = "done", now, None
+            else:
+                status = "dead" if attempts >= max_attempts else "queued"
+                available = now + min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                error = response.message
+            conn.execute(
+                "UPDATE jobs SET status = ?, available = ?, lease_owner = NULL, lease_expires = NULL,"
+                " finished = ?, error = ?, result = ? WHERE id = ?",
+                (status, available, now if status != "queued" else None, error,
+                 response.model_dump_json(serialize_as_any=True), job_id)
+            )
+            return status
+
+    def requeue(self, job_id: str) -> bool:
+        """Give a dead job a fresh set of attempts, forgetting its last error."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, available = ?, finished = NULL, error = NULL"
+                " WHERE id = ? AND status = 'dead'",
+                (time.time(), job_id)
+            )
+            return cursor.rowcount == 1
+
+    def _get(self, conn: sqlite3.Connection, job_id: str) -> Optional[Dict]:
+        row = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(COLUMNS, row))
+        job["request"] = json.loads(job["request"])
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """A job's state, without its result."""
+        with self._lock:
+            job = self._get(self._conn, job_id)
+        if job is not None:
+            job.pop("result")
+        return job
+
+    def result(self, job_id: str) -> Optional[GeneratorResponse]:
+        """The stored response of a job's last attempt."""
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return GeneratorResponse.model_validate_json(row[0])
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {**dict.fromkeys(STATES, 0), **dict(rows)}
+
+    def jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """The most recently submitted jobs, optionally in one state."""
+        query = f"SELECT id FROM jobs {'WHERE status = ?' if status else ''} ORDER BY submitted DESC LIMIT ?"
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(query, (status, limit) if status else (limit,))]
+        return [self.get(job_id) for job_id in ids]
+
+    def close(self) -> None:
+        self._conn.close()
+
+def default_queue_path() -> Path:
+    return Path(os.environ.get("AIIAC_QUEUE", DEFAULT_QUEUE_PATH))
+
+async def run_job(queue: JobQueue, job: Dict, owner: str, lease: float) -> str:
+    """Generate one leased job, renewing its lease until it is stored."""
+    async def keep_leased():
+        while True:
+            await asyncio.sleep(lease / 3)
+            if not await asyncio.to_thread(queue.renew, job["id"], owner, lease):
+                return
+
+    renewing = asyncio.create_task(keep_leased())
+    try:
+        request = BatchJob(generator=job["generator"], **job["request"])
+        generator = get_generator(registry.load_generator(request.generator), request.model)
+        response = await generator.agenerate(request.prompt, **job_kwargs(request))
+    except Exception as e:
+        response = GeneratorResponse(success=False, message=str(e))
+    finally:
+        renewing.cancel()
+    return await asyncio.to_thread(queue.finish, job["id"], owner, response)
+
+async def run_workers(
+    queue: JobQueue,
+    concurrency: int = 4,
+    lease: float = DEFAULT_LEASE,
+    poll_interval: float = 1.0,
+    drain: bool = False,
+    stop: Optional[asyncio.Event] = None,
+    on_finish: Optional[Callable[[Dict, str], None]] = None
+) -> int:
+    """Run ``concurrency`` workers until ``stop`` is set; returns the jobs run.
+
+    With ``drain`` the workers also stop once no job is queued or running,
+    retries included. Jobs in progress are always finished before returning.
+    """
+    stop = stop or asyncio.Event()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    finished = 0
+
+    async def worker(number: int):
+        nonlocal finished
+        while not stop.is_set():
+            job = await asyncio.to_thread(queue.lease, f"{owner}/{number}", lease)
+            if job is None:
+                counts = await asyncio.to_thread(queue.counts)
+                if drain and not counts["queued"] and not counts["running"]:
+                    return
+                try:
+                    await asyncio.wait_for(stop.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            status = await run_job(queue, job, f"{owner}/{number}", lease)
+            finished += 1
+            if on_finish:
+                on_finish(job, status)
+
+    try:
+        await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    finally:
+        await aclose()
+    return finished
\ No newline at end of file
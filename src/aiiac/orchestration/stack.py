@@ -0,0 +1,202 @@
+"""Full-stack generation: IaC, then configurations, then a pipeline.
+
+Each generation is a node in a DAG and starts the moment the nodes it depends
+on have finished, so independent configurations run side by side and the
+whole stack takes as long as its critical path rather than the sum of its
+steps.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from ..core.client import aclose, get_generator
+from ..generators.config import ConfigGenerator
+from ..generators.iac import IaCGenerator
+from ..generators.pipeline import PipelineGenerator
+from ..models.schemas import GeneratorResponse
+
+class StackNode:
+    """One generation in a stack DAG.
+
+    ``bind`` receives the responses of the node's dependencies and returns
+    extra keyword arguments for its generator, such as upstream templates.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        generator_class: type,
+        prompt: str,
+        kwargs: Optional[Dict] = None,
+        depends_on: Sequence[str] = (),
+        bind: Optional[Callable[[Dict[str, GeneratorResponse]], Dict]] = None
+    ):
+        self.name = name
+        self.generator_class = generator_class
+        self.prompt = prompt
+        self.kwargs = kwargs or {}
+        self.depends_on = tuple(depends_on)
+        self.bind = bind
+
+def _first_template(response: GeneratorResponse):
+    return response.templates[0] if response.templates else None
+
+def build_stack(
+    prompt: str,
+    provider: str = "aws",
+    iac_type: str = "terraform",
+    config_types: Iterable[str] = ("kubernetes",),
+    environment: str = "development",
+    platform: str = "github"
+) -> List[StackNode]:
+    """Build the IaC -> configurations -> pipeline DAG for a request."""
+    nodes = [StackNode("iac", IaCGenerator, prompt, {"provider": provider, "template_type": iac_type})]
+
+    config_names = []
+    for config_type in config_types:
+        name = f"config:{config_type}"
+        config_names.append(name)
+        nodes.append(StackNode(
+            name,
+            ConfigGenerator,
+            prompt,
+            {"config_type": config_type, "environment": environment},
+            depends_on=["iac"],
+            bind=lambda results: {"iac_template": _first_template(results["iac"])}
+        ))
+
+    if platform:
+        nodes.append(StackNode(
+            "pipeline",
+            PipelineGenerator,
+            prompt,
+            {"platform": platform},
+            depends_on=["iac", *config_names],
+            bind=lambda results: {
+                "iac_template": _first_template(results["iac"]),
+                "config_templates": [
+                    _first_template(results[name]) for name in config_names
+                ]
+            }
+        ))
+
+    return nodes
+
+async def run_dag(
+    nodes: List[StackNode],
+    model: str = "codellama",
+    on_node: Optional[Callable[[str, GeneratorResponse, float], None]] = None,
+    **options
+) -> Dict[str, GeneratorResponse]:
+    """Run DAG nodes concurrently, each as soon as its inputs are ready.
+
+    A node whose dependency failed is not generated; it fails with a
+    message naming the dependency. ``on_node`` is called with the name,
+    response and elapsed seconds of every node as it finishes.
+    """
+    by_name = {node.name: node for node in nodes}
+    for node in nodes:
+        missing = [dep for dep in node.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Node {node.name} depends on unknown node {missing[0]}")
+
+    tasks: Dict[str, asyncio.Task] = {}
+    timings: Dict[str, float] = {}
+
+    async def run_node(node: StackNode) -> GeneratorResponse:
+        upstream = {}
+        for dep in node.depends_on:
+            upstream[dep] = await tasks[dep]
+
+        started = time.monotonic()
+        failed = [dep for dep, response in upstream.items() if not response.success]
+        if failed:
+            response = GeneratorResponse(
+                success=False,
+                message=f"Skipped: {failed[0]} failed",
+                templates=[]
+            )
+        else:
+            kwargs = dict(node.kwargs)
+            if node.bind:
+                kwargs.update(node.bind(upstream))
+            generator = get_generator(node.generator_class, model)
+            response = await generator.agenerate(node.prompt, **kwargs, **options)
+
+        timings[node.name] = time.monotonic() - started
+        if on_node:
+            on_node(node.name, response, timings[node.name])
+        return response
+
+    # Create every task before awaiting so a node can wait on any other
+    for node in _topological(nodes, by_name):
+        tasks[node.name] = asyncio.ensure_future(run_node(node))
+    await asyncio.gather(*tasks.values())
+
+    return {name: task.result() for name, task in tasks.items()}
+
+def _topological(nodes: List[StackNode], by_name: Dict[str, StackNode]) -> List[StackNode]:
+    """Order nodes so dependencies come first, rejecting cycles."""
+    ordered, state = [], {}
+
+    def visit(node: StackNode):
+        if state.get(node.name) == "done":
+            return
+        if state.get(node.name) == "visiting":
+            raise ValueError(f"Dependency cycle at node {node.name}")
+        state[node.name] = "visiting"
+        for dep in node.depends_on:
+            visit(by_name[dep])
+        state[node.name] = "done"
+        ordered.append(node)
+
+    for node in nodes:
+        visit(node)
+    return ordered
+
+async def run_stack(
+    prompt: str,
+    model: str = "codellama",
+    on_node: Optional[Callable[[str, GeneratorResponse, float], None]] = None,
+    options: Optional[Dict] = None,
+    **stack_kwargs
+) -> GeneratorResponse:
+    """Generate a full stack and merge it into one response."""
+    started = time.monotonic()
+    timings = {}
+
+    def record(name: str, response: GeneratorResponse, elapsed: float):
+        timings[name] = elapsed
+        if on_node:
+            on_node(name, response, elapsed)
+
+    nodes = build_stack(prompt, **stack_kwargs)
+    results = await run_dag(nodes, model=model, on_node=record, **(options or {}))
+
+    failed = [name for name, response in results.items() if not response.success]
+    return GeneratorResponse(
+        success=not failed,
+        message="Successfully generated stack" if not failed else f"Stack incomplete: {', '.join(failed)} failed",
+        templates=[t for node in nodes for t in results[node.name].templates],
+        metadata={
+            "elapsed": round(time.monotonic() - started, 3),
+            "nodes": {
+                name: {
+                    "success": response.success,
+                    "message": response.message,
+                    "elapsed": round(timings.get(name, 0.0), 3),
+                    "metadata": response.metadata
+                }
+                for name, response in results.items()
+            }
+        }
+    )
+
+def generate_stack(prompt: str, **kwargs) -> GeneratorResponse:
+    """Blocking wrapper around ``run_stack`` for the CLI and web UI."""
+    async def run():
+        try:
+            return await run_stack(prompt, **kwargs)
+        finally:
+            await aclose()
+
+    return asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""Static catalogue of the generators.
+
+Kept free of heavy imports so commands like ``aiiac list`` can describe the
+generators without loading langchain, pydantic or requests; the generator
+classes themselves are only imported when ``load_generator`` is called.
+"""
+from importlib import import_module
+from typing import NamedTuple, Tuple
+
+class GeneratorInfo(NamedTuple):
+    """Description of one generator."""
+    title: str
+    target: str
+    providers: Tuple[str, ...]
+    templates: Tuple[str, ...]
+
+GENERATORS = {
+    "iac": GeneratorInfo(
+        "Infrastructure",
+        "aiiac.generators.iac:IaCGenerator",
+        ("aws", "azure", "gcp"),
+        ("terraform", "cloudformation", "bicep")
+    ),
+    "config": GeneratorInfo(
+        "Configuration",
+        "aiiac.generators.config:ConfigGenerator",
+        ("kubernetes", "docker", "terraform"),
+        ("yaml", "compose", "tfvars")
+    ),
+    "pipeline": GeneratorInfo(
+        "Pipeline",
+        "aiiac.generators.pipeline:PipelineGenerator",
+        ("github", "gitlab", "jenkins"),
+        ("workflow", "ci", "jenkinsfile")
+    ),
+    "util": GeneratorInfo(
+        "Utility",
+        "aiiac.generators.utility:UtilityGenerator",
+        ("network", "kubectl", "mongo"),
+        ("scanner", "command", "query")
+    )
+}
+
+# CLI command names are accepted as generator names too
+ALIASES = {
+    "create": "iac",
+    "utility": "util"
+}
+
+def resolve(name: str) -> str:
+    """Return the canonical generator name, or raise ``KeyError``."""
+    name = ALIASES.get(name, name)
+    if name not in GENERATORS:
+        raise KeyError(name)
+    return name
+
+def load_generator(name: str) -> type:
+    """Import and return the generator class registered under a name."""
+    module, _, attr = GENERATORS[resolve(name)].target.partition(":")
+    return getattr(import_module(module), attr)
\ No newline at end of file
@@ -0,0 +1,529 @@
+"""Stand-in Ollama server for tests and benchmarks.
+
+Serves ``/api/generate`` (streaming and non-streaming) and ``/api/tags``
+with configurable latency and token rate, so the client side can be
+exercised and timed without a model. Responses come from a canned sample
+per artifact kind, a custom responder, or a cassette recorded from a real
+server::
+
+    with StandInOllama(latency=0.05, tokens_per_second=200) as ollama:
+        os.environ["AIIAC_OLLAMA_URL"] = ollama.url
+        ...
+
+Run ``python -m aiiac.testing.ollama --help`` to serve one from the shell.
+"""
+import json
+import re
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import click
+
+TERRAFORM_SAMPLE = '''provider "aws" {
+  region = var.region
+}
+
+variable "region" {
+  type    = string
+  default = "us-east-1"
+}
+
+resource "aws_s3_bucket" "artifacts" {
+  bucket = "aiiac-artifacts"
+
+  tags = {
+    Environment = "development"
+  }
+}
+
+output "bucket_arn" {
+  value = aws_s3_bucket.artifacts.arn
+}
+'''
+
+KUBERNETES_SAMPLE = '''apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: api-config
+data:
+  LOG_LEVEL: info
+---
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: api
+spec:
+  replicas: 2
+  selector:
+    matchLabels:
+      app: api
+  template:
+    metadata:
+      labels:
+        app: api
+    spec:
+      containers:
+        - name: api
+          image: python:3.11-slim
+          ports:
+            - containerPort: 8000
+          envFrom:
+            - configMapRef:
+                name: api-config
+          resources:
+            limits:
+              cpu: 500m
+              memory: 256Mi
+'''
+
+DOCKER_SAMPLE = '''FROM python:3.11-slim
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+COPY . .
+ENV PORT=8000
+EXPOSE 8000
+CMD ["python", "-m", "app"]
+'''
+
+TFVARS_SAMPLE = '''region        = "us-east-1"
+instance_type = "t3.micro"
+environment   = "development"
+'''
+
+GITHUB_SAMPLE = '''name: ci
+on: [push]
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Test
+        run: pytest
+      - name: Deploy infrastructure
+        run: terraform apply -auto-approve
+'''
+
+GITLAB_SAMPLE = '''stages:
+  - test
+  - deploy
+
+test:
+  stage: test
+  script:
+    - pytest
+
+deploy:
+  stage: deploy
+  script:
+    - terraform apply -auto-approve
+'''
+
+JENKINS_SAMPLE = '''pipeline {
+    agent any
+    stages {
+        stage('Test') {
+            steps {
+                sh 'pytest'
+            }
+        }
+        stage('Deploy') {
+            steps {
+                sh 'terraform apply -auto-approve'
+            }
+        }
+    }
+}
+'''
+
+PYTHON_SAMPLE = '''import socket
+
+
+def scan(host, ports):
+    """Return the open ports on a host."""
+    open_ports = []
+    for port in ports:
+        with socket.socket() as sock:
+            sock.settimeout(0.5)
+            if sock.connect_ex((host, port)) == 0:
+                open_ports.append(port)
+    return open_ports
+
+
+if __name__ == "__main__":
+    print(scan("127.0.0.1", range(20, 1025)))
+'''
+
+KUBECTL_SAMPLE = '''kubectl get pods -n default
+kubectl describe deployment api
+kubectl rollout restart deployment/api
+'''
+
+MONGO_SAMPLE = '''db.orders.find({ status: "shipped" }).sort({ createdAt: -1 }).limit(10)
+'''
+
+# Prompt markers, checked in order, and the artifact each one asks for
+SAMPLES: List[Tuple[str, str]] = [
+    ("GitHub Actions", GITHUB_SAMPLE),
+    ("GitLab CI", GITLAB_SAMPLE),
+    ("Jenkinsfile", JENKINS_SAMPLE),
+    ("Terraform variables", TFVARS_SAMPLE),
+    ("Terraform code", TERRAFORM_SAMPLE),
+    ("Kubernetes", KUBERNETES_SAMPLE),
+    ("Docker", DOCKER_SAMPLE),
+    ("network scanner", PYTHON_SAMPLE),
+    ("kubectl", KUBECTL_SAMPLE),
+    ("MongoDB", MONGO_SAMPLE),
+]
+
+TOKEN = re.compile(r"\s*\S+|\s+")
+
+# Runtime options that make Ollama reload a model when they change
+RELOAD_OPTIONS = ("num_ctx", "num_batch", "num_thread")
+
+def canned_response(prompt: str) -> str:
+    """Pick the sample artifact a generator prompt asks for."""
+    for marker, sample in SAMPLES:
+        if marker in prompt:
+            return sample
+    return TERRAFORM_SAMPLE
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word-sized pieces, roughly like model tokens."""
+    return TOKEN.findall(text)
+
+def _cassette_key(model: str, prompt: str) -> Tuple[str, str]:
+    return model, prompt
+
+class Cassette:
+    """Recorded prompt/response pairs, stored as JSON lines."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], str] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[_cassette_key(entry["model"], entry["prompt"])] = entry["response"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        return self._entries.get(_cassette_key(model, prompt))
+
+    def record(self, model: str, prompt: str, response: str) -> None:
+        """Add an entry and append it to the cassette file."""
+        with self._lock:
+            self._entries[_cassette_key(model, prompt)] = response
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"model": model, "prompt": prompt, "response": response}) + "\n")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this every
+    # response waits on the client's delayed ACK
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            ollama = self.server.ollama
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in ollama.models]})
+        elif self.path == "/":
+            self._send(200, b"Ollama is running", "text/plain")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        ollama = self.server.ollama
+        ollama.requests.append(body)
+
+        try:
+            # An empty prompt only loads the model, as Ollama does
+            text = ollama.respond(body) if body.get("prompt") else ""
+        except LookupError as e:
+            self._send_json(404, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        try:
+            if body.get("stream", True):
+                self._stream(body, text)
+            else:
+                self._complete(body, text)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up mid-generation, just as it would with Ollama
+            self.close_connection = True
+        finally:
+            if body.get("keep_alive") in (0, "0", "0s"):
+                ollama.unload(body.get("model", ""))
+
+    def _complete(self, body: Dict, text: str) -> None:
+        ollama = self.server.ollama
+        started = time.monotonic()
+        load = ollama.load(body)
+        tokens, reason = ollama.limit(body, text)
+        ollama.sleep(ollama.latency + ollama.token_delay * len(tokens))
+        self._send_json(200, {**ollama.chunk(body, "".join(tokens)), **ollama.stats(body, tokens, started, reason, load)})
+
+    def _stream(self, body: Dict, text: str) -> None:
+        ollama = self.server.ollama
+        started = time.monotonic()
+        load = ollama.load(body)
+        tokens, reason = ollama.limit(body, text)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        ollama.sleep(ollama.latency)
+        for token in tokens:
+            self._write_chunk(ollama.chunk(body, token, done=False))
+            ollama.sleep(ollama.token_delay)
+        self._write_chunk({**ollama.chunk(body, ""), **ollama.stats(body, tokens, started, reason, load)})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, data: Dict) -> None:
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, data: Dict) -> None:
+        self._send(status, json.dumps(data).encode(), "application/json")
+
+    def _send(self, status: int, payload: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ollama: "StandInOllama"):
+        super().__init__(address, _Handler)
+        self.ollama = ollama
+
+class StandInOllama:
+    """A local HTTP server that answers like Ollama.
+
+    ``latency`` is the delay in seconds before the first token and
+    ``tokens_per_second`` paces the rest (``None`` sends them at once).
+    The response text comes from ``responder(body)`` when given, then
+    from ``replay`` (a cassette path; unknown prompts get a 404), and
+    otherwise from ``canned_response``. With ``upstream`` and ``record``
+    set, prompts are forwarded to a real server and its answers written
+    to the ``record`` cassette for later replay. ``load_time`` is paid
+    by a model's first request and again whenever a request changes its
+    runtime options or asked for ``keep_alive`` 0.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        tokens_per_second: Optional[float] = None,
+        responder: Optional[Callable[[Dict], str]] = None,
+        replay: Optional[Union[str, Path]] = None,
+        upstream: Optional[str] = None,
+        record: Optional[Union[str, Path]] = None,
+        models: Tuple[str, ...] = ("codellama",),
+        load_time: float = 0.0
+    ):
+        if record and not upstream:
+            raise ValueError("Recording needs an upstream Ollama URL")
+
+        self.latency = latency
+        self.token_delay = 1 / tokens_per_second if tokens_per_second else 0.0
+        self.responder = responder
+        self.replay = Cassette(replay) if replay else None
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recording = Cassette(record) if record else None
+        self.models = models
+        self.load_time = load_time
+        self.requests: List[Dict] = []
+        # Loaded models and the runtime options they were loaded with
+        self.loaded: Dict[str, Tuple] = {}
+        self._load_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._server = _Server((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInOllama":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and end any generations still in progress."""
+        self._stopping.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0 and self._stopping.wait(seconds):
+            raise ConnectionResetError("Stand-in server stopped")
+
+    def respond(self, body: Dict) -> str:
+        """Produce the response text for a request body."""
+        model, prompt = body.get("model", ""), body.get("prompt", "")
+        if self.responder is not None:
+            return self.responder(body)
+        if self.replay is not None:
+            text = self.replay.get(model, prompt)
+            if text is None:
+                raise LookupError(f"No recorded response for this prompt to {model}")
+            return text
+        if self.upstream is not None:
+            text = self._forward(body)
+            if self.recording is not None:
+                self.recording.record(model, prompt, text)
+            return text
+        return canned_response(prompt)
+
+    def _forward(self, body: Dict) -> str:
+        request = urllib.request.Request(
+            f"{self.upstream}/api/generate",
+            data=json.dumps({**body, "stream": False}).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())["response"]
+
+    def load(self, body: Dict) -> float:
+        """Load the requested model unless it is already loaded as asked.
+
+        Like Ollama, a model is loaded on first use and reloaded when a
+        request changes its runtime options. Returns the load time.
+        """
+        model = body.get("model", "")
+        options = body.get("options") or {}
+        settings = tuple(options.get(name) for name in RELOAD_OPTIONS)
+        with self._load_lock:
+            if self.loaded.get(model) == settings:
+                return 0.0
+            self.loaded[model] = settings
+        self.sleep(self.load_time)
+        return self.load_time
+
+    def unload(self, model: str) -> None:
+        with self._load_lock:
+            self.loaded.pop(model, None)
+
+    def limit(self, body: Dict, text: str) -> Tuple[List[str], str]:
+        """Apply the request's stop sequences and num_predict to the tokens.
+
+        Like Ollama, generation ends before the first stop sequence (which
+        is left out) or after ``num_predict`` tokens, and the returned
+        reason says which: ``"stop"`` or ``"length"``.
+        """
+        options = body.get("options") or {}
+        for stop in options.get("stop") or ():
+            if stop and stop in text:
+                text = text[:text.index(stop)]
+        tokens = tokenize(text)
+        limit = options.get("num_predict")
+        if limit is not None and 0 <= limit < len(tokens):
+            return tokens[:limit], "length"
+        return tokens, "stop"
+
+    def chunk(self, body: Dict, text: str, done: bool = True) -> Dict:
+        return {
+            "model": body.get("model", ""),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": text,
+            "done": done
+        }
+
+    def stats(self, body: Dict, tokens: List[str], started: float, reason: str = "stop", load: float = 0.0) -> Dict:
+        """Ollama's closing statistics, in nanoseconds like the real thing."""
+        total = int((time.monotonic() - started) * 1e9)
+        prompt_eval = int(self.latency * 1e9)
+        if not body.get("prompt"):
+            reason = "load"
+        return {
+            "done_reason": reason,
+            "total_duration": total,
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": len(tokenize(body.get("prompt", ""))),
+            "prompt_eval_duration": prompt_eval,
+            "eval_count": len(tokens),
+            "eval_duration": max(total - prompt_eval - int(load * 1e9), 0)
+        }
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Interface to listen on")
+@click.option("--port", default=11434, help="Port to listen on")
+@click.option("--latency", default=0.0, help="Seconds before the first token")
+@click.option("--tokens-per-second", type=float, help="Token rate (default: unpaced)")
+@click.option("--replay", type=click.Path(exists=True, dir_okay=False), help="Serve responses from a cassette")
+@click.option("--upstream", help="Real Ollama URL to forward prompts to")
+@click.option("--record", type=click.Path(dir_okay=False), help="Cassette to record upstream responses into")
+@click.option("--load-time", default=0.0, help="Seconds to load a model on first use")
+def main(host, port, latency, tokens_per_second, replay, upstream, record, load_time):
+    """Serve a stand-in Ollama API."""
+    if record and not upstream:
+        raise click.UsageError("--record needs --upstream")
+
+    ollama = StandInOllama(
+        host=host,
+        port=port,
+        latency=latency,
+        tokens_per_second=tokens_per_second,
+        replay=replay,
+        upstream=upstream,
+        record=record,
+        load_time=load_time
+    )
+    click.echo(f"Stand-in Ollama listening on {ollama.url}")
+    try:
+        ollama._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ollama._server.server_close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
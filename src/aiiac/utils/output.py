@@ -0,0 +1,237 @@
+"""Writing generated artifacts to disk.
+
+Model output is prose around fenced code blocks, often with a file name in
+a header line (``**main.tf**``, ``### variables.tf``), in the fence itself
+(```` ```yaml title="docker-compose.yml" ````) or in a comment on the
+block's first line (``# outputs.tf``). ``ArtifactWriter`` splits the text
+into one file per block while it streams in: each block goes straight to
+its own temporary file, and only the current line is held in memory. When
+the generation succeeds the files are renamed into place atomically, so
+downstream tools never see half-written files; a failed one leaves nothing
+behind.
+
+Blocks without a file name are named after their language (``main.tf``,
+``Dockerfile``, ``Jenkinsfile``, ``config.yaml``). Existing files are kept
+unless ``overwrite`` is set: a new file takes the next free name
+(``main-2.tf``).
+"""
+import os
+import re
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import IO, List, Optional
+from ..models.schemas import CodeTemplate
+from ..validation.engine import FENCE, block_language, language_for_path
+
+_NAME = r"(?:[\w.-]+/)*(?:[\w-]+(?:\.[\w-]+)*\.[A-Za-z0-9]+|Dockerfile(?:\.[\w-]+)?|Containerfile|Jenkinsfile|Makefile)"
+# A line naming the next block: "### main.tf", "**File: variables.tf**", "`outputs.tf`:"
+HEADER = re.compile(
+    rf"^\s*(?:#{{1,6}}\s+|[-*]\s+|\d+\.\s+)?[*_`]*(?:file(?:name)?\s*:\s*)?[*_`]*(?P<name>{_NAME})[*_`]*\s*:?\s*[*_`]*:?\s*$",
+    re.IGNORECASE
+)
+# A comment naming its block on the block's first line: "# main.tf", "// File: app.groovy"
+COMMENT_HEADER = re.compile(rf"^\s*(?:#|//|--)\s*(?:file(?:name)?\s*:\s*)?(?P<name>{_NAME})\s*$", re.IGNORECASE)
+FENCE_NAME = re.compile(rf"(?:^|[\s:=\"'])(?P<name>{_NAME})(?=$|[\s\"'])")
+
+# File names for blocks that do not name themselves
+DEFAULT_FILE_NAMES = {
+    "terraform": "main.tf",
+    "hcl": "terraform.tfvars",
+    "dockerfile": "Dockerfile",
+    "groovy": "Jenkinsfile",
+}
+EXTENSIONS = {"python": "py", "bash": "sh", "shell": "sh", "powershell": "ps1"}
+
+# Temporary files are private; published ones get the usual permissions.
+# A fixed mode, since reading the umask means setting it, for every thread
+PUBLISHED_MODE = 0o644
+
+def _safe_name(name: str) -> Optional[str]:
+    """A relative path inside the output directory, or None."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or any(part in (".", "..") for part in parts):
+        return None
+    return "/".join(parts)
+
+class _Block:
+    """A fenced block being written to its temporary file."""
+
+    def __init__(self, path: str, file: IO[str], fence: str, tag: str, name: Optional[str]):
+        self.path = path
+        self.file = file
+        self.fence = fence
+        self.tag = tag
+        self.name = name
+        self.lines = 0
+
+class ArtifactWriter:
+    """Split streamed model output into files, one per fenced block."""
+
+    def __init__(self, output_dir: str, overwrite: bool = False):
+        self.output_dir = Path(output_dir)
+        self.overwrite = overwrite
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._pending = ""
+        self._header: Optional[str] = None
+        self._block: Optional[_Block] = None
+        self._blocks: List[_Block] = []
+        # Text before any fence, kept in case the output has no fences at all
+        self._loose: Optional[_Block] = self._open("", "", None)
+
+    def _open(self, fence: str, tag: str, name: Optional[str]) -> _Block:
+        fd, path = tempfile.mkstemp(dir=self.output_dir, prefix=".aiiac-", suffix=".tmp")
+        return _Block(path, os.fdopen(fd, "w"), fence, tag, name)
+
+    def write(self, text: str) -> None:
+        """Take the next piece of the stream."""
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def _line(self, line: str) -> None:
+        block = self._block
+        if block is not None:
+            if line.strip().startswith(block.fence):
+                self._end_block()
+                return
+            if block.lines == 0 and block.name is None:
+                match = COMMENT_HEADER.match(line)
+                if match:
+                    block.name = _safe_name(match.group("name"))
+            block.file.write(line + "\n")
+            block.lines += 1
+            return
+
+        match = FENCE.match(line)
+        if match:
+            self._start_block(match.group(1), line.strip()[len(match.group(1)):])
+            return
+        header = HEADER.match(line)
+        if header:
+            self._header = _safe_name(header.group("name"))
+        elif line.strip():
+            self._header = None
+        if self._loose is not None:
+            self._loose.file.write(line + "\n")
+            self._loose.lines += bool(line.strip())
+
+    def _start_block(self, fence: str, info: str) -> None:
+        if self._loose is not None:
+            self._discard(self._loose)
+            self._loose = None
+        tag = re.split(r"[\s:{]", info.strip(), maxsplit=1)[0]
+        name = self._header
+        named = FENCE_NAME.search(info)
+        if named:
+            name = _safe_name(named.group("name")) or name
+            if named.group("name") == tag:
+                # ```main.tf names the file rather than the language
+                tag = language_for_path(tag)
+        self._header = None
+        self._block = self._open(fence, tag, name)
+
+    def _end_block(self) -> None:
+        block, self._block = self._block, None
+        self._seal(block)
+        self._blocks.append(block)
+
+    def _seal(self, block: _Block) -> None:
+        block.file.flush()
+        os.fsync(block.file.fileno())
+        if hasattr(os, "fchmod"):
+            os.fchmod(block.file.fileno(), PUBLISHED_MODE)
+        else:
+            # Windows before Python 3.13
+            os.chmod(block.path, PUBLISHED_MODE)
+        block.file.close()
+
+    def close(self, stem: str = "artifact", language: str = "") -> List[Path]:
+        """Finish the stream and move every file into place.
+
+        ``stem`` and ``language`` name blocks that do not name themselves.
+        """
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        if self._block is not None:
+            # The stream ended inside a block, e.g. at a stop sequence
+            self._end_block()
+        if self._loose is not None:
+            if self._loose.lines:
+                self._seal(self._loose)
+                self._blocks.append(self._loose)
+            else:
+                self._discard(self._loose)
+            self._loose = None
+
+        paths, used = [], set()
+        for block in self._blocks:
+            block_lang = block_language(block.tag, language)
+            name = block.name or DEFAULT_FILE_NAMES.get(block_lang) or f"{stem}.{EXTENSIONS.get(block_lang, block_lang or 'txt')}"
+            paths.append(self._publish(block.path, name, used))
+        self._blocks = []
+        return paths
+
+    def _publish(self, tmp: str, name: str, used: set) -> Path:
+        target = self.output_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if self.overwrite and target not in used:
+            os.replace(tmp, target)
+            used.add(target)
+            return target
+
+        stem, suffix = target.stem, target.suffix
+        number = 1
+        while True:
+            candidate = target if number == 1 else target.with_name(f"{stem}-{number}{suffix}")
+            try:
+                # Unlike a rename, a link never replaces an existing file
+                os.link(tmp, candidate)
+            except FileExistsError:
+                number += 1
+                continue
+            except OSError:
+                # No hard links here (FAT, some network shares): claim the
+                # name with an exclusive create, then rename over the claim
+                try:
+                    os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, PUBLISHED_MODE))
+                except FileExistsError:
+                    number += 1
+                    continue
+                os.replace(tmp, candidate)
+                used.add(candidate)
+                return candidate
+            os.unlink(tmp)
+            used.add(candidate)
+            return candidate
+
+    def abort(self) -> None:
+        """Drop everything written so far."""
+        for block in [*self._blocks, self._block, self._loose]:
+            if block is not None:
+                self._discard(block)
+        self._blocks, self._block, self._loose, self._pending = [], None, None, ""
+
+    def _discard(self, block: _Block) -> None:
+        block.file.close()
+        try:
+            os.unlink(block.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Files are only kept through close(); anything left is dropped
+        self.abort()
+
+def save_templates(templates: List[CodeTemplate], output_dir: str, overwrite: bool = False) -> List[Path]:
+    """Write generated templates to an output directory, one file per code block."""
+    paths = []
+    for template in templates:
+        with ArtifactWriter(output_dir, overwrite=overwrite) as writer:
+            writer.write(template.code)
+            paths += writer.close(template.type, template.language)
+    return paths
\ No newline at end of file
@@ -1,34 +1,22 @@
-from typing import Dict, Any
-import re
+"""Validation entry points for generated code.
+
+Thin wrappers over ``aiiac.validation.engine``, which holds the checkers
+and memoizes their results.
+"""
+from ..validation.engine import ValidationResult, validate, validate_many
 
 def validate_output(code: str, language: str) -> bool:
     """Validate generated code."""
-    if language == "yaml":
-        return validate_yaml(code)
-    elif language == "terraform":
-        return validate_terraform(code)
-    elif language == "python":
-        return validate_python(code)
-    return True
+    return validate(code, language).valid
 
 def validate_yaml(code: str) -> bool:
-    """Validate YAML code."""
-    try:
-        import yaml
-        yaml.safe_load(code)
-        return True
-    except:
-        return False
+    """Validate YAML code, including any Kubernetes manifests."""
+    return validate(code, "yaml").valid
 
 def validate_terraform(code: str) -> bool:
     """Validate Terraform code."""
-    required_blocks = ["resource", "provider"]
-    return all(block in code.lower() for block in required_blocks)
+    return validate(code, "terraform").valid
 
 def validate_python(code: str) -> bool:
     """Validate Python code."""
-    try:
-        compile(code, '<string>', 'exec')
-        return True
-    except Exception:
-        return False
\ No newline at end of file
+    return validate(code, "python").valid
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Dockerfile structure checks.
+
+Follows the Dockerfile grammar closely enough to catch what breaks a
+build: unknown instructions, a missing or misplaced ``FROM``, malformed
+exec-form arrays, and instructions missing the arguments they need.
+Line continuations, comments, parser directives and heredocs are handled.
+"""
+import json
+import re
+from typing import Iterator, List, Tuple
+from .engine import Issue
+
+INSTRUCTIONS = {
+    "FROM", "RUN", "CMD", "LABEL", "MAINTAINER", "EXPOSE", "ENV", "ADD", "COPY", "ENTRYPOINT",
+    "VOLUME", "USER", "WORKDIR", "ARG", "ONBUILD", "STOPSIGNAL", "HEALTHCHECK", "SHELL",
+}
+
+# Instructions whose arguments may be a JSON array
+EXEC_FORM = {"RUN", "CMD", "ENTRYPOINT", "SHELL", "ADD", "COPY", "VOLUME"}
+
+DIRECTIVE = re.compile(r"#\s*(\w+)\s*=\s*(\S+)\s*$")
+HEREDOC = re.compile(r"<<-?\s*[\"']?(\w+)[\"']?")
+PORT = re.compile(r"^(\$\{?\w+\}?|\d{1,5}(-\d{1,5})?)(/(tcp|udp|sctp))?$", re.IGNORECASE)
+FLAG = re.compile(r"^--[\w-]+(=\S*)?$")
+# Docker reads anything else starting with "[" (e.g. RUN [ -f x ]) as shell form
+JSON_ARRAY = re.compile(r'^\[\s*("|\])')
+
+def instructions(code: str) -> Iterator[Tuple[int, str, str]]:
+    """Yield ``(line, instruction, arguments)`` with continuations joined."""
+    lines = code.split("\n")
+    escape = "\\"
+    i = 0
+    # Parser directives may only appear before anything else
+    while i < len(lines) and DIRECTIVE.match(lines[i].strip()):
+        name, value = DIRECTIVE.match(lines[i].strip()).groups()
+        if name.lower() == "escape":
+            escape = value
+        i += 1
+
+    while i < len(lines):
+        start = i
+        stripped = lines[i].strip()
+        i += 1
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        parts = [stripped]
+        while parts[-1].endswith(escape) and i < len(lines):
+            parts[-1] = parts[-1][:-len(escape)]
+            # Comment lines inside a continuation are dropped by Docker
+            while i < len(lines) and lines[i].strip().startswith("#"):
+                i += 1
+            if i < len(lines):
+                parts.append(lines[i].strip())
+                i += 1
+        text = " ".join(part for part in parts if part)
+
+        word, _, args = text.partition(" ")
+        args = args.strip()
+        for marker in HEREDOC.findall(args) if word.upper() in ("RUN", "COPY", "ADD") else ():
+            while i < len(lines) and lines[i].strip() != marker:
+                i += 1
+            i += 1
+        yield start + 1, word, args
+
+def _exec_form(args: str) -> bool:
+    try:
+        value = json.loads(args)
+    except ValueError:
+        return False
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def _without_flags(args: str) -> List[str]:
+    words = args.split()
+    while words and FLAG.match(words[0]):
+        words.pop(0)
+    return words
+
+def check_dockerfile(code: str) -> List[Issue]:
+    """Check a Dockerfile's instructions and their arguments."""
+    issues = []
+    seen_from = False
+    count = 0
+    for line, word, args in instructions(code):
+        count += 1
+        instruction = word.upper()
+        if instruction not in INSTRUCTIONS:
+            issues.append(Issue(line, f"Unknown instruction {word!r}"))
+            continue
+        if not seen_from and instruction not in ("FROM", "ARG"):
+            issues.append(Issue(line, f"{instruction} before the first FROM"))
+        if instruction == "FROM":
+            seen_from = True
+
+        if not args and instruction not in ("HEALTHCHECK",):
+            issues.append(Issue(line, f"{instruction} needs arguments"))
+            continue
+        if instruction in EXEC_FORM and JSON_ARRAY.match(args) and not _exec_form(args):
+            issues.append(Issue(line, f"{instruction} exec form must be a JSON array of strings"))
+            continue
+
+        if instruction == "FROM":
+            words = _without_flags(args)
+            if not words or (len(words) > 1 and (len(words) != 3 or words[1].upper() != "AS")):
+                issues.append(Issue(line, "FROM takes an image and an optional 'AS name'"))
+        elif instruction in ("COPY", "ADD") and not JSON_ARRAY.match(args):
+            words = _without_flags(args)
+            if len(words) < 2 and not HEREDOC.search(args):
+                issues.append(Issue(line, f"{instruction} needs a source and a destination"))
+        elif instruction == "EXPOSE":
+            for port in args.split():
+                if not PORT.match(port):
+                    issues.append(Issue(line, f"Invalid port {port!r} in EXPOSE"))
+        elif instruction in ("ENV", "LABEL"):
+            words = args.split()
+            if "=" not in words[0] and (instruction == "LABEL" or len(words) < 2):
+                issues.append(Issue(line, f"{instruction} needs key=value pairs"))
+        elif instruction == "SHELL" and not args.startswith("["):
+            issues.append(Issue(line, "SHELL must use the JSON array form"))
+        elif instruction == "HEALTHCHECK":
+            words = _without_flags(args)
+            if not words or words[0].upper() not in ("CMD", "NONE"):
+                issues.append(Issue(line, "HEALTHCHECK needs CMD or NONE"))
+        elif instruction == "ONBUILD":
+            nested = args.split()[0].upper()
+            if nested in ("ONBUILD", "FROM", "MAINTAINER") or nested not in INSTRUCTIONS:
+                issues.append(Issue(line, f"ONBUILD cannot trigger {args.split()[0]!r}"))
+
+    if not count:
+        issues.append(Issue(1, "No Dockerfile instructions found"))
+    elif not seen_from:
+        issues.append(Issue(1, "Dockerfile has no FROM instruction"))
+    return issues
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""Artifact validation: dispatch, fenced-block handling and memoization.
+
+Model output is usually prose around fenced code blocks, so each fenced
+block is checked with the language its fence names (falling back to the
+artifact's language) and reported with line numbers in the original text.
+Checkers are imported on first use, results are memoized by content hash,
+and ``validate_many`` / ``avalidate`` spread bulk work over a process pool.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+class Issue(NamedTuple):
+    """A problem found in an artifact, on a 1-based line."""
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}: {self.message}"
+
+class ValidationResult(NamedTuple):
+    """Outcome of validating one artifact."""
+    language: str
+    errors: Tuple[Issue, ...] = ()
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict:
+        return {
+            "language": self.language,
+            "valid": self.valid,
+            "errors": [{"line": issue.line, "message": issue.message} for issue in self.errors]
+        }
+
+# Checkers by language, as "module:function", imported when first needed
+CHECKERS = {
+    "terraform": "aiiac.validation.hcl:check_terraform",
+    "hcl": "aiiac.validation.hcl:check_hcl",
+    "yaml": "aiiac.validation.kubernetes:check_yaml",
+    "dockerfile": "aiiac.validation.dockerfile:check_dockerfile",
+    "groovy": "aiiac.validation.groovy:check_groovy",
+    "python": "aiiac.validation.engine:check_python",
+    "json": "aiiac.validation.engine:check_json",
+}
+
+# Fence info strings, file extensions and template languages per checker
+LANGUAGE_ALIASES = {
+    "tf": "terraform",
+    "tfvars": "hcl",
+    "yml": "yaml",
+    "kubernetes": "yaml",
+    "k8s": "yaml",
+    "cloudformation": "yaml",
+    "compose": "yaml",
+    "docker": "dockerfile",
+    "containerfile": "dockerfile",
+    "jenkins": "groovy",
+    "jenkinsfile": "groovy",
+    "py": "python",
+}
+
+FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+.-]*)[^\n]*$")
+
+CACHE_SIZE = 4096
+# Below this many uncached artifacts a process pool costs more than it saves
+POOL_THRESHOLD = 16
+
+_checkers: Dict[str, Callable[[str], List[Issue]]] = {}
+_memo: "OrderedDict[bytes, ValidationResult]" = OrderedDict()
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+def normalize_language(language: str) -> str:
+    """Map a fence tag, extension or template language onto a checker name."""
+    language = (language or "").lower().lstrip(".")
+    return LANGUAGE_ALIASES.get(language, language)
+
+def language_for_path(path: str) -> str:
+    """Guess an artifact's language from its file name."""
+    name = Path(path).name.lower()
+    if name in ("dockerfile", "containerfile") or name.startswith("dockerfile."):
+        return "dockerfile"
+    if name == "jenkinsfile":
+        return "groovy"
+    return normalize_language(Path(path).suffix)
+
+def extract_blocks(text: str) -> List[Tuple[str, str, int]]:
+    """Split text into fenced code blocks.
+
+    Returns ``(info, code, first_line)`` for every fenced block, where
+    ``first_line`` is the 1-based line of the block's first code line.
+    Text without fences comes back as a single untagged block.
+    """
+    lines = text.split("\n")
+    blocks = []
+    i = 0
+    while i < len(lines):
+        match = FENCE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+        fence, info = match.group(1), match.group(2)
+        start = i + 1
+        end = start
+        while end < len(lines) and not lines[end].strip().startswith(fence):
+            end += 1
+        blocks.append((info, "\n".join(lines[start:end]), start + 1))
+        i = end + 1
+    return blocks or [("", text, 1)]
+
+def _checker(language: str) -> Optional[Callable[[str], List[Issue]]]:
+    checker = _checkers.get(language)
+    if checker is None and language in CHECKERS:
+        module, _, attr = CHECKERS[language].partition(":")
+        checker = _checkers[language] = getattr(import_module(module), attr)
+    return checker
+
+def block_language(info: str, language: str) -> str:
+    """The language of a fenced block, falling back to the artifact's."""
+    fenced = normalize_language(info)
+    if not fenced:
+        return language
+    # ```hcl is the usual fence for Terraform code
+    if fenced == "hcl" and language == "terraform":
+        return language
+    return fenced
+
+def _validate_uncached(code: str, language: str) -> ValidationResult:
+    errors: List[Issue] = []
+    for info, block, first_line in extract_blocks(code):
+        checker = _checker(block_language(info, language))
+        if checker is None:
+            continue
+        try:
+            issues = checker(block)
+        except RecursionError:
+            issues = [Issue(1, "Nesting too deep to validate")]
+        # Errors at end of input (an unclosed bracket, say) stay inside the block
+        last = block.count("\n") + 1
+        errors += [Issue(min(max(issue.line, 1), last) + first_line - 1, issue.message) for issue in issues]
+    return ValidationResult(language, tuple(errors))
+
+def _key(code: str, language: str) -> bytes:
+    return hashlib.sha256(f"{language}\0{code}".encode()).digest()
+
+def _remember(key: bytes, result: ValidationResult) -> None:
+    with _lock:
+        _memo[key] = result
+        _memo.move_to_end(key)
+        while len(_memo) > CACHE_SIZE:
+            _memo.popitem(last=False)
+
+def _recall(key: bytes) -> Optional[ValidationResult]:
+    with _lock:
+        result = _memo.get(key)
+        if result is not None:
+            _memo.move_to_end(key)
+        return result
+
+def validate(code: str, language: str) -> ValidationResult:
+    """Validate an artifact, reusing the result for content seen before.
+
+    Languages without a checker are accepted as they are.
+    """
+    language = normalize_language(language)
+    key = _key(code, language)
+    result = _recall(key)
+    if result is None:
+        result = _validate_uncached(code, language)
+        _remember(key, result)
+    return result
+
+def get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return the shared validation process pool, starting it on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            # Spawned workers are safe to start from threaded callers
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or min(os.cpu_count() or 1, 4),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(shutdown_pool)
+        return _pool
+
+def shutdown_pool() -> None:
+    """Stop the validation worker processes."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def validate_many(
+    items: Sequence[Tuple[str, str]],
+    workers: Optional[int] = None
+) -> List[ValidationResult]:
+    """Validate ``(code, language)`` pairs, in parallel when it pays off.
+
+    Identical artifacts are validated once. ``workers=1`` keeps everything
+    in this process.
+    """
+    results: List[Optional[ValidationResult]] = [None] * len(items)
+    pending: Dict[bytes, Tuple[str, str, List[int]]] = {}
+    for i, (code, language) in enumerate(items):
+        language = normalize_language(language)
+        key = _key(code, language)
+        cached = _recall(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(key, (code, language, []))[2].append(i)
+
+    entries = list(pending.items())
+    codes = [code for _, (code, _, _) in entries]
+    languages = [language for _, (_, language, _) in entries]
+    if workers != 1 and len(entries) >= POOL_THRESHOLD:
+        pool = get_pool(workers)
+        outcomes = pool.map(_validate_uncached, codes, languages, chunksize=max(len(entries) // 32, 1))
+    else:
+        outcomes = map(_validate_uncached, codes, languages)
+
+    for (key, (_, _, indices)), result in zip(entries, outcomes):
+        _remember(key, result)
+        for i in indices:
+            results[i] = result
+    return results
+
+async def avalidate(code: str, language: str, pool: Optional[ProcessPoolExecutor] = None) -> ValidationResult:
+    """Validate without blocking the event loop, in ``pool`` when given."""
+    language = normalize_language(language)
+    key = _key(code, language)
+    result = _recall(key)
+    if result is None:
+        if pool is None:
+            result = _validate_uncached(code, language)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(pool, _validate_uncached, code, language)
+        _remember(key, result)
+    return result
+
+def summarize(results: Sequence[ValidationResult]) -> Dict:
+    """Response metadata for a set of templates' validation results."""
+    errors = [
+        {"template": i, "line": issue.line, "message": issue.message}
+        for i, result in enumerate(results)
+        for issue in result.errors
+    ]
+    return {"valid": False, "errors": errors} if errors else {"valid": True}
+
+def clear_cache() -> None:
+    """Forget memoized results."""
+    with _lock:
+        _memo.clear()
+
+def check_python(code: str) -> List[Issue]:
+    """Python must compile."""
+    try:
+        compile(code, "<generated>", "exec")
+    except SyntaxError as e:
+        return [Issue(e.lineno or 1, f"Invalid Python: {e.msg}")]
+    except ValueError as e:
+        return [Issue(1, f"Invalid Python: {e}")]
+    return []
+
+def check_json(code: str) -> List[Issue]:
+    """JSON must parse."""
+    try:
+        json.loads(code)
+    except json.JSONDecodeError as e:
+        return [Issue(e.lineno, f"Invalid JSON: {e.msg}")]
+    return []
\ No newline at end of file
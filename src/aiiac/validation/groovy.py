@@ -0,0 +1,163 @@
+"""Jenkinsfile / Groovy structure checks.
+
+Groovy is scanned for balanced brackets with strings (single, double and
+triple-quoted, including ``${...}`` interpolation) and comments skipped.
+The brace structure is then read as a tree of named blocks, which is
+enough to check the shape of a declarative pipeline: ``agent`` and
+``stages`` inside ``pipeline``, at least one ``stage``, and every stage
+doing something.
+"""
+import re
+from typing import List, NamedTuple, Optional, Tuple
+from .engine import Issue
+
+class GroovyError(Exception):
+    """Raised when brackets or strings do not balance."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(message)
+        self.line = line
+        self.message = message
+
+class Block(NamedTuple):
+    name: str
+    line: int
+    children: List["Block"]
+
+CLOSERS = {")": "(", "]": "[", "}": "{"}
+# A block's name: the identifier (and optional arguments) before its brace
+BLOCK_NAME = re.compile(r"([A-Za-z_]\w*)\s*(\([^()]*\))?\s*(->\s*)?$")
+STAGE_BODIES = ("steps", "stages", "parallel", "matrix")
+
+def parse(code: str) -> Block:
+    """Read the brace structure into a tree of blocks."""
+    root = Block("", 1, [])
+    stack: List[Tuple[str, int, Optional[Block]]] = []
+    blocks = [root]
+    text: List[str] = []  # code since the last brace, for naming blocks
+    i, line, n = 0, 1, len(code)
+    while i < n:
+        c = code[i]
+        if c == "\n":
+            line += 1
+        elif code.startswith("//", i):
+            while i < n and code[i] != "\n":
+                i += 1
+            continue
+        elif code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            if end < 0:
+                raise GroovyError(line, "Unterminated comment")
+            line += code.count("\n", i, end)
+            i = end + 2
+            continue
+        elif c in "'\"":
+            i, line = _skip_string(code, i, line)
+            text.append("''")
+            continue
+        elif c in "([{":
+            block = None
+            if c == "{":
+                match = BLOCK_NAME.search("".join(text).rstrip())
+                block = Block(match.group(1) if match else "", line, [])
+                blocks[-1].children.append(block)
+                blocks.append(block)
+                text = []
+            stack.append((c, line, block))
+        elif c in ")]}":
+            if not stack:
+                raise GroovyError(line, f"Unexpected {c!r}")
+            opener, opened, block = stack.pop()
+            if opener != CLOSERS[c]:
+                raise GroovyError(opened, f"{opener!r} is never closed")
+            if block is not None:
+                blocks.pop()
+                text = []
+        if c not in "{}":
+            text.append(c)
+        i += 1
+
+    if stack:
+        opener, opened, _ = stack[-1]
+        raise GroovyError(opened, f"{opener!r} is never closed")
+    return root
+
+def _skip_string(code: str, i: int, line: int) -> Tuple[int, int]:
+    """Skip a string literal, returning the index after it and the new line."""
+    start_line = line
+    quote = code[i] * 3 if code.startswith(code[i] * 3, i) else code[i]
+    i += len(quote)
+    while i < len(code):
+        if code[i] == "\\":
+            i += 2
+            continue
+        if code.startswith(quote, i):
+            return i + len(quote), line
+        if code[i] == "\n":
+            if len(quote) == 1:
+                raise GroovyError(start_line, "Unterminated string")
+            line += 1
+        elif quote[0] == '"' and code.startswith("${", i):
+            i, line = _skip_interpolation(code, i + 2, line)
+            continue
+        i += 1
+    raise GroovyError(start_line, "Unterminated string")
+
+def _skip_interpolation(code: str, i: int, line: int) -> Tuple[int, int]:
+    depth = 1
+    while i < len(code):
+        c = code[i]
+        if c in "'\"":
+            i, line = _skip_string(code, i, line)
+            continue
+        if c == "\n":
+            line += 1
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1, line
+        i += 1
+    raise GroovyError(line, "Unterminated ${...} interpolation")
+
+def _child(block: Block, name: str) -> Optional[Block]:
+    return next((child for child in block.children if child.name == name), None)
+
+def _check_stages(stages: Block) -> List[Issue]:
+    issues = []
+    found = [child for child in stages.children if child.name == "stage"]
+    if not found:
+        issues.append(Issue(stages.line, "stages block has no stage"))
+    for stage in found:
+        if not any(_child(stage, body) for body in STAGE_BODIES):
+            issues.append(Issue(stage.line, "stage needs steps, stages, parallel or matrix"))
+        nested = _child(stage, "stages")
+        if nested:
+            issues += _check_stages(nested)
+        parallel = _child(stage, "parallel")
+        for branch in parallel.children if parallel else ():
+            if branch.name == "stage" and not any(_child(branch, body) for body in STAGE_BODIES):
+                issues.append(Issue(branch.line, "stage needs steps, stages, parallel or matrix"))
+    return issues
+
+def check_groovy(code: str) -> List[Issue]:
+    """Check Groovy balances, and a declarative pipeline's structure."""
+    try:
+        root = parse(code)
+    except GroovyError as e:
+        return [Issue(e.line, e.message)]
+
+    pipeline = _child(root, "pipeline")
+    if pipeline is None:
+        return []
+
+    issues = []
+    if not re.search(r"^\s*agent\b", code, re.MULTILINE):
+        issues.append(Issue(pipeline.line, "pipeline has no agent"))
+    stages = _child(pipeline, "stages")
+    if stages is None:
+        issues.append(Issue(pipeline.line, "pipeline has no stages block"))
+    else:
+        issues += _check_stages(stages)
+    return issues
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""Structural HCL parser and Terraform checks.
+
+The lexer understands comments, quoted templates with nested ``${...}``
+interpolation, and heredocs. The parser builds the body/attribute/block
+tree of HCL's native syntax. Expressions are checked for balanced
+brackets and completeness rather than parsed in full, which is enough to
+catch what generated code actually gets wrong: unclosed blocks, missing
+values, stray tokens, duplicate attributes and misshapen Terraform blocks.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from .engine import Issue
+
+class HCLError(Exception):
+    """Raised when HCL cannot be parsed."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(message)
+        self.line = line
+        self.message = message
+
+class Token(NamedTuple):
+    kind: str  # ident, number, string, heredoc, punct, newline, eof
+    value: str
+    line: int
+
+class Attribute(NamedTuple):
+    name: str
+    line: int
+
+class Block(NamedTuple):
+    type: str
+    labels: Tuple[str, ...]
+    body: List[Union[Attribute, "Block"]]
+    line: int
+
+IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+NUMBER = re.compile(r"\d+(\.\d+)?([eE][+-]?\d+)?")
+HEREDOC = re.compile(r"<<(-?)([A-Za-z_][A-Za-z0-9_]*)[ \t]*\n")
+OPERATORS = ("...", "==", "!=", "<=", ">=", "&&", "||", "=>")
+SINGLE = set("{}[]()=,.:?!+-*/%<>")
+OPENERS = {"(": ")", "[": "]", "{": "}"}
+BINARY = {"==", "!=", "<=", ">=", "&&", "||", "+", "-", "*", "/", "%", "<", ">", "?", ":", "=>", "."}
+
+def tokenize(text: str) -> List[Token]:
+    """Split HCL source into tokens, raising ``HCLError`` on bad lexemes."""
+    tokens: List[Token] = []
+    i, line, n = 0, 1, len(text)
+    while i < n:
+        c = text[i]
+        if c == "\n":
+            tokens.append(Token("newline", "\n", line))
+            line += 1
+            i += 1
+        elif c in " \t\r":
+            i += 1
+        elif c == "#" or text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            if end < 0:
+                raise HCLError(line, "Unterminated block comment")
+            line += text.count("\n", i, end)
+            i = end + 2
+        elif c == '"':
+            end, lines = _scan_string(text, i, line)
+            tokens.append(Token("string", text[i:end], line))
+            line += lines
+            i = end
+        elif text.startswith("<<", i) and HEREDOC.match(text, i):
+            match = HEREDOC.match(text, i)
+            end, lines = _scan_heredoc(text, match.end(), match.group(2), line)
+            tokens.append(Token("heredoc", match.group(2), line))
+            line += lines
+            i = end
+        elif IDENT.match(text, i):
+            match = IDENT.match(text, i)
+            tokens.append(Token("ident", match.group(), line))
+            i = match.end()
+        elif NUMBER.match(text, i):
+            match = NUMBER.match(text, i)
+            tokens.append(Token("number", match.group(), line))
+            i = match.end()
+        else:
+            op = next((op for op in OPERATORS if text.startswith(op, i)), None)
+            if op is None and c not in SINGLE:
+                raise HCLError(line, f"Unexpected character {c!r}")
+            op = op or c
+            tokens.append(Token("punct", op, line))
+            i += len(op)
+    tokens.append(Token("eof", "", line))
+    return tokens
+
+def _scan_string(text: str, i: int, line: int) -> Tuple[int, int]:
+    """Find the end of a quoted template starting at ``text[i] == '"'``.
+
+    Returns the index after the closing quote and the newlines crossed,
+    which can only appear inside interpolations.
+    """
+    start_line = line
+    i += 1
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+        elif c == '"':
+            return i + 1, line - start_line
+        elif c == "\n":
+            raise HCLError(start_line, "Unterminated string")
+        elif c in "$%" and text.startswith("{", i + 1) and not text.startswith(c * 2, i - 1):
+            i, line = _scan_interpolation(text, i + 2, line)
+        else:
+            i += 1
+    raise HCLError(start_line, "Unterminated string")
+
+def _scan_interpolation(text: str, i: int, line: int) -> Tuple[int, int]:
+    """Skip a ``${ ... }`` body, which may hold braces and nested strings."""
+    start_line = line
+    depth = 1
+    while i < len(text):
+        c = text[i]
+        if c == '"':
+            end, lines = _scan_string(text, i, line)
+            i, line = end, line + lines
+            continue
+        if c == "\n":
+            line += 1
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1, line
+        i += 1
+    raise HCLError(start_line, "Unterminated template interpolation")
+
+def _scan_heredoc(text: str, i: int, marker: str, line: int) -> Tuple[int, int]:
+    start_line = line
+    line += 1
+    while i < len(text):
+        end = text.find("\n", i)
+        current = text[i:] if end < 0 else text[i:end]
+        if current.strip() == marker:
+            return (len(text) if end < 0 else end), line - start_line
+        if end < 0:
+            break
+        i = end + 1
+        line += 1
+    raise HCLError(start_line, f"Heredoc {marker} is never closed")
+
+class _Parser:
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Token:
+        return self.tokens[self.pos]
+
+    def next(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def body(self, opened: Optional[Token] = None) -> List[Union[Attribute, Block]]:
+        items: List[Union[Attribute, Block]] = []
+        while True:
+            token = self.next()
+            if token.kind == "newline":
+                continue
+            if token.kind == "eof":
+                if opened is not None:
+                    raise HCLError(opened.line, "Block is never closed: missing '}'")
+                return items
+            if token.value == "}" and token.kind == "punct":
+                if opened is None:
+                    raise HCLError(token.line, "Unexpected '}'")
+                return items
+            if token.kind != "ident":
+                raise HCLError(token.line, f"Expected an attribute or block, found {_describe(token)}")
+            items.append(self.item(token))
+
+    def item(self, name: Token) -> Union[Attribute, Block]:
+        token = self.peek()
+        if token.value == "=" and token.kind == "punct":
+            self.next()
+            self.expression(name)
+            return Attribute(name.value, name.line)
+
+        labels = []
+        while self.peek().kind in ("string", "ident"):
+            labels.append(self.next().value.strip('"'))
+        brace = self.next()
+        if brace.value != "{" or brace.kind != "punct":
+            raise HCLError(brace.line, f"Expected '=' or '{{' after {name.value!r}, found {_describe(brace)}")
+        return Block(name.value, tuple(labels), self.body(opened=brace), name.line)
+
+    def expression(self, name: Token) -> None:
+        """Consume an attribute value up to the end of its line."""
+        stack: List[Token] = []
+        last: Optional[Token] = None
+        while True:
+            token = self.peek()
+            if token.kind == "eof":
+                if stack:
+                    raise HCLError(stack[-1].line, f"{stack[-1].value!r} is never closed")
+                break
+            if not stack and (token.kind == "newline" or (token.kind == "punct" and token.value == "}")):
+                break
+            self.next()
+            if token.kind == "newline":
+                continue
+            if token.kind == "punct":
+                if token.value in OPENERS:
+                    stack.append(token)
+                elif token.value in (")", "]", "}"):
+                    if not stack:
+                        raise HCLError(token.line, f"Unexpected {token.value!r}")
+                    if OPENERS[stack[-1].value] != token.value:
+                        raise HCLError(stack[-1].line, f"{stack[-1].value!r} is never closed")
+                    stack.pop()
+                elif token.value == "=" and not stack:
+                    raise HCLError(token.line, f"Unexpected '=' in value of {name.value!r}")
+            last = token
+
+        if last is None:
+            raise HCLError(name.line, f"Attribute {name.value!r} has no value")
+        if last.kind == "punct" and last.value in BINARY:
+            raise HCLError(last.line, f"Incomplete expression for {name.value!r}")
+
+def _describe(token: Token) -> str:
+    if token.kind == "newline":
+        return "end of line"
+    if token.kind == "eof":
+        return "end of file"
+    return repr(token.value)
+
+def parse(text: str) -> List[Union[Attribute, Block]]:
+    """Parse HCL into its body tree, raising ``HCLError``."""
+    return _Parser(tokenize(text)).body()
+
+def _duplicates(body: List[Union[Attribute, Block]]) -> List[Issue]:
+    issues = []
+    seen: Dict[str, int] = {}
+    for item in body:
+        if isinstance(item, Attribute):
+            if item.name in seen:
+                issues.append(Issue(item.line, f"Attribute {item.name!r} already set on line {seen[item.name]}"))
+            else:
+                seen[item.name] = item.line
+        else:
+            issues += _duplicates(item.body)
+    return issues
+
+def check_hcl(code: str) -> List[Issue]:
+    """Check HCL structure, e.g. tfvars or variable definitions."""
+    try:
+        body = parse(code)
+    except HCLError as e:
+        return [Issue(e.line, e.message)]
+    return _duplicates(body)
+
+# Labels each top-level Terraform block takes
+BLOCK_LABELS = {
+    "resource": 2,
+    "data": 2,
+    "provider": 1,
+    "variable": 1,
+    "output": 1,
+    "module": 1,
+    "check": 1,
+    "terraform": 0,
+    "locals": 0,
+    "moved": 0,
+    "import": 0,
+    "removed": 0,
+}
+
+REQUIRED_ATTRIBUTES = {
+    "output": "value",
+    "module": "source",
+}
+
+def check_terraform(code: str) -> List[Issue]:
+    """Check HCL structure plus Terraform's top-level block rules."""
+    try:
+        body = parse(code)
+    except HCLError as e:
+        return [Issue(e.line, e.message)]
+
+    issues = _duplicates(body)
+    addresses: Dict[Tuple[str, ...], int] = {}
+    blocks = 0
+    for item in body:
+        if isinstance(item, Attribute):
+            issues.append(Issue(item.line, f"Unexpected attribute {item.name!r} outside a block"))
+            continue
+
+        blocks += 1
+        expected = BLOCK_LABELS.get(item.type)
+        if expected is None:
+            issues.append(Issue(item.line, f"Unknown block type {item.type!r}"))
+            continue
+        if len(item.labels) != expected:
+            issues.append(Issue(
+                item.line,
+                f"{item.type!r} block needs {expected} label{'s' if expected != 1 else ''}, found {len(item.labels)}"
+            ))
+            continue
+
+        required = REQUIRED_ATTRIBUTES.get(item.type)
+        if required and not any(isinstance(i, Attribute) and i.name == required for i in item.body):
+            issues.append(Issue(item.line, f"{item.type} {item.labels[0]!r} has no {required!r}"))
+
+        if item.type in ("resource", "data", "variable", "output", "module"):
+            address = (item.type, *item.labels)
+            if address in addresses:
+                issues.append(Issue(item.line, f"{'.'.join(address)} already declared on line {addresses[address]}"))
+            else:
+                addresses[address] = item.line
+
+    if not blocks and not issues:
+        issues.append(Issue(1, "No Terraform blocks found"))
+    return issues
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""Bundled Kubernetes schemas for the fields generated manifests use.
+
+A trimmed subset of the Kubernetes OpenAPI definitions in a small schema
+language: ``type`` is one of object, array, string, integer, number,
+boolean or int-or-string; objects list ``properties`` and ``required``
+keys and may be ``closed`` to unknown fields, or carry ``values`` for maps;
+arrays have ``items``; ``enum`` restricts scalar values. Anything a schema
+does not mention is accepted, so they only reject what Kubernetes would.
+"""
+from typing import Dict, Tuple
+
+STR = {"type": "string"}
+INT = {"type": "integer"}
+BOOL = {"type": "boolean"}
+INT_OR_STR = {"type": "int-or-string"}
+STR_MAP = {"type": "object", "values": STR}
+QUANTITIES = {"type": "object", "values": INT_OR_STR}
+
+def obj(required: Tuple[str, ...] = (), closed: bool = False, **properties) -> Dict:
+    return {"type": "object", "required": required, "closed": closed, "properties": properties}
+
+def arr(items: Dict) -> Dict:
+    return {"type": "array", "items": items}
+
+def enum(*values: str) -> Dict:
+    return {"type": "string", "enum": values}
+
+METADATA = obj(
+    name=STR,
+    generateName=STR,
+    namespace=STR,
+    labels=STR_MAP,
+    annotations=STR_MAP,
+)
+
+LABEL_SELECTOR = obj(matchLabels=STR_MAP, matchExpressions=arr(obj(("key", "operator"), key=STR, operator=STR, values=arr(STR))))
+
+ENV_VAR = obj(
+    ("name",),
+    closed=True,
+    name=STR,
+    value=STR,
+    valueFrom=obj(
+        configMapKeyRef=obj(("key",), name=STR, key=STR, optional=BOOL),
+        secretKeyRef=obj(("key",), name=STR, key=STR, optional=BOOL),
+        fieldRef=obj(("fieldPath",), fieldPath=STR),
+        resourceFieldRef=obj(("resource",), resource=STR),
+    ),
+)
+
+PROBE = obj(
+    httpGet=obj(("port",), path=STR, port=INT_OR_STR, scheme=enum("HTTP", "HTTPS")),
+    tcpSocket=obj(("port",), port=INT_OR_STR),
+    exec=obj(command=arr(STR)),
+    grpc=obj(("port",), port=INT),
+    initialDelaySeconds=INT,
+    periodSeconds=INT,
+    timeoutSeconds=INT,
+    successThreshold=INT,
+    failureThreshold=INT,
+)
+
+CONTAINER = obj(
+    ("name",),
+    closed=True,
+    name=STR,
+    image=STR,
+    command=arr(STR),
+    args=arr(STR),
+    workingDir=STR,
+    ports=arr(obj(
+        ("containerPort",),
+        closed=True,
+        name=STR,
+        containerPort=INT,
+        hostPort=INT,
+        hostIP=STR,
+        protocol=enum("TCP", "UDP", "SCTP"),
+    )),
+    env=arr(ENV_VAR),
+    envFrom=arr(obj(prefix=STR, configMapRef=obj(name=STR), secretRef=obj(name=STR))),
+    resources=obj(closed=True, limits=QUANTITIES, requests=QUANTITIES, claims=arr(obj(name=STR))),
+    volumeMounts=arr(obj(("name", "mountPath"), name=STR, mountPath=STR, subPath=STR, readOnly=BOOL)),
+    volumeDevices=arr(obj()),
+    livenessProbe=PROBE,
+    readinessProbe=PROBE,
+    startupProbe=PROBE,
+    lifecycle=obj(),
+    terminationMessagePath=STR,
+    terminationMessagePolicy=enum("File", "FallbackToLogsOnError"),
+    imagePullPolicy=enum("Always", "IfNotPresent", "Never"),
+    securityContext=obj(runAsUser=INT, runAsGroup=INT, runAsNonRoot=BOOL, readOnlyRootFilesystem=BOOL,
+                        allowPrivilegeEscalation=BOOL, privileged=BOOL),
+    stdin=BOOL,
+    stdinOnce=BOOL,
+    tty=BOOL,
+    resizePolicy=arr(obj()),
+    restartPolicy=STR,
+)
+
+POD_SPEC = obj(
+    ("containers",),
+    containers={**arr(CONTAINER), "minItems": 1},
+    initContainers=arr(CONTAINER),
+    volumes=arr(obj(("name",), name=STR)),
+    restartPolicy=enum("Always", "OnFailure", "Never"),
+    serviceAccountName=STR,
+    nodeSelector=STR_MAP,
+    imagePullSecrets=arr(obj(name=STR)),
+    terminationGracePeriodSeconds=INT,
+    hostNetwork=BOOL,
+)
+
+POD_TEMPLATE = obj(("spec",), metadata=METADATA, spec=POD_SPEC)
+
+WORKLOAD_SPEC = obj(("selector", "template"), replicas=INT, selector=LABEL_SELECTOR, template=POD_TEMPLATE)
+
+JOB_SPEC = obj(("template",), template=POD_TEMPLATE, backoffLimit=INT, completions=INT, parallelism=INT,
+               activeDeadlineSeconds=INT, ttlSecondsAfterFinished=INT)
+
+# Kind -> (API versions serving it, schema for the rest of the manifest)
+KINDS: Dict[str, Tuple[Tuple[str, ...], Dict]] = {
+    "Pod": (("v1",), obj(("spec",), spec=POD_SPEC)),
+    "Deployment": (("apps/v1",), obj(("spec",), spec=WORKLOAD_SPEC)),
+    "StatefulSet": (("apps/v1",), obj(("spec",), spec={**WORKLOAD_SPEC, "properties": {
+        **WORKLOAD_SPEC["properties"], "serviceName": STR, "volumeClaimTemplates": arr(obj())}})),
+    "DaemonSet": (("apps/v1",), obj(("spec",), spec=WORKLOAD_SPEC)),
+    "ReplicaSet": (("apps/v1",), obj(("spec",), spec=WORKLOAD_SPEC)),
+    "Job": (("batch/v1",), obj(("spec",), spec=JOB_SPEC)),
+    "CronJob": (("batch/v1",), obj(("spec",), spec=obj(
+        ("schedule", "jobTemplate"),
+        schedule=STR,
+        suspend=BOOL,
+        concurrencyPolicy=enum("Allow", "Forbid", "Replace"),
+        jobTemplate=obj(("spec",), spec=JOB_SPEC),
+    ))),
+    "Service": (("v1",), obj(spec=obj(
+        type=enum("ClusterIP", "NodePort", "LoadBalancer", "ExternalName"),
+        selector=STR_MAP,
+        clusterIP=STR,
+        ports=arr(obj(
+            ("port",),
+            closed=True,
+            name=STR,
+            port=INT,
+            targetPort=INT_OR_STR,
+            nodePort=INT,
+            protocol=enum("TCP", "UDP", "SCTP"),
+            appProtocol=STR,
+        )),
+    ))),
+    "ConfigMap": (("v1",), obj(data=STR_MAP, binaryData=STR_MAP, immutable=BOOL)),
+    "Secret": (("v1",), obj(data=STR_MAP, stringData=STR_MAP, type=STR, immutable=BOOL)),
+    "Namespace": (("v1",), obj()),
+    "ServiceAccount": (("v1",), obj()),
+    "PersistentVolumeClaim": (("v1",), obj(("spec",), spec=obj(
+        accessModes=arr(enum("ReadWriteOnce", "ReadOnlyMany", "ReadWriteMany", "ReadWriteOncePod")),
+        resources=obj(requests=QUANTITIES, limits=QUANTITIES),
+        storageClassName=STR,
+    ))),
+    "Ingress": (("networking.k8s.io/v1",), obj(spec=obj(
+        ingressClassName=STR,
+        tls=arr(obj(hosts=arr(STR), secretName=STR)),
+        rules=arr(obj(host=STR, http=obj(("paths",), paths=arr(obj(
+            ("path", "pathType", "backend"),
+            path=STR,
+            pathType=enum("Exact", "Prefix", "ImplementationSpecific"),
+            backend=obj(service=obj(("name", "port"), name=STR, port=obj(number=INT, name=STR))),
+        ))))),
+    ))),
+    "HorizontalPodAutoscaler": (("autoscaling/v2", "autoscaling/v1"), obj(("spec",), spec=obj(
+        ("scaleTargetRef", "maxReplicas"),
+        scaleTargetRef=obj(("kind", "name"), apiVersion=STR, kind=STR, name=STR),
+        minReplicas=INT,
+        maxReplicas=INT,
+        metrics=arr(obj(("type",), type=STR)),
+    ))),
+    "NetworkPolicy": (("networking.k8s.io/v1",), obj(("spec",), spec=obj(
+        ("podSelector",),
+        podSelector=LABEL_SELECTOR,
+        policyTypes=arr(enum("Ingress", "Egress")),
+    ))),
+    "Role": (("rbac.authorization.k8s.io/v1",), obj(rules=arr(obj(("verbs",), verbs=arr(STR))))),
+    "ClusterRole": (("rbac.authorization.k8s.io/v1",), obj(rules=arr(obj(("verbs",), verbs=arr(STR))))),
+    "RoleBinding": (("rbac.authorization.k8s.io/v1",), obj(("roleRef",), roleRef=obj(("kind", "name"), kind=STR, name=STR))),
+    "ClusterRoleBinding": (("rbac.authorization.k8s.io/v1",), obj(("roleRef",), roleRef=obj(("kind", "name"), kind=STR, name=STR))),
+}
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Multi-document YAML and Kubernetes manifest checks.
+
+Documents are composed rather than loaded, so every node keeps its line
+number and unknown tags (CloudFormation's ``!Ref``, say) do not get in the
+way. Documents with ``apiVersion`` or ``kind`` are checked against the
+bundled schemas, each compiled once into a checker function on first use.
+"""
+from typing import Callable, Dict, Iterator, List, Optional
+import yaml
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+from .engine import Issue
+from .k8s_schemas import KINDS, METADATA
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+Checker = Callable[[Node, str], Iterator[Issue]]
+
+SCALAR_TAGS = {
+    "string": ("tag:yaml.org,2002:str",),
+    "integer": ("tag:yaml.org,2002:int",),
+    "number": ("tag:yaml.org,2002:int", "tag:yaml.org,2002:float"),
+    "boolean": ("tag:yaml.org,2002:bool",),
+    "int-or-string": ("tag:yaml.org,2002:int", "tag:yaml.org,2002:str"),
+}
+
+NULL = "tag:yaml.org,2002:null"
+
+_compiled: Dict[str, Checker] = {}
+
+def _line(node: Node) -> int:
+    return node.start_mark.line + 1
+
+def _describe(node: Node) -> str:
+    if isinstance(node, MappingNode):
+        return "a mapping"
+    if isinstance(node, SequenceNode):
+        return "a list"
+    return {
+        "tag:yaml.org,2002:int": "a number",
+        "tag:yaml.org,2002:float": "a number",
+        "tag:yaml.org,2002:bool": "a boolean",
+        NULL: "empty",
+    }.get(node.tag, f"{node.value!r}")
+
+def compile_schema(schema: Dict) -> Checker:
+    """Turn a schema into a function yielding the issues in a node."""
+    kind = schema["type"]
+
+    if kind == "object":
+        properties = {name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+        values = compile_schema(schema["values"]) if "values" in schema else None
+        required = schema.get("required", ())
+        closed = schema.get("closed", False)
+
+        def check_object(node: Node, path: str) -> Iterator[Issue]:
+            if not isinstance(node, MappingNode):
+                yield Issue(_line(node), f"{path} must be a mapping, found {_describe(node)}")
+                return
+            seen = set()
+            for key, value in node.value:
+                name = key.value if isinstance(key, ScalarNode) else str(key.value)
+                if name in seen:
+                    yield Issue(_line(key), f"{path}.{name} is set twice")
+                seen.add(name)
+                if isinstance(value, ScalarNode) and value.tag == NULL:
+                    continue
+                if name in properties:
+                    yield from properties[name](value, f"{path}.{name}")
+                elif values is not None:
+                    yield from values(value, f"{path}.{name}")
+                elif closed:
+                    yield Issue(_line(key), f"Unknown field {path}.{name}")
+            for name in required:
+                if name not in seen:
+                    yield Issue(_line(node), f"{path} is missing required field {name!r}")
+        return check_object
+
+    if kind == "array":
+        items = compile_schema(schema["items"])
+        min_items = schema.get("minItems", 0)
+
+        def check_array(node: Node, path: str) -> Iterator[Issue]:
+            if not isinstance(node, SequenceNode):
+                yield Issue(_line(node), f"{path} must be a list, found {_describe(node)}")
+                return
+            if len(node.value) < min_items:
+                yield Issue(_line(node), f"{path} needs at least {min_items} item{'s' if min_items != 1 else ''}")
+            for i, item in enumerate(node.value):
+                yield from items(item, f"{path}[{i}]")
+        return check_array
+
+    tags = SCALAR_TAGS[kind]
+    allowed = schema.get("enum")
+
+    def check_scalar(node: Node, path: str) -> Iterator[Issue]:
+        if not isinstance(node, ScalarNode) or node.tag not in tags:
+            yield Issue(_line(node), f"{path} must be {'an' if kind[0] in 'ai' else 'a'} {kind}, found {_describe(node)}")
+        elif allowed and node.value not in allowed:
+            yield Issue(_line(node), f"{path} must be one of {', '.join(allowed)}, found {node.value!r}")
+    return check_scalar
+
+def _kind_checker(kind: str) -> Checker:
+    checker = _compiled.get(kind)
+    if checker is None:
+        checker = _compiled[kind] = compile_schema(KINDS[kind][1])
+    return checker
+
+_check_metadata = compile_schema(METADATA)
+
+def _scalar(node: MappingNode, key: str) -> Optional[ScalarNode]:
+    for k, v in node.value:
+        if isinstance(k, ScalarNode) and k.value == key:
+            return v if isinstance(v, ScalarNode) and v.tag != NULL else None
+    return None
+
+def check_manifest(node: MappingNode) -> List[Issue]:
+    """Check one Kubernetes object against its bundled schema."""
+    issues = []
+    api_version = _scalar(node, "apiVersion")
+    kind = _scalar(node, "kind")
+    if api_version is None:
+        issues.append(Issue(_line(node), "Manifest is missing apiVersion"))
+    if kind is None:
+        issues.append(Issue(_line(node), "Manifest is missing kind"))
+        return issues
+
+    name = kind.value
+    metadata = next((v for k, v in node.value if isinstance(k, ScalarNode) and k.value == "metadata"), None)
+    if metadata is None:
+        issues.append(Issue(_line(node), f"{name} is missing metadata"))
+    else:
+        issues += _check_metadata(metadata, "metadata")
+        if isinstance(metadata, MappingNode) and not (_scalar(metadata, "name") or _scalar(metadata, "generateName")):
+            issues.append(Issue(_line(metadata), f"{name} metadata needs a name"))
+
+    if name in KINDS:
+        versions = KINDS[name][0]
+        if api_version is not None and api_version.value not in versions:
+            issues.append(Issue(_line(api_version), f"{name} is served by {' or '.join(versions)}, not {api_version.value}"))
+        issues += _kind_checker(name)(node, name)
+    return issues
+
+def check_yaml(code: str) -> List[Issue]:
+    """Check every YAML document, and Kubernetes objects against their schema."""
+    try:
+        documents = list(yaml.compose_all(code, Loader=Loader))
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        return [Issue(mark.line + 1 if mark else 1, f"Invalid YAML: {e.problem or e.context}")]
+    except yaml.YAMLError as e:
+        return [Issue(1, f"Invalid YAML: {e}")]
+
+    issues = []
+    for document in documents:
+        if isinstance(document, MappingNode) and (_scalar(document, "apiVersion") or _scalar(document, "kind")):
+            issues += check_manifest(document)
+    return issues
\ No newline at end of file
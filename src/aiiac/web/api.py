@@ -0,0 +1,247 @@
+"""HTTP API for the generators, for CI systems and other machine clients.
+
+Endpoints:
+
+- ``POST /v1/generate/{generator}`` takes a ``GenerateRequest`` and answers
+  with the ``GeneratorResponse``; with ``Accept: text/event-stream`` (or
+  ``?stream=1``) the text streams as server-sent ``chunk`` events followed
+  by one ``result`` event
+- ``GET /v1/generators`` lists the generators
+- ``GET /healthz`` reports liveness and load
+- ``GET /metrics`` serves the Prometheus metrics
+
+At most ``workers`` generations run at once and up to ``queue_size`` more
+wait for a slot; past that the server answers 429 with ``Retry-After``
+straight away rather than letting requests pile up. Waiting requests get
+slots by weighted fair queuing per tenant, the API key (``X-API-Key`` or
+``Authorization: Bearer``) or else the client address, and the same
+tenant is used by admission control in front of the model when it is on. On SIGINT/SIGTERM the
+server stops accepting connections, answers 503 to new requests on open
+ones, and gives running generations ``shutdown_timeout`` seconds to finish.
+
+Requests may only name the models the server was started with
+(``models``, else ``AIIAC_MODELS``) or the request default; others get 422.
+"""
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, Optional
+from aiohttp import web
+from pydantic import ValidationError
+from .. import registry
+from ..core.admission import FairQueue, current_tenant, get_admission, tenant
+from ..core.client import aclose, get_generator
+from ..core.metrics import get_metrics
+from ..core.tuning import configured_models
+from ..models.schemas import GenerateRequest, GeneratorResponse
+from ..orchestration.batch import request_kwargs
+
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_SHUTDOWN_TIMEOUT = 60.0
+RETRY_AFTER = 1
+
+class Busy(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+class Limiter:
+    """Bounded worker slots with a bounded, tenant-fair queue in front of them."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.draining = False
+        self._slots = FairQueue(workers)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a worker slot, waiting in the queue if needed; raises ``Busy``."""
+        if self.active + self.waiting >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise Busy()
+        self.waiting += 1
+        try:
+            await self._slots.aacquire(*current_tenant())
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def status(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "queued": self.waiting,
+            "queue_size": self.queue_size,
+            "rejected": self.rejected,
+        }
+
+LIMITER = web.AppKey("limiter", Limiter)
+MODELS = web.AppKey("models", frozenset)
+
+def _dump(response: GeneratorResponse) -> str:
+    # Keep the fields of template subclasses (provider, environment, ...)
+    return response.model_dump_json(serialize_as_any=True)
+
+def _error(status: int, message: str, retry: bool = False) -> web.Response:
+    body = _dump(GeneratorResponse(success=False, message=message))
+    headers = {"Retry-After": str(RETRY_AFTER)} if retry else None
+    return web.Response(status=status, text=body, content_type="application/json", headers=headers)
+
+def _tenant(request: web.Request) -> str:
+    """Who a request is for: its API key, or else the client address."""
+    key = request.headers.get("X-API-Key", "")
+    authorization = request.headers.get("Authorization", "")
+    if not key and authorization.lower().startswith("bearer "):
+        key = authorization[7:].strip()
+    if key:
+        # Tenants show up in metrics; never the key itself
+        return "key:" + hashlib.sha256(key.encode()).hexdigest()[:12]
+    return f"client:{request.remote}"
+
+def _wants_stream(request: web.Request) -> bool:
+    if request.query.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return "text/event-stream" in request.headers.get("Accept", "")
+
+def _event(name: str, data: str) -> bytes:
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {name}\n{lines}\n".encode()
+
+async def generate(request: web.Request) -> web.StreamResponse:
+    """Run one generation, answering in JSON or as server-sent events."""
+    limiter = request.app[LIMITER]
+    if limiter.draining:
+        return _error(503, "Server is shutting down", retry=True)
+    try:
+        generator_class = registry.load_generator(request.match_info["generator"])
+    except KeyError:
+        return _error(404, f"Generator {request.match_info['generator']} not supported")
+    try:
+        body = GenerateRequest.model_validate_json(await request.read())
+    except ValidationError as e:
+        return _error(422, str(e))
+
+    if body.model not in request.app[MODELS]:
+        return _error(422, f"Model {body.model} is not served here")
+
+    generator = get_generator(generator_class, body.model)
+    kwargs = request_kwargs(request.match_info["generator"], body)
+    try:
+        with tenant(_tenant(request)):
+            async with limiter.slot():
+                if not _wants_stream(request):
+                    response = await generator.agenerate(body.prompt, **kwargs)
+                    return web.Response(text=_dump(response), content_type="application/json")
+                return await _stream(request, generator.agenerate_stream(body.prompt, **kwargs))
+    except Busy:
+        return _error(429, "All workers are busy, retry later", retry=True)
+
+async def _stream(request: web.Request, stream) -> web.StreamResponse:
+    """Send a generation as ``chunk`` events and a final ``result`` event."""
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+    try:
+        async for chunk in stream:
+            await response.write(_event("chunk", json.dumps({"text": chunk})))
+        await response.write(_event("result", _dump(stream.response)))
+    finally:
+        # A client that went away cancels us here; stop the generation too
+        await stream.aclose()
+    await response.write_eof()
+    return response
+
+async def generators(request: web.Request) -> web.Response:
+    return web.json_response({
+        name: {"title": info.title, "providers": list(info.providers), "templates": list(info.templates)}
+        for name, info in registry.GENERATORS.items()
+    })
+
+async def health(request: web.Request) -> web.Response:
+    limiter = request.app[LIMITER]
+    status = "draining" if limiter.draining else "ok"
+    body = {"status": status, **limiter.status()}
+    admission = get_admission()
+    if admission is not None:
+        body["admission"] = admission.status()
+    return web.json_response(body, status=503 if limiter.draining else 200)
+
+async def metrics(request: web.Request) -> web.Response:
+    limiter = request.app[LIMITER]
+    lines = [get_metrics().render_prometheus().rstrip("\n")]
+    for name, kind, value, help_text in (
+        ("aiiac_server_active", "gauge", limiter.active, "Generations running"),
+        ("aiiac_server_queued", "gauge", limiter.waiting, "Requests waiting for a worker"),
+        ("aiiac_server_rejected_total", "counter", limiter.rejected, "Requests turned away with 429"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    admission = get_admission()
+    if admission is not None:
+        status = admission.status()
+        for name, kind, value, help_text in (
+            ("aiiac_admission_limit", "gauge", status["limit"], "Model requests allowed in flight"),
+            ("aiiac_admission_in_flight", "gauge", status["active"], "Model requests in flight"),
+            ("aiiac_admission_queued", "gauge", status["queued"], "Model requests waiting for a slot"),
+            ("aiiac_admission_admitted_total", "counter", status["admitted"], "Model requests admitted"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        lines += [
+            "# HELP aiiac_admission_tenant_queued Model requests waiting for a slot, per tenant",
+            "# TYPE aiiac_admission_tenant_queued gauge",
+        ]
+        lines += [f'aiiac_admission_tenant_queued{{tenant="{name}"}} {count}' for name, count in status["tenants"].items()]
+    return web.Response(text="\n".join(lines) + "\n", content_type="text/plain", charset="utf-8")
+
+async def _drain(app: web.Application) -> None:
+    app[LIMITER].draining = True
+
+async def _close_sessions(app: web.Application) -> None:
+    await aclose()
+
+def create_app(
+    workers: int = DEFAULT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    models: Optional[Iterable[str]] = None
+) -> web.Application:
+    """Build the API application, serving ``models`` (default: ``AIIAC_MODELS``)."""
+    app = web.Application()
+    app[LIMITER] = Limiter(workers, queue_size)
+    # Every model name becomes a cached client, so only known ones are taken
+    app[MODELS] = frozenset([*(models or configured_models()), GenerateRequest.model_fields["model"].default])
+    app.router.add_post("/v1/generate/{generator}", generate)
+    app.router.add_get("/v1/generators", generators)
+    app.router.add_get("/healthz", health)
+    app.router.add_get("/metrics", metrics)
+    app.on_shutdown.append(_drain)
+    app.on_cleanup.append(_close_sessions)
+    return app
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = DEFAULT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    shutdown_timeout: float = DEFAULT_SHUTDOWN_TIMEOUT,
+    models: Optional[Iterable[str]] = None
+) -> None:
+    """Run the API until SIGINT or SIGTERM, then shut down gracefully."""
+    web.run_app(
+        create_app(workers, queue_size, models),
+        host=host,
+        port=port,
+        shutdown_timeout=shutdown_timeout,
+        # A client hanging up stops its generation
+        handler_cancellation=True,
+        access_log=None
+    )
\ No newline at end of file
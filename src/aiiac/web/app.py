@@ -1,20 +1,66 @@
 import streamlit as st
 from pathlib import Path
+import json
+import os
 import sys
-from typing import Optional
+import threading
+import uuid
+from typing import Dict, Optional
 
 # Add the project root to Python path
-from aiiac.generators.iac import IaCGenerator
-from aiiac.generators.config import ConfigGenerator
-from aiiac.generators.pipeline import PipelineGenerator
-from aiiac.generators.utility import UtilityGenerator
+from aiiac import registry
+from aiiac.core.admission import tenant
+from aiiac.core.client import get_generator
+from aiiac.core.tuning import configured_models, warm_up
+from aiiac.models.schemas import GeneratorResponse
+from aiiac.web.jobs import JobManager, stack_work, stream_work
+
+JOB_POLL_SECONDS = 0.5
+RESULT_TTL_SECONDS = 3600
+
+@st.cache_resource
+def load_generator(name: str):
+    """Return the generator shared by every session."""
+    return get_generator(registry.load_generator(name))
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """Return the background executor shared by every session."""
+    return JobManager(max_workers=int(os.environ.get("AIIAC_WEB_WORKERS", "4")))
+
+@st.cache_resource
+def preload_models() -> threading.Thread:
+    """Load the configured models once per server, without holding up the page."""
+    thread = threading.Thread(target=warm_up, args=(configured_models(),), name="aiiac-warmup", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, show_spinner=False)
+def cached_result(key: str, _job=None) -> Dict:
+    """Finished results, keyed on the request inputs.
+    
+    Called with a finished job to store its result and without one to look
+    a result up; a miss raises ``LookupError``, which Streamlit never caches.
+    """
+    if _job is None or _job.response is None or not _job.response.success:
+        raise LookupError(key)
+    return _job.response.model_dump()
 
 def init_session_state():
     """Initialize session state variables."""
     if 'generated_code' not in st.session_state:
         st.session_state.generated_code = None
+    if 'generated_templates' not in st.session_state:
+        st.session_state.generated_templates = []
     if 'current_tab' not in st.session_state:
         st.session_state.current_tab = 'Infrastructure'
+    if 'job' not in st.session_state:
+        st.session_state.job = None
+    if 'notice' not in st.session_state:
+        st.session_state.notice = None
+    if 'tenant' not in st.session_state:
+        # Sessions share the model fairly under admission control
+        st.session_state.tenant = f"session:{uuid.uuid4().hex[:12]}"
 
 def render_header():
     """Render the application header."""
@@ -23,6 +69,30 @@ def render_header():
     Generate Infrastructure as Code, configurations, and CI/CD pipelines using AI.
     """)
 
+def render_decoding_options() -> Dict:
+    """Sidebar overrides for the output limits of every generation."""
+    st.sidebar.header("Output Limits")
+    max_tokens = st.sidebar.number_input(
+        "Max Tokens",
+        min_value=0,
+        value=0,
+        step=128,
+        help="Output token budget; 0 uses each template's default"
+    )
+    temperature = st.sidebar.slider("Temperature", 0.0, 1.0, 0.1, 0.05)
+    stop_at_fence = st.sidebar.checkbox(
+        "Stop after the code block",
+        value=True,
+        help="End generation at the closing code fence instead of letting the model explain"
+    )
+    
+    decoding = {"temperature": temperature}
+    if max_tokens:
+        decoding["num_predict"] = int(max_tokens)
+    if not stop_at_fence:
+        decoding["stop"] = []
+    return decoding
+
 def render_infrastructure_tab():
     """Render infrastructure generation tab."""
     st.header("Generate Infrastructure Code")
@@ -47,19 +117,13 @@ def render_infrastructure_tab():
     )
     
     if st.button("Generate Infrastructure"):
-        with st.spinner("Generating infrastructure code..."):
-            generator = IaCGenerator()
-            result = generator.generate(
-                description,
-                provider=cloud_provider,
-                template_type=template_type
-            )
-            
-            if result.success:
-                st.session_state.generated_code = result.templates[0].code
-                st.success("Infrastructure code generated successfully!")
-            else:
-                st.error(f"Error: {result.message}")
+        start_generation(
+            "iac",
+            description,
+            "Infrastructure code generated successfully!",
+            provider=cloud_provider,
+            template_type=template_type
+        )
 
 def render_configuration_tab():
     """Render configuration generation tab."""
@@ -81,19 +145,13 @@ def render_configuration_tab():
     )
     
     if st.button("Generate Configuration"):
-        with st.spinner("Generating configuration..."):
-            generator = ConfigGenerator()
-            result = generator.generate(
-                description,
-                config_type=config_type,
-                environment=environment
-            )
-            
-            if result.success:
-                st.session_state.generated_code = result.templates[0].code
-                st.success("Configuration generated successfully!")
-            else:
-                st.error(f"Error: {result.message}")
+        start_generation(
+            "config",
+            description,
+            "Configuration generated successfully!",
+            config_type=config_type,
+            environment=environment
+        )
 
 def render_pipeline_tab():
     """Render pipeline generation tab."""
@@ -110,18 +168,62 @@ def render_pipeline_tab():
     )
     
     if st.button("Generate Pipeline"):
-        with st.spinner("Generating pipeline..."):
-            generator = PipelineGenerator()
-            result = generator.generate(
-                description,
-                platform=platform
-            )
-            
-            if result.success:
-                st.session_state.generated_code = result.templates[0].code
-                st.success("Pipeline generated successfully!")
-            else:
-                st.error(f"Error: {result.message}")
+        start_generation(
+            "pipeline",
+            description,
+            "Pipeline generated successfully!",
+            platform=platform
+        )
+
+def render_stack_tab():
+    """Render full-stack generation tab."""
+    st.header("Generate Full Stack")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        cloud_provider = st.selectbox(
+            "Cloud Provider",
+            ["aws", "azure", "gcp"],
+            key="stack_cloud"
+        )
+    
+    with col2:
+        environment = st.selectbox(
+            "Environment",
+            ["development", "staging", "production"],
+            key="stack_environment"
+        )
+    
+    with col3:
+        platform = st.selectbox(
+            "CI/CD Platform",
+            ["github", "gitlab", "jenkins"],
+            key="stack_platform"
+        )
+    
+    config_types = st.multiselect(
+        "Configurations",
+        ["kubernetes", "docker", "terraform_vars"],
+        default=["kubernetes"]
+    )
+    
+    description = st.text_area(
+        "Stack Description",
+        placeholder="Example: Python API on ECS with Postgres, deployed from GitHub",
+        key="stack_description"
+    )
+    
+    if st.button("Generate Stack"):
+        start_generation(
+            "stack",
+            description,
+            "Stack generated successfully!",
+            provider=cloud_provider,
+            config_types=config_types,
+            environment=environment,
+            platform=platform
+        )
 
 def render_utility_tab():
     """Render utility generation tab."""
@@ -138,18 +240,84 @@ def render_utility_tab():
     )
     
     if st.button("Generate Utility"):
-        with st.spinner("Generating utility code..."):
-            generator = UtilityGenerator()
-            result = generator.generate(
-                description,
-                utility_type=utility_type
-            )
-            
-            if result.success:
-                st.session_state.generated_code = result.templates[0].code
-                st.success("Utility code generated successfully!")
-            else:
-                st.error(f"Error: {result.message}")
+        start_generation(
+            "util",
+            description,
+            "Utility code generated successfully!",
+            utility_type=utility_type
+        )
+
+def start_generation(kind: str, description: str, success_message: str, **kwargs):
+    """Serve a request from the result cache or start a background job."""
+    decoding = st.session_state.decoding
+    key = json.dumps({"kind": kind, "description": description, **kwargs, **decoding}, sort_keys=True)
+    try:
+        _apply_result(GeneratorResponse(**cached_result(key)), success_message)
+        return
+    except LookupError:
+        pass
+    
+    if kind == "stack":
+        work = stack_work(description, options=decoding, **kwargs)
+    else:
+        work = stream_work(load_generator(kind), description, **kwargs, **decoding)
+    
+    manager = get_job_manager()
+    if st.session_state.job is not None:
+        manager.release(st.session_state.job)
+    with tenant(st.session_state.tenant):
+        st.session_state.job = manager.submit(key, work, label=success_message)
+    st.session_state.notice = None
+
+def _apply_result(result: GeneratorResponse, success_message: str):
+    """Store a finished result for the output section."""
+    if result.templates:
+        st.session_state.generated_code = "\n\n".join(t.code for t in result.templates)
+        st.session_state.generated_templates = result.templates if len(result.templates) > 1 else []
+    if result.success:
+        st.session_state.notice = ("success", success_message)
+    else:
+        st.session_state.notice = ("error", f"Error: {result.message}")
+
+def render_job():
+    """Show the running job's progress, polling until it finishes."""
+    job = st.session_state.job
+    
+    @st.fragment(run_every=JOB_POLL_SECONDS if job is not None else None)
+    def job_status():
+        job = st.session_state.job
+        if job is None:
+            return
+        
+        if not job.done:
+            st.caption(f"Generating ({job.status}, {job.elapsed:.0f}s)...")
+            if job.text:
+                st.code(job.text)
+            if st.button("Cancel", key=f"cancel-{job.id}"):
+                get_job_manager().release(job)
+                st.session_state.job = None
+                st.session_state.notice = ("warning", "Generation cancelled")
+                st.rerun()
+            return
+        
+        st.session_state.job = None
+        if job.status == "done":
+            if job.response.success:
+                cached_result(job.key, job)
+            _apply_result(job.response, job.label)
+        elif job.status == "cancelled":
+            st.session_state.notice = ("warning", "Generation cancelled")
+        else:
+            st.session_state.notice = ("error", f"Error: {job.error}")
+        st.rerun()
+    
+    job_status()
+    
+    # Show the outcome once, like the inline messages it replaces
+    notice = st.session_state.notice
+    st.session_state.notice = None
+    if notice:
+        getattr(st, notice[0])(notice[1])
 
 def render_output():
     """Render the generated code output."""
@@ -159,7 +327,12 @@ def render_output():
         col1, col2 = st.columns([3, 1])
         
         with col1:
-            st.code(st.session_state.generated_code)
+            if st.session_state.generated_templates:
+                for template in st.session_state.generated_templates:
+                    st.subheader(template.description)
+                    st.code(template.code)
+            else:
+                st.code(st.session_state.generated_code)
         
         with col2:
             if st.button("Copy to Clipboard"):
@@ -173,14 +346,17 @@ def render_output():
 
 def main():
     """Main application function."""
+    preload_models()
     init_session_state()
     render_header()
+    st.session_state.decoding = render_decoding_options()
     
     # Create tabs
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Infrastructure",
         "Configuration",
         "Pipeline",
+        "Stack",
         "Utility"
     ])
     
@@ -194,9 +370,13 @@ def main():
         render_pipeline_tab()
     
     with tab4:
+        render_stack_tab()
+    
+    with tab5:
         render_utility_tab()
     
-    # Render output section
+    # Render background job progress and output section
+    render_job()
     render_output()
 
 if __name__ == "__main__":
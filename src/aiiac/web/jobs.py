@@ -0,0 +1,183 @@
+"""Background generation jobs for the web interface.
+
+Generations run on a thread pool shared by every Streamlit session, so a
+long LLM call never blocks a session's reruns. Identical requests that are
+already running are shared rather than started again, and a job is only
+cancelled once every session waiting on it has let go. A job runs in the
+context it was submitted from, so its model requests count against the
+submitting session's tenant.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from ..core.client import aclose
+from ..models.schemas import GeneratorResponse
+from ..orchestration.stack import run_stack
+
+class JobCancelled(Exception):
+    """Raised inside a job's work when the job has been cancelled."""
+
+class GenerationJob:
+    """A generation running on the background executor."""
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.response: Optional[GeneratorResponse] = None
+        self.error: Optional[str] = None
+        self.submitted = time.monotonic()
+        self.finished: Optional[float] = None
+        self.subscribers = 0
+        self._parts: List[str] = []
+        self._cancelled = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        """Output produced so far."""
+        return "".join(self._parts)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.submitted
+
+    def append(self, text: str) -> None:
+        """Record progress output; raises ``JobCancelled`` once cancelled."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self._parts.append(text)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run a callback when the job is cancelled, e.g. to stop a loop."""
+        with self._lock:
+            self._cancel_callbacks.append(callback)
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            callback()
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next opportunity."""
+        with self._lock:
+            self._cancelled.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            callback()
+
+def stream_work(generator, prompt: str, **kwargs) -> Callable[[GenerationJob], GeneratorResponse]:
+    """Job work that streams a generator's output into the job."""
+    def work(job: GenerationJob) -> GeneratorResponse:
+        stream = generator.generate_stream(prompt, **kwargs)
+        chunks = iter(stream)
+        try:
+            for chunk in chunks:
+                job.append(chunk)
+        finally:
+            # Closing the stream also closes the request to the model
+            chunks.close()
+        return stream.response
+    return work
+
+def stack_work(description: str, **kwargs) -> Callable[[GenerationJob], GeneratorResponse]:
+    """Job work that generates a full stack, reporting each finished node."""
+    def work(job: GenerationJob) -> GeneratorResponse:
+        def report(name, response, elapsed):
+            job.append(f"{'✓' if response.success else '✗'} {name} ({elapsed:.1f}s)\n")
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            task = asyncio.current_task()
+
+            def cancel():
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # loop already closed, nothing left to cancel
+
+            job.on_cancel(cancel)
+            try:
+                return await run_stack(description, on_node=report, **kwargs)
+            finally:
+                await aclose()
+
+        return asyncio.run(run())
+    return work
+
+class JobManager:
+    """Runs generation jobs on a shared thread pool, one per distinct request."""
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aiiac-job")
+        self._active: Dict[str, GenerationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key: str,
+        work: Callable[[GenerationJob], GeneratorResponse],
+        label: str = ""
+    ) -> GenerationJob:
+        """Start a job, or join the running job for the same key."""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None and not job.done and not job.cancelled:
+                job.subscribers += 1
+                return job
+
+            job = GenerationJob(key, label)
+            job.subscribers = 1
+            self._active[key] = job
+        self._executor.submit(contextvars.copy_context().run, self._run, job, work)
+        return job
+
+    def release(self, job: GenerationJob) -> None:
+        """Stop waiting for a job; cancels it when nobody else waits."""
+        with self._lock:
+            job.subscribers = max(job.subscribers - 1, 0)
+            orphaned = job.subscribers == 0 and not job.done
+        if orphaned:
+            job.cancel()
+
+    def active_jobs(self) -> List[GenerationJob]:
+        """Jobs that are queued or running."""
+        with self._lock:
+            return [job for job in self._active.values() if not job.done]
+
+    def shutdown(self) -> None:
+        """Cancel running jobs and stop the worker threads."""
+        for job in self.active_jobs():
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: GenerationJob, work: Callable[[GenerationJob], GeneratorResponse]) -> None:
+        if job.cancelled:
+            job.status = "cancelled"
+        else:
+            job.status = "running"
+            try:
+                job.response = work(job)
+                job.status = "cancelled" if job.cancelled else "done"
+            except JobCancelled:
+                job.status = "cancelled"
+            except BaseException as e:
+                job.status = "cancelled" if job.cancelled else "failed"
+                job.error = str(e) or type(e).__name__
+        job.finished = time.monotonic()
+
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
\ No newline at end of file
@@ -0,0 +1,19 @@
+import io
+import pytest
+from aiiac.testing.ollama import StandInOllama
+
+@pytest.fixture(scope="module")
+def stand_in():
+    """One unpaced stand-in server per module, so only client time is measured."""
+    with StandInOllama() as server:
+        yield server
+
+@pytest.fixture
+def quiet_console(monkeypatch):
+    """Render CLI output into memory instead of the terminal."""
+    from aiiac import cli
+    from rich.console import Console
+
+    console = Console(file=io.StringIO(), width=120, force_terminal=True)
+    monkeypatch.setattr(cli, "console", console)
+    return console
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from aiiac.core import client
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.iac import IaCGenerator
+from aiiac.generators.pipeline import PipelineGenerator
+from aiiac.generators.utility import UtilityGenerator
+from aiiac.testing.ollama import JENKINS_SAMPLE, canned_response
+
+pytest.importorskip("pytest_benchmark")
+
+CASES = [
+    (IaCGenerator, {"provider": "aws", "template_type": "terraform"}),
+    (ConfigGenerator, {"config_type": "kubernetes"}),
+    (ConfigGenerator, {"config_type": "docker"}),
+    (ConfigGenerator, {"config_type": "terraform_vars"}),
+    (PipelineGenerator, {"platform": "github"}),
+    (PipelineGenerator, {"platform": "gitlab"}),
+    (PipelineGenerator, {"platform": "jenkins"}),
+    (UtilityGenerator, {"utility_type": "network_scanner"}),
+    (UtilityGenerator, {"utility_type": "kubectl"}),
+    (UtilityGenerator, {"utility_type": "mongo_query"}),
+]
+
+IDS = [f"{cls.__name__}-{next(iter(kwargs.values()))}" for cls, kwargs in CASES]
+
+@pytest.fixture
+def stand_in_client(stand_in, monkeypatch):
+    monkeypatch.setenv("AIIAC_OLLAMA_URL", stand_in.url)
+    client.reset()
+
+@pytest.mark.parametrize("generator_class,kwargs", CASES, ids=IDS)
+def test_build_prompt(benchmark, generator_class, kwargs):
+    """Benchmark formatting each generator's prompt template."""
+    generator = generator_class()
+    prompt = benchmark(generator._build_prompt, "Python API with a Postgres database", **kwargs)
+    assert prompt
+
+@pytest.mark.parametrize("generator_class,kwargs", CASES, ids=IDS)
+def test_build_response(benchmark, generator_class, kwargs):
+    """Benchmark wrapping generated code in a GeneratorResponse."""
+    generator = generator_class()
+    code = canned_response(generator._build_prompt("API", **kwargs))
+    response = benchmark(generator._finish, code, {"cache": {"status": "miss"}}, **kwargs)
+    assert response.success
+
+def test_extract_stages(benchmark):
+    """Benchmark stage extraction on a long Jenkinsfile."""
+    code = JENKINS_SAMPLE * 50
+    stages = benchmark(PipelineGenerator()._extract_stages, code)
+    assert len(stages) == 100
+
+@pytest.mark.parametrize("generator_class,kwargs", CASES[:1] + CASES[4:5], ids=IDS[:1] + IDS[4:5])
+def test_generate_round_trip(benchmark, stand_in_client, generator_class, kwargs):
+    """Benchmark a full uncached generation against the unpaced stand-in."""
+    generator = generator_class()
+    response = benchmark(generator.generate, "API", use_cache=False, **kwargs)
+    assert response.success
+
+def test_generate_stream_round_trip(benchmark, stand_in_client):
+    """Benchmark streaming a generation chunk by chunk."""
+    generator = IaCGenerator()
+
+    def run():
+        stream = generator.generate_stream("API", use_cache=False)
+        for _ in stream:
+            pass
+        return stream.response
+
+    assert benchmark(run).success
+
+def test_agenerate_round_trip(benchmark, stand_in_client):
+    """Benchmark the asyncio path, including its event loop and session."""
+    generator = IaCGenerator()
+    loop = asyncio.new_event_loop()
+    try:
+        response = benchmark(lambda: loop.run_until_complete(generator.agenerate("API", use_cache=False)))
+        loop.run_until_complete(client.aclose())
+    finally:
+        loop.close()
+    assert response.success
+
+def test_generate_cache_hit(benchmark, stand_in_client):
+    """Benchmark answering a repeated prompt from the response cache."""
+    generator = IaCGenerator()
+    generator.generate("API")
+    response = benchmark(generator.generate, "API")
+    assert response.metadata["cache"]["status"] == "hit"
\ No newline at end of file
@@ -0,0 +1,26 @@
+import pytest
+from aiiac import cli
+from aiiac.generators.iac import IaCGenerator
+from aiiac.generators.pipeline import PipelineGenerator
+from aiiac.testing.ollama import GITHUB_SAMPLE, TERRAFORM_SAMPLE
+from aiiac.utils.validators import validate_output
+
+pytest.importorskip("pytest_benchmark")
+
+SAMPLES = {
+    "terraform": TERRAFORM_SAMPLE,
+    "yaml": GITHUB_SAMPLE,
+    "python": "def handler(event):\n    return event\n" * 20,
+}
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_validate_output(benchmark, language):
+    """Benchmark validating generated code."""
+    assert benchmark(validate_output, SAMPLES[language], language)
+
+def test_display_result(benchmark, quiet_console):
+    """Benchmark rendering a response with Rich syntax highlighting."""
+    result = IaCGenerator()._finish(TERRAFORM_SAMPLE, None)
+    result.templates += PipelineGenerator()._finish(GITHUB_SAMPLE, None).templates
+    benchmark(cli._display_and_save_result, result, None)
+    assert "aws_s3_bucket" in quiet_console.file.getvalue()
\ No newline at end of file
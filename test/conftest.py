@@ -0,0 +1,70 @@
+import asyncio
+import os
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiiac.core import cache, client
+from aiiac.testing.ollama import StandInOllama
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Run the benchmarks once, as plain tests, unless timings are wanted.
+
+    Pass --benchmark-enable or --benchmark-only to measure them.
+    """
+    option = config.option
+    if hasattr(option, "benchmark_disable") and not option.benchmark_only:
+        option.benchmark_disable = True
+
+@pytest.fixture(autouse=True)
+def response_cache(tmp_path):
+    """Give every test its own empty response cache."""
+    isolated = cache.ResponseCache(tmp_path / "responses.sqlite")
+    cache.set_cache(isolated)
+    yield isolated
+    cache.set_cache(None)
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    """Drop shared clients so tests never reuse another test's base_url."""
+    client.reset()
+    yield
+    client.reset()
+
+@pytest.fixture
+def run_with_server():
+    """Run an async scenario against a local /api/generate handler.
+
+    The scenario receives the server's base URL; its return value is
+    passed back to the test.
+    """
+    def run(handler, scenario):
+        async def main():
+            app = web.Application()
+            app.router.add_post("/api/generate", handler)
+            server = TestServer(app, handler_cancellation=True)
+            await server.start_server()
+            try:
+                return await scenario(str(server.make_url("")).rstrip("/"))
+            finally:
+                await client.aclose()
+                await server.close()
+
+        return asyncio.run(main())
+    return run
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Point every client at a stand-in Ollama server.
+
+    Set AIIAC_OLLAMA_URL to run against a real server instead; the
+    fixture then yields None.
+    """
+    if os.environ.get("AIIAC_OLLAMA_URL"):
+        yield None
+        return
+
+    with StandInOllama() as server:
+        monkeypatch.setenv("AIIAC_OLLAMA_URL", server.url)
+        client.reset()
+        yield server
\ No newline at end of file
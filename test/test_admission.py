@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+import pytest
+from aiiac.core import client
+from aiiac.core.admission import Admission, FairQueue, configure_admission, get_admission, tenant
+from aiiac.generators.iac import IaCGenerator
+
+@pytest.fixture(autouse=True)
+def admission_off():
+    yield
+    configure_admission(None)
+
+def test_waiting_tenants_share_slots_fairly():
+    """Test one tenant's backlog does not hold up another's request, and weights count."""
+    async def scenario():
+        queue = FairQueue(1)
+        order = []
+
+        async def request(name, weight=1.0):
+            await queue.aacquire(name, weight)
+            order.append(name)
+            await asyncio.sleep(0)
+            queue.release()
+
+        await queue.aacquire("holder")
+        tasks = [asyncio.create_task(request("batch")) for _ in range(4)]
+        tasks += [asyncio.create_task(request("web", 2.0)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert queue.status()["tenants"] == {"batch": 4, "web": 2}
+        queue.release()
+        await asyncio.gather(*tasks)
+        return order, queue.status()
+
+    order, status = asyncio.run(scenario())
+
+    assert order == ["web", "batch", "web", "batch", "batch", "batch"]
+    assert status["queued"] == 0 and status["active"] == 0 and status["admitted"] == 7
+
+def test_limit_grows_while_in_use_and_backs_off_on_congestion():
+    """Test additive increase under load, multiplicative decrease on slow or failed requests."""
+    admission = Admission(2, max_limit=4)
+
+    admission.record(0.01)
+    assert admission.limit == 2 and admission.increases == 0  # idle: nothing to learn
+    with admission.slot(), admission.slot():
+        for _ in range(6):
+            admission.record(0.01)
+    # Grows only while two requests fill it: 2 -> 2.5 -> 2.9 -> 3.2
+    assert admission.limit == 3 and admission.increases == 3
+
+    admission.record(0.1)
+    assert admission.limit == 2 and admission.decreases == 1
+    with pytest.raises(RuntimeError):
+        with admission.slot():
+            raise RuntimeError("connection reset")
+    assert admission.decreases == 2 and admission.status()["active"] == 0
+
+def test_abandoned_waiters_give_their_slot_back():
+    """Test a waiter that is cancelled leaves the queue and the slot goes on."""
+    async def scenario():
+        queue = FairQueue(1)
+        await queue.aacquire("a")
+        waiting = asyncio.create_task(queue.aacquire("b"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        queue.release()
+        await asyncio.wait_for(queue.aacquire("c"), 1)
+        return queue.status()
+
+    status = asyncio.run(scenario())
+    assert status["active"] == 1 and status["queued"] == 0 and status["tenants"] == {}
+
+def test_generations_wait_for_admission(ollama):
+    """Test model requests stay within the limit and report their wait and tenant."""
+    configure_admission(2, max_limit=2)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def responder(body):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return '```hcl\nresource "aws_s3_bucket" "b" {}\n```\n'
+
+    ollama.responder = responder
+    generator = IaCGenerator()
+
+    async def one(name, n):
+        with tenant(name):
+            return await generator.agenerate(f"bucket {n}", provider="aws", use_cache=False)
+
+    async def scenario():
+        return await asyncio.gather(*(one("batch" if n < 4 else "web", n) for n in range(6)))
+
+    responses = asyncio.run(scenario())
+    streamed = list(generator.generate_stream("bucket", provider="aws", use_cache=False))
+
+    assert running[1] == 2
+    assert all(r.success for r in responses) and streamed
+    assert {r.metadata["metrics"]["tenant"] for r in responses} == {"batch", "web"}
+    assert max(r.metadata["metrics"]["admission"] for r in responses) > 0.04
+    assert get_admission().status()["admitted"] == 7
+
+def test_admission_waits_end_at_the_deadline(ollama):
+    """Test a call queued behind a saturated slot gives up at its deadline and leaves the queue."""
+    configure_admission(1, max_limit=1)
+
+    def responder(body):
+        ollama.sleep(1.5)
+        return '```hcl\nresource "aws_s3_bucket" "b" {}\n```\n'
+
+    ollama.responder = responder
+    generator = IaCGenerator()
+    holder = threading.Thread(target=generator.generate, args=("slow bucket",), kwargs={"use_cache": False})
+    holder.start()
+    while not get_admission().status()["active"]:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    response = generator.generate("bucket", provider="aws", use_cache=False, timeout=0.3)
+    waited = time.monotonic() - started
+
+    async def queued():
+        try:
+            return await generator.agenerate("bucket", provider="aws", use_cache=False, timeout=0.3)
+        finally:
+            await client.aclose()
+
+    async_response = asyncio.run(queued())
+    status = get_admission().status()
+    holder.join()
+
+    assert not response.success and "0.3s deadline" in response.message
+    assert not async_response.success and "0.3s deadline" in async_response.message
+    assert waited < 1.0
+    assert status["queued"] == 0 and status["active"] == 1
+    assert len(ollama.requests) == 1
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+from aiiac.core import client
+from aiiac.core.admission import configure_admission
+from aiiac.web.api import LIMITER, create_app
+
+@pytest.fixture
+def run_api():
+    """Run an async scenario against the API, given its base URL and a session."""
+    def run(scenario, **settings):
+        async def main():
+            server = TestServer(create_app(**settings))
+            await server.start_server()
+            try:
+                async with ClientSession() as session:
+                    return await scenario(str(server.make_url("")).rstrip("/"), session, server)
+            finally:
+                await server.close()
+                await client.aclose()
+
+        return asyncio.run(main())
+    return run
+
+def events(text):
+    """Parse a server-sent event stream into (event, data) pairs."""
+    parsed = []
+    for block in text.strip().split("\n\n"):
+        fields = [line.split(": ", 1) for line in block.split("\n")]
+        name = next(value for key, value in fields if key == "event")
+        parsed.append((name, "\n".join(value for key, value in fields if key == "data")))
+    return parsed
+
+def test_generate_answers_with_the_response_schema(ollama, run_api):
+    """Test a JSON request gets a GeneratorResponse back, and bad ones are refused."""
+    async def scenario(url, session, server):
+        async with session.post(f"{url}/v1/generate/iac", json={"prompt": "S3 bucket", "provider": "aws"}) as r:
+            ok = (r.status, await r.json())
+        async with session.post(f"{url}/v1/generate/ansible", json={"prompt": "x"}) as r:
+            unknown = r.status
+        async with session.post(f"{url}/v1/generate/iac", json={"provider": "aws"}) as r:
+            invalid = (r.status, await r.json())
+        async with session.post(f"{url}/v1/generate/iac", json={"prompt": "S3 bucket", "samples": 10000}) as r:
+            oversampled = (r.status, await r.json())
+        async with session.post(f"{url}/v1/generate/iac", json={"prompt": "S3 bucket", "model": "random-name"}) as r:
+            unserved = (r.status, await r.json())
+        timeouts = []
+        for timeout in (0, -1, 1e9):
+            async with session.post(f"{url}/v1/generate/iac", json={"prompt": "S3 bucket", "timeout": timeout}) as r:
+                timeouts.append((r.status, await r.json()))
+        async with session.get(f"{url}/v1/generators") as r:
+            listed = await r.json()
+        return ok, unknown, invalid, oversampled, unserved, timeouts, listed
+
+    (status, body), unknown, invalid, oversampled, unserved, timeouts, listed = run_api(scenario)
+
+    assert status == 200 and body["success"] and body["templates"][0]["provider"] == "aws"
+    assert body["metadata"]["valid"] is True
+    assert unknown == 404
+    assert invalid[0] == 422 and not invalid[1]["success"] and "prompt" in invalid[1]["message"]
+    assert oversampled[0] == 422 and "samples" in oversampled[1]["message"]
+    assert all(status == 422 and "timeout" in body["message"] for status, body in timeouts)
+    assert unserved[0] == 422 and unserved[1]["message"] == "Model random-name is not served here"
+    assert "random-name" not in client._llms
+    assert set(listed) == {"iac", "config", "pipeline", "util"}
+
+def test_generate_streams_server_sent_events(ollama, run_api):
+    """Test chunks arrive as events and end with the full response."""
+    async def scenario(url, session, server):
+        headers = {"Accept": "text/event-stream"}
+        async with session.post(f"{url}/v1/generate/config", json={"prompt": "web app", "type": "kubernetes"}, headers=headers) as r:
+            return r.headers["Content-Type"], await r.text()
+
+    content_type, text = run_api(scenario)
+    parsed = events(text)
+
+    assert content_type == "text/event-stream"
+    assert {name for name, _ in parsed[:-1]} == {"chunk"} and len(parsed) > 2
+    name, data = parsed[-1]
+    result = json.loads(data)
+    assert name == "result" and result["success"]
+    assert "".join(json.loads(data)["text"] for _, data in parsed[:-1]) in result["templates"][0]["code"]
+
+def test_full_queue_is_refused_with_429(ollama, run_api):
+    """Test requests past the workers and queue are turned away at once."""
+    ollama.latency = 0.3
+
+    async def scenario(url, session, server):
+        async def post(i):
+            body = {"prompt": f"pods {i}", "type": "kubectl", "use_cache": False}
+            async with session.post(f"{url}/v1/generate/util", json=body) as r:
+                return r.status, r.headers.get("Retry-After")
+        statuses = await asyncio.gather(*(post(i) for i in range(4)))
+        async with session.get(f"{url}/metrics") as r:
+            return statuses, await r.text()
+
+    statuses, metrics = run_api(scenario, workers=1, queue_size=1)
+
+    assert sorted(statuses) == [(200, None), (200, None), (429, "1"), (429, "1")]
+    assert len(ollama.requests) == 2
+    assert "aiiac_server_rejected_total 2" in metrics
+    assert 'aiiac_generations_total{generator="util"' in metrics
+
+def test_shutdown_lets_running_generations_finish(ollama, run_api):
+    """Test stopping the server waits for requests already being served."""
+    ollama.latency = 0.3
+
+    async def scenario(url, session, server):
+        async def post():
+            async with session.post(f"{url}/v1/generate/util", json={"prompt": "pods", "type": "kubectl"}) as r:
+                return r.status, await r.json()
+        request = asyncio.create_task(post())
+        await asyncio.sleep(0.1)
+        await server.close()
+        return await request, server.app[LIMITER].draining
+
+    (status, body), draining = run_api(scenario)
+
+    assert status == 200 and body["success"]
+    assert draining
+
+def test_api_keys_are_admission_tenants(ollama, run_api):
+    """Test a request counts against its API key's tenant and the admission stats are served."""
+    configure_admission(2)
+
+    async def scenario(url, session, server):
+        body = {"prompt": "S3 bucket", "provider": "aws"}
+        async with session.post(f"{url}/v1/generate/iac", json=body, headers={"X-API-Key": "ci-secret"}) as r:
+            response = await r.json()
+        async with session.get(f"{url}/healthz") as r:
+            health = await r.json()
+        async with session.get(f"{url}/metrics") as r:
+            return response, health, await r.text()
+
+    try:
+        response, health, metrics = run_api(scenario)
+    finally:
+        configure_admission(None)
+
+    assert response["metadata"]["metrics"]["tenant"] == "key:" + hashlib.sha256(b"ci-secret").hexdigest()[:12]
+    assert health["admission"]["admitted"] == 1 and health["admission"]["limit"] == 2
+    assert "aiiac_admission_limit 2" in metrics and "aiiac_admission_queued 0" in metrics
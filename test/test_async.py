@@ -0,0 +1,72 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.iac import IaCGenerator
+
+def test_agenerate_runs_concurrently(run_with_server):
+    """Test many generations share one event loop without serializing."""
+    async def handler(request):
+        body = await request.json()
+        await asyncio.sleep(0.2)
+        return web.json_response({"response": f"# {body['prompt'][-20:]}", "done": True})
+
+    async def scenario(url):
+        generator = IaCGenerator()
+        generator.llm.base_url = url
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            generator.agenerate(f"bucket {i}", use_cache=False) for i in range(8)
+        ))
+        return results, time.monotonic() - start
+
+    results, elapsed = run_with_server(handler, scenario)
+
+    assert all(result.success for result in results)
+    assert elapsed < 1.0
+
+def test_agenerate_shares_templates_and_models(run_with_server):
+    """Test the async path builds the same response as generate."""
+    async def handler(request):
+        body = await request.json()
+        assert "Environment: staging" in body["prompt"]
+        return web.json_response({"response": "apiVersion: v1", "done": True})
+
+    async def scenario(url):
+        generator = ConfigGenerator()
+        generator.llm.base_url = url
+        # The reply is a placeholder that fails validation; no repair round
+        return await generator.agenerate("web app", config_type="kubernetes", environment="staging", repair=0)
+
+    result = run_with_server(handler, scenario)
+
+    assert result.success
+    assert result.templates[0].language == "yaml"
+    assert result.templates[0].environment == "staging"
+    assert result.metadata["cache"]["status"] == "miss"
+
+def test_cancelling_agenerate_closes_upstream_request(run_with_server):
+    """Test cancellation disconnects from the model server."""
+    started, closed = asyncio.Event(), asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            closed.set()
+            raise
+
+    async def scenario(url):
+        generator = IaCGenerator()
+        generator.llm.base_url = url
+        task = asyncio.create_task(generator.agenerate("bucket", use_cache=False))
+        await asyncio.wait_for(started.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(closed.wait(), 5)
+
+    run_with_server(handler, scenario)
+    assert closed.is_set()
\ No newline at end of file
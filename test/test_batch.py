@@ -0,0 +1,85 @@
+import asyncio
+import json
+from aiohttp import web
+from aiiac.core import client
+from aiiac.core.similarity import configure_similarity
+from aiiac.orchestration.batch import load_manifest, run_batch
+
+def test_load_manifest_formats(tmp_path):
+    """Test YAML lists, YAML job mappings and JSONL all load."""
+    yaml_list = tmp_path / "jobs.yaml"
+    yaml_list.write_text("- generator: iac\n  prompt: S3 bucket\n")
+    yaml_mapping = tmp_path / "mapping.yaml"
+    yaml_mapping.write_text("jobs:\n  - generator: config\n    prompt: web app\n")
+    jsonl = tmp_path / "jobs.jsonl"
+    jsonl.write_text('{"generator": "util", "prompt": "scan"}\n\n{"generator": "pipeline", "prompt": "ci"}\n')
+
+    assert load_manifest(str(yaml_list)) == [{"generator": "iac", "prompt": "S3 bucket"}]
+    assert load_manifest(str(yaml_mapping)) == [{"generator": "config", "prompt": "web app"}]
+    assert [job["generator"] for job in load_manifest(str(jsonl))] == ["util", "pipeline"]
+
+def test_run_batch_bounds_concurrency_and_isolates_failures(run_with_server, tmp_path):
+    """Test jobs run at most N at a time and bad jobs fail alone."""
+    in_flight = []
+    peak = []
+
+    async def handler(request):
+        body = await request.json()
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.pop()
+        return web.json_response({"response": f"# {len(body['prompt'])}", "done": True})
+
+    entries = [
+        {"id": "bucket", "generator": "iac", "prompt": "S3 bucket", "provider": "aws", "output": str(tmp_path / "bucket")},
+        {"generator": "config", "prompt": "web app", "type": "docker", "env": "prod"},
+        {"generator": "pipeline", "prompt": "ci", "type": "jenkins"},
+        {"generator": "util", "prompt": "pods", "type": "kubectl"},
+        {"generator": "ansible", "prompt": "playbook"},
+        {"generator": "iac"},
+    ]
+    reported = []
+
+    async def scenario(url):
+        client.get_llm().base_url = url
+        return await run_batch(entries, concurrency=2, on_result=reported.append)
+
+    records = run_with_server(handler, scenario)
+
+    assert max(peak) <= 2
+    assert records == reported
+    by_id = {record["id"]: record for record in records}
+    assert by_id["bucket"]["success"]
+    assert (tmp_path / "bucket" / "main.tf").exists()
+    assert by_id["2"]["success"] and by_id["3"]["success"] and by_id["4"]["success"]
+    assert by_id["5"]["message"] == "Generator ansible not supported"
+    assert not by_id["6"]["success"]
+    assert all("elapsed" in record and "queued" in record for record in records)
+    assert by_id["4"]["valid"] and not by_id["bucket"]["valid"]
+    json.dumps(records)
+
+def test_batch_jobs_are_repaired_after_pool_validation(ollama):
+    """Test a job whose first answer fails validation is repaired and then reused."""
+    def respond(body):
+        if "fails validation" in body["prompt"]:
+            return "```yaml\napiVersion: example.com/v1\nkind: Settings\nmetadata:\n  name: api\nspec:\n  ports: [80, 443]\n```\n"
+        return "```yaml\napiVersion: example.com/v1\nkind: Settings\nmetadata:\n  name: api\nspec:\n  ports: [80, 443\n```\n"
+    ollama.responder = respond
+    configure_similarity(0.7)
+    entry = {"generator": "config", "prompt": "api settings", "type": "kubernetes", "repair": 2}
+
+    async def scenario():
+        try:
+            return [*await run_batch([entry]), *await run_batch([entry])]
+        finally:
+            await client.aclose()
+            configure_similarity(None)
+
+    first, again = asyncio.run(scenario())
+
+    assert first["valid"] is True
+    assert first["metadata"]["metrics"]["repairs"] == 1
+    assert again["valid"] is True
+    assert again["metadata"]["cache"]["status"] == "similar"
+    assert len(ollama.requests) == 2
@@ -0,0 +1,94 @@
+import time
+import pytest
+import requests
+from aiiac.core.cache import ResponseCache, cache_key
+from aiiac.generators.iac import IaCGenerator
+
+class FakeResponse:
+    """Stand-in for a non-streamed ``requests`` response."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"response": self.text, "done": True}
+
+@pytest.fixture
+def ollama_calls(monkeypatch):
+    """Count calls to the Ollama API, answering with a fixed body."""
+    calls = []
+
+    def post(session, url, json=None, **kwargs):
+        calls.append(json)
+        return FakeResponse('resource "aws_s3_bucket" "b" {}')
+
+    monkeypatch.setattr(requests.Session, "post", post)
+    return calls
+
+def test_cache_roundtrip(tmp_path):
+    """Test responses are stored and read back by key."""
+    cache = ResponseCache(tmp_path / "c.sqlite")
+    key = cache_key(model="codellama", prompt="p")
+
+    assert cache.get(key) is None
+    cache.put(key, "answer")
+    assert cache.get(key) == "answer"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cache_key_depends_on_all_fields():
+    """Test the key changes with model, temperature and options."""
+    base = dict(model="codellama", temperature=0.1, options={"stop": None}, prompt="p")
+
+    assert cache_key(**base) == cache_key(**dict(base))
+    assert cache_key(**base) != cache_key(**{**base, "model": "llama3"})
+    assert cache_key(**base) != cache_key(**{**base, "temperature": 0.2})
+    assert cache_key(**base) != cache_key(**{**base, "options": {"stop": ["```"]}})
+
+def test_cache_expires_entries(tmp_path, monkeypatch):
+    """Test entries older than the TTL are treated as misses."""
+    cache = ResponseCache(tmp_path / "c.sqlite", ttl=60)
+    cache.put("k", "answer")
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test the size budget evicts the entries read least recently."""
+    cache = ResponseCache(tmp_path / "c.sqlite", max_bytes=25)
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    cache.get("a")
+    cache.put("c", "x" * 10)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+def test_generator_reuses_cached_response(ollama_calls):
+    """Test an identical request is served from the cache."""
+    generator = IaCGenerator()
+    first = generator.generate("S3 bucket with versioning", provider="aws")
+    second = generator.generate("S3 bucket with versioning", provider="aws")
+
+    assert len(ollama_calls) == 1
+    assert first.metadata["cache"]["status"] == "miss"
+    assert second.metadata["cache"]["status"] == "hit"
+    assert second.templates[0].code == first.templates[0].code
+
+def test_generator_cache_flags(ollama_calls):
+    """Test --no-cache skips the cache and --refresh overwrites it."""
+    generator = IaCGenerator()
+    generator.generate("S3 bucket", provider="aws")
+
+    bypassed = generator.generate("S3 bucket", provider="aws", use_cache=False)
+    refreshed = generator.generate("S3 bucket", provider="aws", refresh=True)
+
+    assert len(ollama_calls) == 3
+    assert bypassed.metadata["cache"] == {"status": "disabled"}
+    assert refreshed.metadata["cache"]["status"] == "refresh"
\ No newline at end of file
@@ -0,0 +1,32 @@
+import pytest
+from aiiac.core import client
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.iac import IaCGenerator
+
+def test_generators_are_shared_per_model():
+    """Test generator instances are cached by class and model."""
+    generator = client.get_generator(IaCGenerator)
+
+    assert client.get_generator(IaCGenerator) is generator
+    assert client.get_generator(IaCGenerator, model="llama3") is not generator
+    assert client.get_generator(ConfigGenerator) is not generator
+
+def test_generators_share_llm_and_session():
+    """Test generators for one model reuse the same client and pool."""
+    iac = client.get_generator(IaCGenerator)
+    config = client.get_generator(ConfigGenerator)
+
+    assert iac.llm is config.llm
+    assert client.get_session() is client.get_session()
+
+def test_configure_pool_replaces_session():
+    """Test resizing the pool builds a new session with the new size."""
+    session = client.get_session()
+    client.configure_pool(3)
+
+    resized = client.get_session()
+    assert resized is not session
+    assert resized.get_adapter("http://localhost:11434")._pool_maxsize == 3
+
+    with pytest.raises(ValueError):
+        client.configure_pool(0)
\ No newline at end of file
@@ -0,0 +1,82 @@
+from aiiac.generators import context
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.context import artifact_facts, pack_context, terraform_facts, yaml_facts
+from aiiac.generators.pipeline import PipelineGenerator
+from aiiac.generators.prompts import count_tokens
+from aiiac.models.schemas import ConfigTemplate, IaCTemplate
+from aiiac.testing.ollama import DOCKER_SAMPLE, KUBERNETES_SAMPLE, TERRAFORM_SAMPLE
+
+def iac(code=TERRAFORM_SAMPLE):
+    return IaCTemplate(
+        code=code, language="terraform", description="Generated terraform code for aws",
+        type="iac", provider="aws", resource_type="general"
+    )
+
+def test_facts_come_from_local_parsing():
+    """Test the facts of Terraform, Kubernetes, Compose and Docker artifacts, broken ones included."""
+    facts = terraform_facts(TERRAFORM_SAMPLE)
+    assert facts["resources"] == ["aws_s3_bucket.artifacts"]
+    assert facts["variables"] == ["region"]
+    assert facts["outputs"] == ["bucket_arn"]
+    # Unclosed block: the line scan still finds it
+    assert terraform_facts(TERRAFORM_SAMPLE + 'resource "aws_sqs_queue" "jobs" {\n')["resources"][-1] == "aws_sqs_queue.jobs"
+
+    facts = yaml_facts(KUBERNETES_SAMPLE)
+    assert facts["objects"] == ["ConfigMap/api-config", "Deployment/api"]
+    assert facts["images"] == ["python:3.11-slim"]
+    assert facts["ports"] == ["8000"]
+    assert facts["env"] == ["LOG_LEVEL"]
+
+    compose = 'services:\n  web:\n    image: nginx:1.25\n    ports:\n      - "8080:80"\n    environment:\n      - DB_HOST=db\n'
+    prose = f"Dockerfile:\n```dockerfile\n{DOCKER_SAMPLE}```\n\nCompose:\n```yaml\n{compose}```\n"
+    facts = artifact_facts(prose, "dockerfile")
+    assert facts["images"] == ["python:3.11-slim", "nginx:1.25"]
+    assert facts["ports"] == ["8000", "8080:80"]
+    assert facts["env"] == ["PORT", "DB_HOST"]
+
+def test_facts_are_cached_by_content(monkeypatch):
+    """Test an artifact is parsed once however often it is packed."""
+    calls = []
+    monkeypatch.setitem(context.EXTRACTORS, "terraform", lambda code: calls.append(code) or {"resources": ["a.b"]})
+    context.clear_cache()
+
+    code = TERRAFORM_SAMPLE + "# cache test\n"
+    assert artifact_facts(code, "terraform") == artifact_facts(code, "tf") == {"resources": ["a.b"]}
+    assert len(calls) == 1
+
+def test_packing_stays_within_the_budget():
+    """Test facts are packed by priority until the budget is spent, noting what was left out."""
+    code = TERRAFORM_SAMPLE + "".join(f'resource "aws_sqs_queue" "queue_{n}" {{\n}}\n' for n in range(50))
+
+    packed = pack_context([iac(code)], 60)
+
+    assert count_tokens(packed) <= 60
+    assert packed.startswith("Generated terraform code for aws\n- outputs: bucket_arn\n- resources: aws_s3_bucket.artifacts, ")
+    assert "more)" in packed
+    assert pack_context([None], 60) == "Not provided"
+    assert count_tokens(pack_context([iac(code)], 500)) > 60
+
+def test_downstream_prompts_are_grounded_in_upstream_artifacts():
+    """Test configuration and pipeline prompts name the upstream resources, images and ports."""
+    prompt = ConfigGenerator()._build_prompt("API service", iac_template=iac(), config_type="kubernetes")
+    assert "- resources: aws_s3_bucket.artifacts" in prompt
+    assert "- outputs: bucket_arn" in prompt
+
+    code = 'variable "region" {}\nresource "aws_s3_bucket" "b" {}\noutput "arn" { value = aws_s3_bucket.b.arn }\n'
+    prompt = ConfigGenerator()._build_prompt("API service", iac_template=iac(code), config_type="terraform_vars")
+    assert "- variables: region" in prompt
+    assert "- resources: aws_s3_bucket.b" in prompt
+    assert "- outputs: arn" in prompt
+    prompt = ConfigGenerator()._build_prompt("API service", iac_template=iac(), config_type="docker")
+    assert "- resources: aws_s3_bucket.artifacts" in prompt
+
+    config = ConfigTemplate(
+        code=KUBERNETES_SAMPLE, language="yaml", description="Generated kubernetes configuration for prod",
+        type="config", format="yaml", environment="prod"
+    )
+    prompt = PipelineGenerator()._build_prompt("API service", iac_template=iac(), config_templates=[config])
+    assert "- images: python:3.11-slim" in prompt
+    assert "- objects: ConfigMap/api-config, Deployment/api" in prompt
+
+    terse = PipelineGenerator()._build_prompt("API service", iac_template=iac(), config_templates=[config], context_tokens=10)
+    assert "python:3.11-slim" not in terse
\ No newline at end of file
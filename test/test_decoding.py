@@ -0,0 +1,71 @@
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.generators.iac import IaCGenerator
+from aiiac.generators.utility import UtilityGenerator
+from aiiac.testing.ollama import TERRAFORM_SAMPLE, tokenize
+
+EXPLANATION = "\nThis configuration creates a bucket. " + "It also explains itself at length. " * 40
+
+def chatty(body):
+    """Answer like a model that keeps talking after its code block."""
+    return "Here is the Terraform code:\n\n```hcl\n" + TERRAFORM_SAMPLE + "```\n" + EXPLANATION
+
+def test_sampling_options_are_sent_per_template(ollama):
+    """Test temperature, stop and num_predict go inside Ollama's options."""
+    IaCGenerator().generate("S3 bucket", template_type="terraform", use_cache=False)
+    UtilityGenerator().generate("list pods", utility_type="kubectl", use_cache=False, temperature=0.4)
+
+    terraform, kubectl = ollama.requests
+    assert "temperature" not in terraform
+    assert terraform["options"] == {"temperature": 0.1, "num_predict": 2048, "stop": ["\n```\n"]}
+    assert "single ```hcl block" in terraform["prompt"]
+    assert kubectl["options"] == {"temperature": 0.4, "num_predict": 384}
+    assert "```" not in kubectl["prompt"]
+
+def test_generation_ends_at_the_closing_fence(ollama):
+    """Test the explanation after the code is never generated."""
+    ollama.responder = chatty
+    generator = IaCGenerator()
+
+    result = generator.generate("S3 bucket", use_cache=False)
+    stream = generator.generate_stream("S3 bucket", use_cache=False)
+    streamed = "".join(stream)
+
+    code = result.templates[0].code
+    assert code.endswith("```\n") and "explains" not in code
+    assert result.metadata["valid"]
+    assert result.metadata["metrics"]["eval_tokens"] < len(tokenize(chatty({}))) / 2
+    assert streamed in code and stream.response.templates[0].code == code
+
+    unbounded = generator.generate("S3 bucket", use_cache=False, stop=[])
+    assert unbounded.templates[0].code.endswith(EXPLANATION)
+
+def test_bare_opening_fence_does_not_end_generation(ollama):
+    """Test prose then an untagged fence is asked for again without the stop, instead of yielding no code."""
+    ollama.responder = lambda body: "Here is the Terraform code:\n```\n" + TERRAFORM_SAMPLE + "```\n"
+    generator = IaCGenerator()
+
+    result = generator.generate("S3 bucket", use_cache=False)
+    stream = generator.generate_stream("S3 bucket", use_cache=False)
+    "".join(stream)
+
+    for response in (result, stream.response):
+        assert TERRAFORM_SAMPLE in response.templates[0].code
+        assert response.metadata["valid"]
+    assert [request["options"].get("stop") for request in ollama.requests] == [["\n```\n"], None] * 2
+
+def test_num_predict_caps_output(ollama):
+    """Test the token budget ends generation early."""
+    result = UtilityGenerator().generate("list pods", utility_type="kubectl", use_cache=False, num_predict=3)
+
+    assert result.metadata["metrics"]["eval_tokens"] == 3
+    assert result.templates[0].code == "kubectl get pods"
+
+def test_cli_overrides_output_limits(ollama):
+    """Test the CLI flags replace the per-template defaults."""
+    runner = CliRunner()
+    runner.invoke(main, ["create", "S3 bucket", "--no-cache", "--max-tokens", "64", "--temperature", "0.7", "--no-stop"])
+    runner.invoke(main, ["util", "kubectl", "pods", "--no-cache", "--stop", "\\n"])
+
+    assert ollama.requests[0]["options"] == {"temperature": 0.7, "num_predict": 64}
+    assert ollama.requests[1]["options"] == {"temperature": 0.1, "num_predict": 384, "stop": ["\n"]}
\ No newline at end of file
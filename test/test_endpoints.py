@@ -0,0 +1,114 @@
+import asyncio
+import time
+import pytest
+import requests
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.core import client
+from aiiac.core.endpoints import EndpointPool, is_endpoint_failure, load_endpoints_file
+from aiiac.generators.utility import UtilityGenerator
+from aiiac.testing.ollama import StandInOllama
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Three stand-in servers, the last one serving a different model."""
+    monkeypatch.delenv("AIIAC_OLLAMA_URL", raising=False)
+    started = [
+        StandInOllama(latency=0.1).start(),
+        StandInOllama(latency=0.1).start(),
+        StandInOllama(latency=0.1, models=("llama3:latest",)).start(),
+    ]
+    client.reset()
+    yield started
+    client.reset()
+    for server in started:
+        server.stop()
+
+def generate(model="codellama", **kwargs):
+    return client.get_generator(UtilityGenerator, model).generate("pods", utility_type="kubectl", use_cache=False, **kwargs)
+
+def test_requests_go_to_the_least_loaded_endpoint_with_the_model(servers):
+    """Test concurrent requests spread evenly over the endpoints serving the model."""
+    client.configure_endpoints([server.url for server in servers], health_interval=0)
+    client.get_endpoints().check_all()
+
+    async def burst():
+        generator = client.get_generator(UtilityGenerator)
+        try:
+            return await asyncio.gather(*(
+                generator.agenerate("pods", utility_type="kubectl", use_cache=False) for _ in range(6)
+            ))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(burst())
+
+    assert all(result.success for result in results)
+    assert [len(server.requests) for server in servers] == [3, 3, 0]
+    assert {result.metadata["metrics"]["endpoint"] for result in results} == {servers[0].url, servers[1].url}
+    assert generate("llama3").metadata["metrics"]["endpoint"] == servers[2].url
+    assert all(endpoint["in_flight"] == 0 for endpoint in client.get_endpoints().status())
+
+def test_failing_endpoints_are_ejected_and_recover(servers):
+    """Test a dead server stops getting requests and comes back once it answers."""
+    down, up = servers[0], servers[1]
+    port = down._server.server_address[1]
+    down.stop()
+    client.configure_endpoints([down.url, up.url], health_interval=0, max_failures=2)
+    pool = client.get_endpoints()
+    # Without retries each request to the dead server fails its generation
+    client.get_llm().retries = 0
+
+    results = [generate() for _ in range(6)]
+
+    assert sum(not result.success for result in results) == 2
+    assert len(up.requests) == 4
+    assert [endpoint["healthy"] for endpoint in pool.status()] == [False, True]
+
+    revived = StandInOllama(port=port).start()
+    try:
+        pool.health_interval = 0.05
+        pool.start_health_checks()
+        deadline = time.monotonic() + 2
+        while not pool.endpoints[0].healthy and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert pool.endpoints[0].healthy
+        generate(), generate()
+        assert len(revived.requests) == 1
+    finally:
+        pool.close()
+        revived.stop()
+
+def test_endpoints_from_environment_and_file(servers, tmp_path, monkeypatch):
+    """Test a URL list in the environment or a file builds the pool."""
+    monkeypatch.setenv("AIIAC_OLLAMA_URL", f"{servers[0].url}, {servers[1].url}")
+    client.reset()
+    assert client.get_endpoints().urls == [servers[0].url, servers[1].url]
+
+    config = tmp_path / "endpoints.yaml"
+    config.write_text(f"endpoints:\n  - {servers[1].url}\nmax_failures: 3\n")
+    assert load_endpoints_file(config) == {"urls": [servers[1].url], "max_failures": 3}
+
+    result = CliRunner().invoke(main, ["--endpoints-file", str(config), "--endpoint", servers[2].url, "endpoints"])
+    assert result.exit_code == 0
+    assert "llama3:latest" in result.output
+    assert client.get_endpoints().urls == [servers[2].url, servers[1].url]
+
+def test_only_server_faults_count_as_failures():
+    """Test client errors and cancellations never eject an endpoint."""
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_endpoint_failure(requests.ConnectionError())
+    assert is_endpoint_failure(http_error(503))
+    assert not is_endpoint_failure(http_error(404))
+    assert not is_endpoint_failure(asyncio.CancelledError())
+    assert not is_endpoint_failure(ValueError("Ollama error: bad prompt"))
+
+    pool = EndpointPool(["http://a", "http://b"], health_interval=0)
+    with pytest.raises(ValueError):
+        with pool.lease("codellama"):
+            raise ValueError("bad prompt")
+    assert all(endpoint.healthy and endpoint.in_flight == 0 for endpoint in pool.endpoints)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import pytest
 from aiiac.generators.iac import IaCGenerator
 
-def test_iac_generator():
+def test_iac_generator(ollama):
     """Test IaC generator."""
     generator = IaCGenerator()
     result = generator.generate(
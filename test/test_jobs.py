@@ -0,0 +1,98 @@
+import threading
+import time
+from aiiac.generators.base import GenerationStream
+from aiiac.models.schemas import GeneratorResponse
+from aiiac.web.jobs import JobManager, stream_work
+
+class SlowGenerator:
+    """Generator double that emits chunks until released."""
+
+    def __init__(self, chunks=3):
+        self.chunks = chunks
+        self.release = threading.Event()
+        self.calls = 0
+        self.closed = False
+
+    def generate_stream(self, prompt, **kwargs):
+        self.calls += 1
+
+        def chunks():
+            try:
+                for i in range(self.chunks):
+                    self.release.wait(5)
+                    yield f"{i}"
+                return GeneratorResponse(success=True, message="ok")
+            except GeneratorExit:
+                self.closed = True
+                raise
+
+        return GenerationStream(chunks())
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_job_streams_progress_and_response():
+    """Test a job exposes its partial output and final response."""
+    manager = JobManager(max_workers=2)
+    generator = SlowGenerator()
+    generator.release.set()
+
+    job = manager.submit("k", stream_work(generator, "prompt"), label="Done!")
+    wait_until(lambda: job.done)
+
+    assert job.status == "done"
+    assert job.text == "012"
+    assert job.response.success
+    assert manager.active_jobs() == []
+    manager.shutdown()
+
+def test_identical_requests_share_one_job():
+    """Test concurrent identical requests do the work once."""
+    manager = JobManager(max_workers=2)
+    generator = SlowGenerator()
+
+    first = manager.submit("k", stream_work(generator, "prompt"))
+    second = manager.submit("k", stream_work(generator, "prompt"))
+    other = manager.submit("other", stream_work(generator, "prompt"))
+
+    assert first is second
+    assert other is not first
+    generator.release.set()
+    wait_until(lambda: first.done and other.done)
+    assert generator.calls == 2
+    manager.shutdown()
+
+def test_cancel_waits_for_last_subscriber():
+    """Test releasing a shared job only cancels it when nobody waits."""
+    manager = JobManager(max_workers=1)
+    generator = SlowGenerator(chunks=100)
+
+    job = manager.submit("k", stream_work(generator, "prompt"))
+    manager.submit("k", stream_work(generator, "prompt"))
+    manager.release(job)
+    assert not job.cancelled
+
+    manager.release(job)
+    generator.release.set()
+    wait_until(lambda: job.done)
+
+    assert job.status == "cancelled"
+    assert generator.closed
+    manager.shutdown()
+
+def test_failed_work_reports_error():
+    """Test exceptions in job work end the job as failed."""
+    manager = JobManager(max_workers=1)
+
+    def work(job):
+        raise RuntimeError("model unavailable")
+
+    job = manager.submit("k", work)
+    wait_until(lambda: job.done)
+
+    assert job.status == "failed"
+    assert job.error == "model unavailable"
+    manager.shutdown()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import os
+import stat
+import pytest
+from click.testing import CliRunner
+from aiiac import cli
+from aiiac.core.metrics import Histogram, generation_metrics, get_metrics
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.iac import IaCGenerator
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    get_metrics().reset()
+    yield get_metrics()
+    get_metrics().reset()
+
+def test_generation_metrics_converts_ollama_timings():
+    """Test nanosecond durations become seconds next to client timings."""
+    metrics = generation_metrics({
+        "total_duration": 2_000_000_000,
+        "load_duration": 500_000_000,
+        "prompt_eval_count": 12,
+        "prompt_eval_duration": 250_000_000,
+        "eval_count": 100,
+        "eval_duration": 1_000_000_000,
+        "request": 2.1
+    })
+
+    assert metrics["load"] == 0.5
+    assert metrics["prompt_eval"] == 0.25
+    assert metrics["tokens_per_second"] == 100
+    assert metrics["queue"] == pytest.approx(0.1)
+
+def test_generation_attaches_and_aggregates_metrics(ollama, fresh_metrics):
+    """Test each generation reports its timings and feeds the histograms."""
+    generator = IaCGenerator()
+    first = generator.generate("S3 bucket")
+    generator.generate("S3 bucket")
+    ConfigGenerator().generate("API", config_type="docker", use_cache=False)
+
+    metrics = first.metadata["metrics"]
+    assert (metrics["generator"], metrics["template"], metrics["model"]) == ("iac", "terraform", "codellama")
+    assert metrics["eval_tokens"] > 0
+    assert metrics["wall"] >= metrics["request"] > 0
+    assert "validation" in metrics
+    assert first.metadata["valid"]
+
+    rows = {(row["generator"], row["template"]): row for row in fresh_metrics.summary()}
+    assert rows[("iac", "terraform")]["count"] == 2
+    assert rows[("config", "docker")]["count"] == 1
+
+    text = fresh_metrics.render_prometheus()
+    assert 'aiiac_generations_total{generator="iac",template="terraform",model="codellama",status="success",cache="hit"} 1' in text
+    assert 'aiiac_wall_seconds_count{generator="iac",template="terraform",model="codellama"} 2' in text
+
+def test_streamed_generation_reports_first_token(ollama):
+    """Test streaming records the time to the first chunk."""
+    stream = IaCGenerator().generate_stream("S3 bucket", use_cache=False)
+    list(stream)
+
+    metrics = stream.response.metadata["metrics"]
+    assert 0 < metrics["first_token"] <= metrics["request"]
+
+def test_failures_are_counted(fresh_metrics):
+    """Test failed generations show up in the aggregates."""
+    IaCGenerator().generate("S3 bucket", template_type="pulumi")
+
+    [row] = fresh_metrics.summary()
+    assert (row["template"], row["count"], row["failures"]) == ("pulumi", 1, 1)
+
+def test_histogram_quantile_stays_within_observations():
+    """Test quantiles interpolate within buckets but never beyond the data."""
+    histogram = Histogram()
+    for value in [0.2] * 9 + [3.0]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) <= 0.25
+    assert histogram.quantile(0.99) <= 3.0
+    assert histogram.mean == pytest.approx(0.48)
+
+def test_cli_stats_and_metrics_file(ollama, tmp_path):
+    """Test --stats prints the table and --metrics-file writes Prometheus text."""
+    metrics_file = tmp_path / "aiiac.prom"
+    result = CliRunner().invoke(
+        cli.main,
+        ["--stats", "--metrics-file", str(metrics_file), "create", "S3 bucket", "--no-cache"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Generation Stats" in result.stderr
+    assert "aiiac_eval_tokens_total" in metrics_file.read_text()
+    if os.name == "posix":
+        assert stat.S_IMODE(metrics_file.stat().st_mode) == 0o644
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import stat
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.testing.ollama import TERRAFORM_SAMPLE
+from aiiac.utils.output import PUBLISHED_MODE, ArtifactWriter
+
+ANSWER = f"""Here is the Terraform configuration, split into files.
+
+**main.tf**
+```hcl
+{TERRAFORM_SAMPLE}```
+
+### variables.tf
+```hcl
+variable "name" {{}}
+```
+
+```hcl
+# outputs.tf
+output "name" {{ value = var.name }}
+```
+
+```yaml title="docker-compose.yml"
+services: {{}}
+```
+"""
+
+def stream(writer, text, size=5):
+    for i in range(0, len(text), size):
+        writer.write(text[i:i + size])
+
+def test_blocks_are_split_into_named_files(tmp_path):
+    """Test headers, fence titles and first-line comments name the files."""
+    out = tmp_path / "out"
+    writer = ArtifactWriter(out)
+    stream(writer, ANSWER)
+    # Nothing is visible under its final name until the generation is done
+    assert len(list(out.iterdir())) == 4 and all(p.name.startswith(".aiiac-") for p in out.iterdir())
+
+    paths = writer.close("iac", "terraform")
+
+    assert [p.name for p in paths] == ["main.tf", "variables.tf", "outputs.tf", "docker-compose.yml"]
+    assert (out / "main.tf").read_text() == TERRAFORM_SAMPLE
+    assert (out / "outputs.tf").read_text().startswith("# outputs.tf\n")
+    assert sorted(p.name for p in out.iterdir()) == sorted(p.name for p in paths)
+    if os.name == "posix":
+        assert all(stat.S_IMODE(p.stat().st_mode) == PUBLISHED_MODE for p in paths)
+
+def test_existing_files_are_kept_unless_overwriting(tmp_path):
+    """Test repeated runs pick new names, or replace files when asked."""
+    out = tmp_path / "out"
+    for overwrite in (False, False, True):
+        writer = ArtifactWriter(out, overwrite=overwrite)
+        stream(writer, "```\nFROM alpine:3.19\n```\n```\nFROM busybox\n```\n")
+        writer.close("config", "dockerfile")
+
+    # Within one run a repeated name always gets a new file
+    assert sorted(p.name for p in out.iterdir()) == ["Dockerfile"] + [f"Dockerfile-{n}" for n in range(2, 6)]
+    assert (out / "Dockerfile").read_text() == "FROM alpine:3.19\n"
+    assert (out / "Dockerfile-5").read_text() == "FROM busybox\n"
+
+def test_existing_files_are_kept_without_hard_links(tmp_path, monkeypatch):
+    """Test file systems that refuse hard links still never get a file replaced."""
+    def refuse(src, dst):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(os, "link", refuse)
+    out = tmp_path / "out"
+    for _ in range(2):
+        writer = ArtifactWriter(out)
+        stream(writer, "```\nFROM alpine:3.19\n```\n")
+        writer.close("config", "dockerfile")
+
+    assert sorted(p.name for p in out.iterdir()) == ["Dockerfile", "Dockerfile-2"]
+    assert (out / "Dockerfile").read_text() == "FROM alpine:3.19\n"
+
+def test_unfenced_and_unsafe_output(tmp_path):
+    """Test plain output becomes one file and names never leave the directory."""
+    writer = ArtifactWriter(tmp_path / "out")
+    stream(writer, "kubectl get pods -A")
+    assert [p.name for p in writer.close("utility", "bash")] == ["utility.sh"]
+
+    writer = ArtifactWriter(tmp_path / "out")
+    stream(writer, "### ../../evil.tf\n```hcl\nresource \"a\" \"b\" {}\n")
+    assert writer.close("iac", "terraform") == [tmp_path / "out" / "main.tf"]
+
+    with ArtifactWriter(tmp_path / "aborted") as writer:
+        stream(writer, ANSWER)
+    assert list((tmp_path / "aborted").iterdir()) == []
+
+def test_create_writes_files_while_streaming(ollama, tmp_path):
+    """Test --output splits the answer into files and a failure writes none."""
+    ollama.responder = lambda body: ANSWER
+
+    result = CliRunner().invoke(main, ["create", "bucket", "-o", str(tmp_path / "out"), "--no-stop"])
+
+    assert result.exit_code == 0
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["docker-compose.yml", "main.tf", "outputs.tf", "variables.tf"]
+
+    def fail(body):
+        raise RuntimeError("model exploded")
+
+    ollama.responder = fail
+    result = CliRunner().invoke(main, ["create", "bucket", "-o", str(tmp_path / "failed"), "--no-cache"])
+    assert list((tmp_path / "failed").iterdir()) == []
\ No newline at end of file
@@ -0,0 +1,66 @@
+import pytest
+from click.testing import CliRunner
+from aiiac import registry
+from aiiac.cli import main
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.prompts import Prompt, configure_prompts, count_tokens
+from aiiac.generators.utility import UtilityGenerator
+
+@pytest.fixture(autouse=True)
+def no_cap():
+    yield
+    configure_prompts(None)
+
+def test_templates_compile_without_padding():
+    """Test compiled templates are dedented and squeezed, and fill in like str.format."""
+    source = """
+        Generate {kind} for:
+
+
+        Requirements: {requirements}
+        Literal {{braces}}
+        """
+    prompt = Prompt(source, "test/kind")
+
+    assert prompt.text == "Generate {kind} for:\n\nRequirements: {requirements}\nLiteral {{braces}}\n"
+    assert prompt.fields == ("kind", "requirements")
+    assert prompt.render(kind="YAML", requirements="a queue") == prompt.text.format(kind="YAML", requirements="a queue")
+    assert prompt.tokens < prompt.source_tokens
+
+def test_every_generator_template_is_compiled_smaller():
+    """Test each generator compiles its templates once, all of them cheaper than written."""
+    for name in registry.GENERATORS:
+        generator_class = registry.load_generator(name)
+        assert set(generator_class.PROMPTS) == set(generator_class.TEMPLATES)
+        for prompt in generator_class.PROMPTS.values():
+            assert not prompt.text.startswith((" ", "\n"))
+            assert prompt.tokens < prompt.source_tokens
+
+    built = ConfigGenerator()._build_prompt("web app", config_type="docker", environment="prod")
+    assert built.startswith("Generate Docker configuration for:\n\nRequirements: web app\n")
+
+def test_prompts_over_the_cap_fail_before_reaching_the_model(ollama):
+    """Test a prompt past its token cap fails the generation without a request."""
+    configure_prompts(50)
+    generator = UtilityGenerator()
+
+    response = generator.generate("pods " * 40, utility_type="kubectl")
+
+    assert not response.success
+    assert "over its cap of 50" in response.message
+    assert ollama.requests == []
+    assert generator.generate("pods", utility_type="kubectl").success
+    assert count_tokens("pods " * 40) == 40
+
+def test_prompts_command_reports_and_caps_token_footprint():
+    """Test aiiac prompts --stats lists every template and fails past --max-tokens."""
+    result = CliRunner().invoke(main, ["prompts", "util", "--stats"])
+
+    assert result.exit_code == 0
+    assert "util/kubectl" in result.output
+    assert "config/docker" not in result.output
+
+    result = CliRunner().invoke(main, ["prompts", "--stats", "--max-tokens", "60"])
+
+    assert result.exit_code == 1
+    assert "pipeline/github" in result.output
\ No newline at end of file
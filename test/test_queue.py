@@ -0,0 +1,91 @@
+import asyncio
+import time
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.models.schemas import GenerateRequest, GeneratorResponse
+from aiiac.orchestration import queue as queue_module
+from aiiac.orchestration.queue import JobQueue, run_workers
+
+def test_jobs_are_leased_by_priority_then_age(tmp_path):
+    """Test higher priorities go first, and a leased job is not handed out twice."""
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    low = queue.submit("iac", GenerateRequest(prompt="S3 bucket"))
+    high = queue.submit("config", GenerateRequest(prompt="redis"), priority=5)
+    later = queue.submit("utility", GenerateRequest(prompt="backup script"), priority=5)
+
+    leased = [queue.lease("a")["id"], queue.lease("b")["id"], queue.lease("c")["id"]]
+
+    assert leased == [high, later, low]
+    assert queue.lease("d") is None
+    assert queue.get(later)["generator"] == "util"
+    assert queue.counts() == {"queued": 0, "running": 3, "done": 0, "dead": 0}
+
+def test_workers_drain_the_queue_and_store_responses(ollama, tmp_path):
+    """Test submitted jobs are generated and their responses kept for later."""
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    ids = [queue.submit("iac", GenerateRequest(prompt=f"bucket {n}", provider="aws")) for n in range(3)]
+    seen = []
+
+    finished = asyncio.run(run_workers(queue, concurrency=2, poll_interval=0.01, drain=True,
+                                       on_finish=lambda job, status: seen.append(status)))
+
+    assert finished == 3 and seen == ["done"] * 3
+    assert len(ollama.requests) == 3
+    result = JobQueue(tmp_path / "jobs.sqlite").result(ids[0])
+    assert result.success and result.templates[0].code
+    assert queue.get(ids[0])["status"] == "done"
+
+def test_expired_leases_are_retried_then_dead_lettered(tmp_path):
+    """Test a job whose worker vanished runs again, up to its attempts."""
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit("iac", GenerateRequest(prompt="S3 bucket"), max_attempts=2)
+
+    assert queue.lease("crashed", lease=0.01)["attempts"] == 1
+    time.sleep(0.02)
+    assert queue.lease("retry", lease=0.01)["attempts"] == 2
+    assert not queue.renew(job_id, "crashed")
+    time.sleep(0.02)
+    assert queue.lease("late") is None
+
+    job = queue.get(job_id)
+    assert job["status"] == "dead" and job["error"] == "Lease expired on the last attempt"
+    # The lost worker's late answer does not resurrect the job
+    assert queue.finish(job_id, "retry", GeneratorResponse(success=True, message="")) == "dead"
+
+def test_failed_generations_back_off_and_can_be_requeued(ollama, tmp_path, monkeypatch):
+    """Test failures are retried with a delay, dead-lettered, and requeued by hand."""
+    monkeypatch.setattr(queue_module, "RETRY_DELAY", 0.01)
+    ollama.responder = lambda body: 1 / 0
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit("iac", GenerateRequest(prompt="S3 bucket", use_cache=False), max_attempts=2)
+    seen = []
+
+    asyncio.run(run_workers(queue, poll_interval=0.01, drain=True, on_finish=lambda job, status: seen.append(status)))
+
+    assert seen == ["queued", "dead"]
+    assert queue.get(job_id)["attempts"] == 2 and queue.get(job_id)["error"]
+    assert not queue.result(job_id).success
+
+    ollama.responder = None
+    assert queue.requeue(job_id) and not queue.requeue(job_id)
+    requeued = queue.get(job_id)
+    assert requeued["status"] == "queued" and requeued["attempts"] == 0 and requeued["error"] is None
+    asyncio.run(run_workers(queue, poll_interval=0.01, drain=True))
+    assert queue.get(job_id)["status"] == "done"
+
+def test_cli_submits_runs_and_shows_a_job(ollama, tmp_path):
+    """Test submit prints an ID that status and result understand."""
+    runner = CliRunner()
+    path = str(tmp_path / "jobs.sqlite")
+
+    submitted = runner.invoke(main, ["submit", "iac", "S3 bucket", "-c", "aws", "-p", "2", "--queue", path])
+    job_id = submitted.output.strip()
+    worked = runner.invoke(main, ["worker", "--drain", "--poll-interval", "0.01", "--queue", path])
+    status = runner.invoke(main, ["status", job_id, "--queue", path])
+    result = runner.invoke(main, ["result", job_id, "-o", str(tmp_path / "out"), "--queue", path])
+
+    assert submitted.exit_code == 0 and len(job_id) == 32
+    assert worked.exit_code == 0, worked.output
+    assert '"status": "done"' in status.output and '"priority": 2' in status.output
+    assert result.exit_code == 0 and list((tmp_path / "out").iterdir())
+    assert runner.invoke(main, ["requeue", job_id, "--queue", path]).exit_code == 1
\ No newline at end of file
@@ -0,0 +1,127 @@
+import asyncio
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.core import client
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.repair import extract_fix, failing_region, splice
+from aiiac.generators.utility import UtilityGenerator
+from aiiac.testing.ollama import PYTHON_SAMPLE
+from aiiac.validation.engine import Issue, validate
+
+QUEUES = "".join(f'resource "aws_sqs_queue" "queue_{n}" {{\n  name = "queue-{n}"\n}}\n' for n in range(100))
+
+SETTINGS = "---\n".join(
+    f"apiVersion: example.com/v1\nkind: Settings\nmetadata:\n  name: settings-{n}\nspec:\n  ports: [80, 443]\n"
+    for n in range(20)
+)
+BROKEN_SETTINGS = SETTINGS.replace("ports: [80, 443]", "ports: [80, 443", 1).replace("settings-19", "settings-last")
+
+def fenced(language, code):
+    return f"```{language}\n{code}```\n"
+
+def repairing(fix):
+    """A responder answering generations with broken YAML and repairs with ``fix(region)``."""
+    def respond(body):
+        prompt = body["prompt"]
+        if "fails validation" not in prompt:
+            return fenced("yaml", BROKEN_SETTINGS)
+        return fenced("yaml", fix(extract_fix(prompt.split("\n\n", 2)[-1])) + "\n")
+    return respond
+
+def test_failing_region_is_small_and_splices_back():
+    """Test a parse error in a 300-line file locates an 11-line region inside its block."""
+    code = fenced("hcl", QUEUES)
+    broken = code.replace('name = "queue-50"', 'name = "queue-50', 1)
+
+    errors = validate(broken, "terraform").errors
+    region = failing_region(broken, errors, "terraform")
+
+    assert errors == (Issue(153, "Unterminated string"),)
+    assert (region.start, region.end, region.language) == (148, 158, "terraform")
+    original = "\n".join(code.split("\n")[region.start - 1:region.end])
+    assert splice(broken, region, original) == code
+
+    # Close errors share a region; it never reaches past the fence
+    region = failing_region(broken, [Issue(2, "a"), Issue(9, "b"), Issue(40, "c")], "terraform")
+    assert (region.start, region.end) == (2, 14)
+    assert [issue.message for issue in region.errors] == ["a", "b"]
+
+def test_invalid_output_is_repaired_not_regenerated(ollama):
+    """Test only the failing lines go back to the model, and the fix is spliced in."""
+    ollama.responder = repairing(lambda region: region.replace("[80, 443\n", "[80, 443]\n"))
+
+    response = client.get_generator(ConfigGenerator).generate("settings", config_type="kubernetes")
+
+    assert response.metadata["valid"] is True
+    assert response.metadata["metrics"]["repairs"] == response.metadata["metrics"]["repaired"] == 1
+    assert "settings-last" in response.templates[0].code
+    repair = ollama.requests[1]["prompt"]
+    assert len(ollama.requests) == 2
+    assert "ports: [80, 443" in repair and "settings-last" not in repair
+    assert len(repair) < len(BROKEN_SETTINGS) / 4
+
+def test_saved_files_hold_the_repaired_code(ollama, tmp_path):
+    """Test --output saves the repaired code rather than the streamed answer."""
+    ollama.responder = repairing(lambda region: region.replace("[80, 443\n", "[80, 443]\n"))
+
+    result = CliRunner().invoke(main, ["config", "settings", "-o", str(tmp_path / "out")])
+
+    assert result.exit_code == 0
+    assert [path.name for path in (tmp_path / "out").iterdir()] == ["config.yaml"]
+    saved = (tmp_path / "out" / "config.yaml").read_text()
+    assert "ports: [80, 443]\n" in saved
+    assert "ports: [80, 443\n" not in saved
+
+def test_repair_rounds_are_bounded(ollama):
+    """Test an unfixable artifact gets a bounded number of repairs, or none with repair=0."""
+    ollama.responder = repairing(lambda region: region.replace("443", "443, 8080"))
+    generator = client.get_generator(ConfigGenerator)
+
+    response = generator.generate("settings", config_type="kubernetes", use_cache=False, repair=2)
+
+    assert response.metadata["valid"] is False
+    assert response.metadata["metrics"]["repairs"] == response.metadata["metrics"]["repaired"] == 2
+    assert len(ollama.requests) == 3
+
+    response = generator.generate("settings", config_type="kubernetes", use_cache=False, repair=0)
+    assert "repairs" not in response.metadata["metrics"]
+    assert len(ollama.requests) == 4
+
+def test_rejected_fixes_are_not_counted_as_repairs(ollama, tmp_path):
+    """Test a fix that changes nothing ends the repair uncounted, and --output keeps the streamed file."""
+    ollama.responder = repairing(lambda region: region)
+    generator = client.get_generator(ConfigGenerator)
+
+    response = generator.generate("settings", config_type="kubernetes", use_cache=False)
+
+    assert response.metadata["valid"] is False
+    assert response.metadata["metrics"]["repairs"] == 1
+    assert "repaired" not in response.metadata["metrics"]
+
+    result = CliRunner().invoke(main, ["config", "settings", "--no-cache", "-o", str(tmp_path / "out")])
+
+    assert result.exit_code == 0
+    assert (tmp_path / "out" / "config.yaml").read_text() == BROKEN_SETTINGS
+
+def test_python_is_repaired_on_the_async_path(ollama):
+    """Test a compile error in a generated script is repaired by agenerate too."""
+    broken = PYTHON_SAMPLE.replace("def ", "def (", 1)
+
+    def respond(body):
+        if "fails validation" not in body["prompt"]:
+            return fenced("python", broken)
+        region = extract_fix(body["prompt"].split("\n\n", 2)[-1])
+        return fenced("python", region.replace("def (", "def ") + "\n")
+    ollama.responder = respond
+
+    async def scenario():
+        try:
+            return await client.get_generator(UtilityGenerator).agenerate("scan", utility_type="network_scanner")
+        finally:
+            await client.aclose()
+
+    response = asyncio.run(scenario())
+
+    assert response.metadata["valid"] is True
+    assert PYTHON_SAMPLE.strip() in response.templates[0].code
+    assert "Invalid Python" in ollama.requests[1]["prompt"]
\ No newline at end of file
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import pytest
+from aiiac.core import client, resilience
+from aiiac.core.metrics import get_metrics
+from aiiac.core.resilience import Attempts, DeadlineExceeded, latency_window
+from aiiac.generators.utility import UtilityGenerator
+from aiiac.testing.ollama import KUBECTL_SAMPLE
+
+@pytest.fixture(autouse=True)
+def quick_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE", 0.01)
+
+def failing_first(times=1, delay=0.0):
+    """A responder whose first ``times`` requests fail, or answer after ``delay``."""
+    calls = []
+    lock = threading.Lock()
+
+    def respond(body):
+        with lock:
+            calls.append(body)
+            number = len(calls)
+        if number <= times:
+            if not delay:
+                raise RuntimeError("model crashed")
+            time.sleep(delay)
+        return KUBECTL_SAMPLE
+    return respond
+
+def generator():
+    return client.get_generator(UtilityGenerator)
+
+def test_transient_failures_are_retried(ollama):
+    """Test a 500 is retried and the response reports the attempts."""
+    get_metrics().reset()
+    ollama.responder = failing_first()
+
+    response = generator().generate("pods", utility_type="kubectl", use_cache=False)
+
+    assert response.success
+    assert len(ollama.requests) == 2
+    assert response.metadata["metrics"]["attempts"] == 2
+    assert response.metadata["metrics"]["retries"] == 1
+    assert 'aiiac_retries_total{generator="util",template="kubectl",model="codellama"} 1' in get_metrics().render_prometheus()
+
+def test_retries_give_up_at_the_deadline(ollama):
+    """Test a stuck server fails the generation at its deadline instead of hanging it."""
+    ollama.latency = 2.0
+
+    started = time.monotonic()
+    response = generator().generate("pods", utility_type="kubectl", use_cache=False, timeout=0.3)
+
+    assert not response.success
+    assert "0.3s deadline" in response.message
+    assert time.monotonic() - started < 1.5
+    assert response.metadata["metrics"]["attempts"] == 1
+
+def test_retries_are_bounded_by_count_and_deadline():
+    """Test failures are retried up to the limit, and never past the deadline."""
+    def refused(pause=0.0):
+        def attempt():
+            attempts.sent += 1
+            time.sleep(pause)
+            raise ConnectionError("refused")
+        return attempt
+
+    attempts = Attempts(None, retries=2)
+    with pytest.raises(ConnectionError) as raised:
+        attempts.run(refused())
+    assert attempts.sent == 3
+    assert raised.value.generation_info == {"attempts": 3, "retried": ["refused", "refused"]}
+
+    attempts = Attempts(0.05, retries=2)
+    with pytest.raises(DeadlineExceeded):
+        attempts.run(refused(pause=0.06))
+    assert attempts.sent == 1
+
+def test_slow_streams_are_hedged(ollama):
+    """Test a stream slower than usual gets a duplicate, and the faster one wins."""
+    ollama.responder = failing_first(delay=1.0)
+    window = latency_window("codellama", True)
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        window.record(0.05)
+    client.configure_resilience(hedge=0.95)
+    try:
+        started = time.monotonic()
+        stream = generator().generate_stream("pods", utility_type="kubectl", use_cache=False)
+        text = "".join(stream)
+    finally:
+        client.configure_resilience(hedge=0)
+
+    assert time.monotonic() - started < 0.9
+    assert text.strip() == KUBECTL_SAMPLE.strip()
+    assert stream.response.metadata["metrics"]["attempts"] == 2
+    assert stream.response.metadata["metrics"]["hedged"] == "hedge"
+
+def test_async_requests_are_hedged_and_the_loser_cancelled(ollama):
+    """Test the async path hedges too, cancelling the slower request."""
+    ollama.responder = failing_first(delay=1.0)
+    window = latency_window("codellama", False)
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        window.record(0.05)
+    llm = client.get_llm()
+    llm.hedge = 0.95
+
+    async def scenario():
+        try:
+            return await generator().agenerate("pods", utility_type="kubectl", use_cache=False)
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(scenario())
+
+    assert time.monotonic() - started < 0.9
+    assert response.success
+    assert response.metadata["metrics"]["hedged"] == "hedge"
+    assert len(ollama.requests) == 2
\ No newline at end of file
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from aiiac.core import client, singleflight
+from aiiac.generators.config import ConfigGenerator
+from aiiac.models.schemas import MAX_SAMPLES
+from aiiac.testing.ollama import KUBERNETES_SAMPLE
+
+BROKEN = "```yaml\napiVersion: v1\nkind: [unclosed\n```\n"
+
+def by_seed(answers, delays=None):
+    """A responder answering by the request's seed, after an optional per-seed delay."""
+    seen = []
+    lock = threading.Lock()
+
+    def respond(body):
+        seed = (body.get("options") or {}).get("seed")
+        with lock:
+            seen.append(seed)
+        time.sleep((delays or {}).get(seed, 0.0))
+        return answers.get(seed, BROKEN)
+    respond.seen = seen
+    return respond
+
+def generator():
+    return client.get_generator(ConfigGenerator)
+
+def test_first_valid_sample_wins(ollama):
+    """Test samples get distinct seeds and hotter temperatures, and an invalid one never wins."""
+    ollama.responder = by_seed({2: KUBERNETES_SAMPLE})
+
+    response = generator().generate("API service", config_type="kubernetes", samples=3)
+
+    assert response.success
+    assert response.metadata["valid"] is True
+    assert response.metadata["samples"]["winner"] == 2
+    assert sorted(ollama.responder.seen, key=str) == [1, 2, None]
+    temperatures = sorted(body["options"]["temperature"] for body in ollama.requests)
+    assert temperatures == sorted(set(temperatures))
+    assert generator()._samples({"samples": 10000}) == MAX_SAMPLES
+
+def test_losing_samples_are_not_waited_for(ollama):
+    """Test a quick valid sample returns without waiting for slower ones."""
+    ollama.responder = by_seed({1: KUBERNETES_SAMPLE}, delays={None: 1.0, 2: 1.0})
+    config = generator()
+
+    started = time.monotonic()
+    stream = config.generate_stream("API service behind a gateway", config_type="kubernetes", samples=3)
+    text = "".join(stream)
+
+    assert time.monotonic() - started < 0.9
+    assert "kind: Deployment" in text
+    assert stream.response.metadata["samples"]["winner"] == 1
+    # The losers drop their requests at their first chunk
+    deadline = time.monotonic() + 2.0
+    while singleflight.in_flight() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert singleflight.in_flight() == 0
+
+def test_async_samples_cancel_the_rest(ollama):
+    """Test the async path cancels the losing samples once one validates."""
+    ollama.responder = by_seed({None: KUBERNETES_SAMPLE}, delays={1: 1.0, 2: 1.0})
+    config = generator()
+
+    async def scenario():
+        try:
+            return await config.agenerate("API service with a worker", config_type="kubernetes", samples=3)
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(scenario())
+
+    assert time.monotonic() - started < 0.9
+    assert response.metadata["valid"] is True
+    assert response.metadata["samples"] == {"requested": 3, "finished": 1, "failed": 0, "winner": 0}
+
+def test_async_samples_stop_at_the_first_valid_one_after_an_invalid_one(ollama):
+    """Test an invalid sample finishing first does not keep the async path waiting."""
+    ollama.responder = by_seed(
+        {1: KUBERNETES_SAMPLE},
+        delays={None: 0.05, 1: 0.3, 2: 2.0}
+    )
+    config = generator()
+
+    async def scenario():
+        try:
+            return await config.agenerate("API service with a cron job", config_type="kubernetes", samples=3, repair=0)
+        finally:
+            await client.aclose()
+
+    started = time.monotonic()
+    response = asyncio.run(scenario())
+
+    assert time.monotonic() - started < 1.5
+    assert response.metadata["valid"] is True
+    assert response.metadata["samples"] == {"requested": 3, "finished": 2, "failed": 0, "winner": 1}
+
+def test_without_a_valid_sample_the_least_broken_wins(ollama):
+    """Test an all-invalid round still returns a sample, flagged invalid."""
+    ollama.responder = by_seed({})
+
+    response = generator().generate("API service", config_type="kubernetes", samples=2)
+
+    assert response.metadata["valid"] is False
+    assert response.metadata["samples"]["finished"] == 2
\ No newline at end of file
@@ -0,0 +1,65 @@
+import pytest
+from aiiac.core.similarity import SimilarityCache, configure_similarity, get_similarity_cache, jaccard, normalize
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.iac import IaCGenerator
+
+@pytest.fixture(autouse=True)
+def similarity_off():
+    yield
+    configure_similarity(None)
+
+def test_rephrased_requests_normalize_to_the_same_words():
+    """Test word order, punctuation, plurals and partition words do not count."""
+    ours = normalize("ECS cluster with Fargate")
+    theirs = normalize("Fargate-backed ECS clusters, aws", ignore=["aws"])
+
+    assert theirs == {"fargate", "backed", "ecs", "cluster"}
+    assert jaccard(ours, theirs) == 0.75
+
+def test_index_is_partitioned_and_bounded():
+    """Test lookups stay in their partition and old entries are evicted."""
+    index = SimilarityCache(threshold=0.75, max_entries=2)
+    index.add("aws", "ECS cluster with Fargate", "ecs")
+    index.add("gcp", "ECS cluster with Fargate", "gke")
+
+    assert index.lookup("aws", "Fargate backed ECS cluster") == ("ecs", 0.75)
+    assert index.lookup("azure", "ECS cluster with Fargate") is None
+    assert index.lookup("aws", "S3 bucket with versioning") is None
+
+    index.add("aws", "S3 bucket with versioning", "s3")
+    assert index.lookup("gcp", "ECS cluster with Fargate") is None
+    assert index.stats() == {"hits": 1, "misses": 3, "entries": 2, "threshold": 0.75}
+
+def test_similar_requests_reuse_a_validated_artifact(ollama):
+    """Test a rephrased request is answered without calling the model."""
+    configure_similarity(0.7)
+    generator = IaCGenerator()
+
+    first = generator.generate("ECS cluster with Fargate", provider="aws")
+    again = generator.generate("Fargate-backed ECS cluster, aws", provider="aws")
+    stream = generator.generate_stream("fargate ECS clusters", provider="aws")
+    streamed = "".join(stream)
+
+    assert len(ollama.requests) == 1
+    assert again.success and again.templates[0].code == first.templates[0].code == streamed
+    assert again.metadata["cache"] == {"status": "similar", "similarity": 0.75}
+    assert stream.response.metadata["cache"]["similarity"] == 1.0
+
+    generator.generate("Fargate-backed ECS cluster", provider="gcp")
+    generator.generate("Fargate-backed ECS cluster", provider="aws", refresh=True)
+    assert len(ollama.requests) == 3
+
+def test_invalid_artifacts_are_not_reused(ollama):
+    """Test only results that passed validation enter the index."""
+    configure_similarity(0.7)
+    ollama.responder = lambda body: "```yaml\napiVersion: v1\nkind: [unclosed\n```\n"
+    generator = ConfigGenerator()
+
+    broken = generator.generate("web app with redis", config_type="kubernetes", environment="production", repair=0)
+    ollama.responder = None
+    generator.generate("web app with redis", config_type="kubernetes", environment="production", refresh=True)
+    generator.generate("redis web app", config_type="kubernetes", environment="production")
+
+    assert broken.metadata["valid"] is False
+    assert len(ollama.requests) == 2
+    assert get_similarity_cache().stats()["hits"] == 1
\ No newline at end of file
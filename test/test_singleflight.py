@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from aiiac.core import client, singleflight
+from aiiac.core.metrics import get_metrics
+from aiiac.generators.utility import UtilityGenerator
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    get_metrics().reset()
+    yield
+    get_metrics().reset()
+
+def test_concurrent_identical_calls_share_one_generation(ollama):
+    """Test a burst of threads asking the same thing costs one request."""
+    ollama.latency = 0.3
+    generator = UtilityGenerator()
+    start = threading.Barrier(5)
+
+    def generate(_):
+        start.wait()
+        return generator.generate("pods", utility_type="kubectl", refresh=True)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(generate, range(5)))
+
+    assert len(ollama.requests) == 1
+    assert all(result.success and result.templates[0].code == results[0].templates[0].code for result in results)
+    assert sum(bool(result.metadata["metrics"].get("coalesced")) for result in results) == 4
+    assert singleflight.in_flight() == 0
+
+    row, = get_metrics().summary()
+    assert row["count"] == 5 and row["coalesced"] == 4
+    assert row["eval_tokens"] == results[0].metadata["metrics"]["eval_tokens"]
+    assert 'aiiac_coalesced_total{generator="util",template="kubectl",model="codellama"} 4' in get_metrics().render_prometheus()
+
+def test_async_and_streaming_callers_join_a_flight(ollama):
+    """Test async completions and streams follow a stream already in flight."""
+    ollama.latency = 0.2
+    llm = client.get_llm()
+
+    async def scenario():
+        async def stream():
+            return [chunk async for chunk in llm.astream_chunks("hello")]
+        try:
+            return await asyncio.gather(stream(), stream(), llm._acomplete("hello"))
+        finally:
+            await client.aclose()
+
+    leader, follower, (text, info) = asyncio.run(scenario())
+
+    assert len(ollama.requests) == 1
+    assert "".join(chunk.text for chunk in follower) == "".join(chunk.text for chunk in leader) == text
+    assert follower[-1].generation_info["coalesced"] and info["coalesced"]
+    assert "coalesced" not in leader[-1].generation_info
+
+def test_calls_opting_out_of_the_cache_do_not_coalesce(ollama):
+    """Test use_cache=False still asks for an answer of its own."""
+    ollama.latency = 0.2
+    generator = UtilityGenerator()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: generator.generate("pods", utility_type="kubectl", use_cache=False), range(2)))
+
+    assert len(ollama.requests) == 2
+
+def test_leader_errors_reach_followers(ollama):
+    """Test followers get the leader's error instead of hanging."""
+    def fail(body):
+        raise RuntimeError("model exploded")
+
+    ollama.latency = 0.2
+    ollama.responder = fail
+    llm = client.get_llm()
+    llm.retries = 0
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(llm._complete, "hello") for _ in range(3)]
+    errors = [future.exception() for future in futures]
+
+    assert len(ollama.requests) == 1
+    assert all(error is not None for error in errors)
+    assert singleflight.in_flight() == 0
+
+def test_followers_take_over_when_the_leader_gives_up(ollama):
+    """Test a closed leading stream hands the call to a waiting follower."""
+    ollama.latency = 0.2
+    llm = client.get_llm()
+    leader = llm.stream_chunks("hello")
+    next(leader)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        follower = executor.submit(llm._complete, "hello")
+        flight, = singleflight._flights.values()
+        while not flight.followers:
+            time.sleep(0.01)
+        leader.close()
+        text, info = follower.result()
+
+    assert len(ollama.requests) == 2
+    assert text and "coalesced" not in info
\ No newline at end of file
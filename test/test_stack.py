@@ -0,0 +1,101 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from aiiac.core import client
+from aiiac.generators.iac import IaCGenerator
+from aiiac.orchestration.stack import StackNode, build_stack, run_dag, run_stack
+
+def prompt_kind(prompt: str) -> str:
+    """Name the generator a formatted prompt came from."""
+    for kind, marker in [("iac", "Terraform code"), ("kubernetes", "Kubernetes"),
+                         ("docker", "Docker"), ("pipeline", "GitHub Actions")]:
+        if marker in prompt:
+            return kind
+    return "other"
+
+def test_stack_runs_on_critical_path(run_with_server):
+    """Test configs run in parallel after IaC and before the pipeline."""
+    events = []
+
+    async def handler(request):
+        body = await request.json()
+        kind = prompt_kind(body["prompt"])
+        events.append(("start", kind, time.monotonic()))
+        await asyncio.sleep(0.2)
+        events.append(("end", kind, time.monotonic()))
+        return web.json_response({"response": f"# {kind}", "done": True})
+
+    async def scenario(url):
+        client.get_llm().base_url = url
+        return await run_stack(
+            "Python API",
+            config_types=["kubernetes", "docker"],
+            # Placeholder replies fail validation; keep repair rounds off the timings
+            options={"use_cache": False, "repair": 0}
+        )
+
+    started = time.monotonic()
+    result = run_with_server(handler, scenario)
+    elapsed = time.monotonic() - started
+
+    assert result.success
+    assert [t.type for t in result.templates] == ["iac", "config", "config", "pipeline"]
+    assert set(result.metadata["nodes"]) == {"iac", "config:kubernetes", "config:docker", "pipeline"}
+    # Three sequential levels, not four sequential calls
+    assert elapsed < 0.75
+
+    times = {(event, kind): at for event, kind, at in events}
+    assert times[("start", "kubernetes")] >= times[("end", "iac")]
+    assert times[("start", "docker")] < times[("end", "kubernetes")]
+    assert times[("start", "pipeline")] >= max(times[("end", "kubernetes")], times[("end", "docker")])
+
+def test_stack_passes_upstream_templates(run_with_server):
+    """Test downstream prompts describe the upstream artifacts."""
+    prompts = {}
+
+    async def handler(request):
+        body = await request.json()
+        prompts[prompt_kind(body["prompt"])] = body["prompt"]
+        return web.json_response({"response": "ok", "done": True})
+
+    async def scenario(url):
+        client.get_llm().base_url = url
+        return await run_stack("API", config_types=["kubernetes"], options={"use_cache": False})
+
+    run_with_server(handler, scenario)
+
+    assert "Infrastructure: Generated terraform code for aws" in prompts["kubernetes"]
+    assert "Configuration: Generated kubernetes configuration for development" in prompts["pipeline"]
+
+def test_failed_dependency_skips_downstream(run_with_server):
+    """Test nodes are not generated when an input failed."""
+    async def handler(request):
+        return web.json_response({"response": "ok", "done": True})
+
+    async def scenario(url):
+        client.get_llm().base_url = url
+        return await run_stack("API", iac_type="pulumi", options={"use_cache": False})
+
+    result = run_with_server(handler, scenario)
+
+    assert not result.success
+    assert result.metadata["nodes"]["iac"]["message"] == "Template type pulumi not supported"
+    assert result.metadata["nodes"]["pipeline"]["message"] == "Skipped: iac failed"
+
+def test_run_dag_rejects_cycles():
+    """Test cyclic and dangling dependencies are refused."""
+    cyclic = [
+        StackNode("a", IaCGenerator, "x", depends_on=["b"]),
+        StackNode("b", IaCGenerator, "x", depends_on=["a"]),
+    ]
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_dag(cyclic))
+
+    with pytest.raises(ValueError, match="unknown node"):
+        asyncio.run(run_dag([StackNode("a", IaCGenerator, "x", depends_on=["z"])]))
+
+def test_build_stack_without_pipeline():
+    """Test an empty platform leaves the pipeline out."""
+    nodes = build_stack("API", config_types=["docker"], platform="")
+    assert [node.name for node in nodes] == ["iac", "config:docker"]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+import requests
+from aiiac.core import client
+from aiiac.generators.config import ConfigGenerator
+from aiiac.generators.pipeline import PipelineGenerator
+from aiiac.testing.ollama import Cassette, StandInOllama, tokenize
+
+def test_stand_in_answers_each_generator(ollama):
+    """Test generators get a matching artifact back from the stand-in."""
+    kubernetes = ConfigGenerator().generate("API", config_type="kubernetes", use_cache=False)
+    jenkins = PipelineGenerator().generate("API", platform="jenkins", use_cache=False)
+
+    assert "kind: Deployment" in kubernetes.templates[0].code
+    assert jenkins.templates[0].stages == ["Test", "Deploy"]
+    assert [body["stream"] for body in ollama.requests] == [False, False]
+
+def test_stream_is_paced_and_reports_stats():
+    """Test latency and token rate shape the stream like a real model."""
+    with StandInOllama(latency=0.1, tokens_per_second=100, responder=lambda body: "a b c d e f g h i j") as server:
+        llm = client.get_llm()
+        llm.base_url = server.url
+
+        started = time.monotonic()
+        chunks = list(llm.stream_chunks("prompt", use_cache=False))
+        elapsed = time.monotonic() - started
+
+    assert "".join(chunk.text for chunk in chunks) == "a b c d e f g h i j"
+    assert len(chunks) == 11
+    assert 0.2 <= elapsed < 1.0
+    info = chunks[-1].generation_info
+    assert info["eval_count"] == 10
+    assert info["done_reason"] == "stop"
+
+def test_async_client_against_stand_in():
+    """Test the aiohttp path works against the threaded stand-in."""
+    async def main(url):
+        llm = client.get_llm()
+        llm.base_url = url
+        try:
+            return await asyncio.gather(*(llm._acomplete(f"p{i}", use_cache=False) for i in range(4)))
+        finally:
+            await client.aclose()
+
+    with StandInOllama(latency=0.2, responder=lambda body: body["prompt"].upper()) as server:
+        started = time.monotonic()
+        results = asyncio.run(main(server.url))
+        elapsed = time.monotonic() - started
+
+    assert [text for text, _ in results] == ["P0", "P1", "P2", "P3"]
+    assert elapsed < 0.6
+
+def test_record_then_replay(tmp_path):
+    """Test recorded prompts replay without the upstream server."""
+    cassette = tmp_path / "cassette.jsonl"
+    with StandInOllama(responder=lambda body: f"answer to {body['prompt']}") as upstream:
+        with StandInOllama(upstream=upstream.url, record=cassette) as recorder:
+            llm = client.get_llm()
+            llm.base_url = recorder.url
+            assert llm._call("first", use_cache=False) == "answer to first"
+
+    assert len(Cassette(cassette)) == 1
+
+    with StandInOllama(replay=cassette) as replayer:
+        llm.base_url = replayer.url
+        assert "".join(c.text for c in llm.stream_chunks("first", use_cache=False)) == "answer to first"
+
+        with pytest.raises(requests.HTTPError):
+            llm._call("second", use_cache=False)
+
+def test_tags_lists_models():
+    """Test the stand-in answers model listing for health checks."""
+    with StandInOllama(models=("codellama", "llama3")) as server:
+        tags = requests.get(f"{server.url}/api/tags").json()
+
+    assert [model["name"] for model in tags["models"]] == ["codellama", "llama3"]
+
+def test_tokenize_keeps_text():
+    """Test tokens join back into the original text."""
+    text = 'resource "x" {\n  a = 1\n}\n'
+    assert "".join(tokenize(text)) == text
\ No newline at end of file
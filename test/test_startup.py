@@ -0,0 +1,64 @@
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Cold-start budget for `import aiiac.cli`, in milliseconds
+STARTUP_BUDGET_MS = float(os.environ.get("AIIAC_STARTUP_BUDGET_MS", "150"))
+
+HEAVY_MODULES = ("langchain", "langchain_core", "pydantic", "requests", "aiohttp", "yaml", "pygments")
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_times(code: str) -> List[Tuple[str, int, int]]:
+    """Run code in a fresh interpreter under -X importtime.
+
+    Returns ``(module, cumulative_us, depth)`` for every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            times.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return times
+
+def cli_import_ms() -> float:
+    """Milliseconds spent importing the aiiac CLI and everything it loads."""
+    return sum(
+        cumulative for module, cumulative, depth in import_times("import aiiac.cli")
+        if depth == 0 and module.split(".")[0] == "aiiac"
+    ) / 1000
+
+def test_cli_import_skips_heavy_dependencies():
+    """Test importing the CLI loads no generator dependencies."""
+    loaded = {module for module, _, _ in import_times("import aiiac.cli")}
+    heavy = sorted(m for m in loaded if m.split(".")[0] in HEAVY_MODULES)
+    assert heavy == []
+
+def test_list_and_version_stay_light():
+    """Test `aiiac list` and `aiiac --version` run from the static registry."""
+    code = (
+        "import sys\n"
+        "from aiiac.cli import main\n"
+        "for args in (['list'], ['--version']):\n"
+        "    try:\n"
+        "        main(args, standalone_mode=False)\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        f"print(sorted(m for m in sys.modules if m.split('.')[0] in {HEAVY_MODULES!r}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_cli_import_within_budget():
+    """Test cold CLI import time stays under the startup budget."""
+    # Best of three runs keeps scheduler noise out of the measurement
+    best = min(cli_import_ms() for _ in range(3))
+    assert best < STARTUP_BUDGET_MS, f"aiiac.cli took {best:.1f}ms to import (budget {STARTUP_BUDGET_MS:.0f}ms)"
\ No newline at end of file
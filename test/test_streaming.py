@@ -0,0 +1,74 @@
+import json
+import pytest
+import requests
+from aiiac.generators.iac import IaCGenerator
+
+class FakeStreamResponse:
+    """Stand-in for a streamed ``requests`` response."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        for line in self.lines:
+            yield json.dumps(line).encode()
+
+@pytest.fixture
+def ndjson(monkeypatch):
+    """Serve the given chunks as Ollama's NDJSON stream."""
+    def serve(*texts):
+        lines = [{"response": text, "done": False} for text in texts]
+        lines.append({"response": "", "done": True, "eval_count": len(texts)})
+        response = FakeStreamResponse(lines)
+        monkeypatch.setattr(requests.Session, "post", lambda *args, **kwargs: response)
+        return response
+    return serve
+
+def test_generate_stream_yields_chunks(ndjson):
+    """Test chunks arrive one by one and build the usual response."""
+    ndjson('resource "aws_s3_bucket" "b" {', "\n}", '\nprovider "aws" {}')
+
+    stream = IaCGenerator().generate_stream(
+        "Create an S3 bucket",
+        provider="aws",
+        template_type="terraform"
+    )
+    chunks = list(stream)
+
+    assert chunks == ['resource "aws_s3_bucket" "b" {', "\n}", '\nprovider "aws" {}']
+    assert stream.response.success
+    assert stream.response.templates[0].code == "".join(chunks)
+    assert stream.response.templates[0].provider == "aws"
+
+def test_generate_stream_closes_abandoned_request(ndjson):
+    """Test stopping early closes the upstream response."""
+    response = ndjson("a", "b", "c")
+
+    stream = IaCGenerator().generate_stream("Create an S3 bucket")
+    iterator = iter(stream)
+    assert next(iterator) == "a"
+    iterator.close()
+
+    assert response.closed
+    assert stream.response is None
+
+def test_generate_stream_unsupported_template():
+    """Test unsupported templates fail without calling the model."""
+    stream = IaCGenerator().generate_stream("x", template_type="pulumi")
+
+    assert list(stream) == []
+    assert not stream.response.success
+    assert stream.response.message == "Template type pulumi not supported"
\ No newline at end of file
@@ -0,0 +1,72 @@
+import time
+import pytest
+import requests
+from click.testing import CliRunner
+from aiiac.cli import main
+from aiiac.core import client
+from aiiac.core.metrics import get_metrics
+from aiiac.core.tuning import profile_settings, warm_up
+from aiiac.generators.utility import UtilityGenerator
+
+@pytest.fixture(autouse=True)
+def no_profile():
+    get_metrics().reset()
+    yield
+    client.configure_profile(None)
+    get_metrics().reset()
+
+def test_profile_sets_runtime_options_and_keep_alive(ollama):
+    """Test a profile reaches Ollama without changing the response cache key."""
+    llm = client.get_llm()
+    default_key = llm._cache_key("p", llm._options(None))
+    client.configure_profile("low-memory")
+
+    UtilityGenerator().generate("pods", utility_type="kubectl", use_cache=False)
+
+    body = ollama.requests[-1]
+    assert body["keep_alive"] == "1m"
+    assert body["options"]["num_ctx"] == 2048 and body["options"]["num_batch"] == 128
+    llm.num_ctx = None
+    assert llm._cache_key("p", llm._options(None)) == default_key
+
+    with pytest.raises(ValueError):
+        profile_settings("fastest")
+
+def test_warm_up_moves_load_time_out_of_generations(ollama):
+    """Test the first generation after a warm-up does not pay for the load."""
+    ollama.load_time = 0.2
+    client.configure_profile("latency")
+
+    reports = warm_up(["codellama", "codellama"])
+    result = UtilityGenerator().generate("pods", utility_type="kubectl", use_cache=False)
+
+    assert len(reports) == 1 and reports[0]["load"] == pytest.approx(0.2)
+    assert ollama.requests[0]["prompt"] == "" and ollama.requests[0]["keep_alive"] == -1
+    assert result.metadata["metrics"]["load"] == 0
+    rows = {row["generator"]: row for row in get_metrics().summary()}
+    assert rows["warmup"]["template"] == "latency" and rows["warmup"]["load"] == pytest.approx(0.2)
+
+    # Different runtime options make Ollama load the model again
+    client.configure_profile("throughput")
+    result = UtilityGenerator().generate("pods", utility_type="kubectl", use_cache=False)
+    assert result.metadata["metrics"]["load"] == pytest.approx(0.2)
+
+def test_warm_up_is_bounded_by_the_timeout(ollama):
+    """Test a server that never finishes loading fails the warm-up instead of hanging it."""
+    ollama.load_time = 5
+    llm = client.get_llm()
+    llm.timeout = 0.2
+
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        llm.warmup()
+    assert time.monotonic() - started < 2
+
+def test_warmup_command(ollama):
+    """Test the CLI reports each model's load time."""
+    ollama.load_time = 0.05
+
+    result = CliRunner().invoke(main, ["warmup"])
+
+    assert result.exit_code == 0
+    assert "codellama loaded in 0.05s" in result.output
\ No newline at end of file
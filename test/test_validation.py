@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from aiiac.testing import ollama as samples
+from aiiac.validation import engine
+from aiiac.validation.engine import Issue, validate, validate_many
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    engine.clear_cache()
+    yield
+    engine.clear_cache()
+
+@pytest.mark.parametrize("code,language", [
+    (samples.TERRAFORM_SAMPLE, "terraform"),
+    (samples.TFVARS_SAMPLE, "hcl"),
+    (samples.KUBERNETES_SAMPLE, "yaml"),
+    (samples.GITHUB_SAMPLE, "yaml"),
+    (samples.DOCKER_SAMPLE, "dockerfile"),
+    (samples.JENKINS_SAMPLE, "groovy"),
+    (samples.PYTHON_SAMPLE, "python"),
+    ("kubectl get pods", "bash"),
+])
+def test_valid_artifacts_pass(code, language):
+    """Test well-formed artifacts validate cleanly."""
+    assert validate(code, language).errors == ()
+
+def test_terraform_structure_errors():
+    """Test HCL parsing and Terraform block rules report located errors."""
+    code = (
+        'resource "aws_s3_bucket" "logs" {\n'
+        '  bucket = "logs-${var.env}-${lookup(var.names, "logs", "x")}"\n'
+        '  acl    =\n'
+        '}\n'
+        'output "arn" {\n'
+        '  description = "Bucket ARN"\n'
+        '}\n'
+    )
+    assert validate(code, "terraform").errors == (Issue(3, "Attribute 'acl' has no value"),)
+
+    code = code.replace("  acl    =\n", "  acl = \"private\"\n")
+    assert validate(code, "terraform").errors == (Issue(5, "output 'arn' has no 'value'"),)
+
+    assert validate('provider "aws" {\n  tags = [1, 2\n}\n', "terraform").errors == (Issue(2, "'[' is never closed"),)
+    assert validate("Sure! Here is the code", "terraform").errors[0].line == 1
+
+def test_kubernetes_schema_errors():
+    """Test manifests are checked per document against the bundled schemas."""
+    code = samples.KUBERNETES_SAMPLE.replace("LOG_LEVEL: info", "LOG_LEVEL: info\n  PORT: 8000")
+    code = code.replace("containerPort: 8000", "containerPort: http").replace("memory: 256Mi", "memory: 256Mi\n          imagePolicy: Always")
+
+    errors = validate(code, "yaml").errors
+    assert [issue.line for issue in errors] == [7, 27, 35]
+    assert errors[0].message == "ConfigMap.data.PORT must be a string, found a number"
+    assert "containerPort must be an integer" in errors[1].message
+    assert "Unknown field" in errors[2].message
+
+    assert validate("apiVersion: extensions/v1beta1\nkind: Deployment\nmetadata:\n  name: x\nspec: {}\n", "yaml").errors[0] == \
+        Issue(1, "Deployment is served by apps/v1, not extensions/v1beta1")
+    assert validate("a: [1, 2\nb: 3\n", "yaml").errors[0].line == 2
+
+def test_dockerfile_errors():
+    """Test instruction and argument checks."""
+    code = 'FROM python:3.11\nCOPY app\nCMD ["python", "app.py"\nEXPOSE 80/http\nRUN [ -f x ] && \\\n  echo ok\nFOO bar\n'
+    assert validate(code, "dockerfile").errors == (
+        Issue(2, "COPY needs a source and a destination"),
+        Issue(3, "CMD exec form must be a JSON array of strings"),
+        Issue(4, "Invalid port '80/http' in EXPOSE"),
+        Issue(7, "Unknown instruction 'FOO'"),
+    )
+
+def test_jenkinsfile_errors():
+    """Test bracket balance and declarative pipeline structure."""
+    empty_stage = samples.JENKINS_SAMPLE.replace("stage('Deploy') {\n            steps {", "stage('Deploy') {\n            when {")
+    assert validate(empty_stage, "groovy").errors == (Issue(9, "stage needs steps, stages, parallel or matrix"),)
+
+    unbalanced = samples.JENKINS_SAMPLE.replace("sh 'pytest'", "sh \"pytest ${env.ARGS")
+    assert validate(unbalanced, "groovy").errors == (Issue(6, "Unterminated string"),)
+
+def test_fenced_blocks_use_their_language_and_lines():
+    """Test prose is skipped and errors point into the original text."""
+    text = "Here is the Terraform:\n\n```hcl\n" + samples.TERRAFORM_SAMPLE + "```\n\nAnd a manifest:\n```yaml\nkind: [\n```\n"
+    errors = validate(text, "terraform").errors
+    assert len(errors) == 1 and errors[0].line == 28 and "Invalid YAML" in errors[0].message
+
+def test_results_are_memoized(monkeypatch):
+    """Test identical content is only checked once."""
+    calls = []
+    monkeypatch.setitem(engine._checkers, "python", lambda code: calls.append(code) or [])
+
+    validate("x = 1\n", "python")
+    validate("x = 1\n", "py")
+    validate_many([("x = 1\n", "python"), ("y = 2\n", "python"), ("y = 2\n", "python")], workers=1)
+
+    assert calls == ["x = 1\n", "y = 2\n"]
+
+def test_validate_many_in_process_pool(monkeypatch):
+    """Test bulk validation in worker processes matches inline results."""
+    monkeypatch.setattr(engine, "POOL_THRESHOLD", 2)
+    items = [(samples.TERRAFORM_SAMPLE, "terraform"), ("x = (", "python"), ("FROM\n", "dockerfile")]
+    try:
+        pooled = validate_many(items, workers=2)
+    finally:
+        engine.shutdown_pool()
+
+    engine.clear_cache()
+    assert pooled == validate_many(items, workers=1)
+    assert [result.valid for result in pooled] == [True, False, False]
+
+def test_avalidate_without_pool():
+    """Test the async entry point validates inline when no pool is given."""
+    result = asyncio.run(engine.avalidate("a: [", "yaml"))
+    assert not result.valid
+
+def test_validate_command(tmp_path):
+    """Test the CLI checks files by name and fails on any invalid one."""
+    from click.testing import CliRunner
+    from aiiac.cli import main
+
+    (tmp_path / "main.tf").write_text(samples.TERRAFORM_SAMPLE)
+    (tmp_path / "Dockerfile").write_text("RUN make\n")
+    (tmp_path / "notes.txt").write_text("skipped")
+
+    result = CliRunner().invoke(main, ["validate", str(tmp_path), "-j", "1"])
+
+    assert result.exit_code == 1
+    assert "main.tf" in result.output and "notes.txt" not in result.output
+    assert "line 1: RUN before the first FROM" in result.output
\ No newline at end of file